@@ -0,0 +1,367 @@
+"""Large documents shaped like the pages each fetcher parses.
+
+The documents are generated deterministically with the markup of the
+pages (the same shape as the fixtures in `tests/fetch/`), padded with the
+surrounding markup which real pages have, so that benchmarks run offline.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+TOPICS = [
+    "Pythonの型ヒント",
+    "Rustで書くCLI",
+    "LLMアプリの評価",
+    "非同期I/Oの基礎",
+    "Sphinxでドキュメント",
+    "テスト駆動開発",
+    "pytestのフィクスチャ",
+    "Djangoのマイグレーション",
+]
+BLOG_URL = "https://example.hatenablog.com"
+PUBLISHED_FROM = datetime(2026, 7, 31, 12, 0, tzinfo=timezone.utc)
+
+
+def _title(index: int) -> str:
+    return f"{TOPICS[index % len(TOPICS)]}を試してみた その{index + 1}"
+
+
+def hatena_blog_archive(
+    n_entries: int = 50,
+    *,
+    start: int = 0,
+    next_url: str | None = f"{BLOG_URL}/archive?page=2",
+) -> str:
+    pager = (
+        ""
+        if next_url is None
+        else f'<a href="{next_url}" class="test-pager-next" rel="next">次のページ</a>'
+    )
+    sections = "\n".join(f"""\
+<section class="archive-entry test-archive-entry autopagerize_page_element">
+  <div class="archive-entry-header">
+    <div class="date archive-date">
+      <a href="{BLOG_URL}/archive/2026/07/{index % 28 + 1:02}" rel="nofollow">
+        <time datetime="2026-07-{index % 28 + 1:02}" title="2026-07-{index % 28 + 1:02}">
+          <span class="date-year">2026</span><span class="hyphen">-</span><span class="date-month">07</span><span class="hyphen">-</span><span class="date-day">{index % 28 + 1:02}</span>
+        </time>
+      </a>
+    </div>
+    <h1 class="entry-title">
+      <a class="entry-title-link" href="{BLOG_URL}/entry/2026/07/{index % 28 + 1:02}/{index:06}">{_title(index)}</a>
+    </h1>
+  </div>
+  <div class="categories">
+    <a href="{BLOG_URL}/archive/category/Python" class="archive-category-link category-Python">Python</a>
+  </div>
+  <div class="archive-entry-body">
+    <p class="entry-description">{_title(index)}についての記事です。{"本文の抜粋。" * 10}</p>
+  </div>
+</section>""" for index in range(start, start + n_entries))
+    return f"""\
+<!DOCTYPE html>
+<html lang="ja" data-admin-domain="//blog.hatena.ne.jp">
+<head>
+  <meta charset="utf-8">
+  <title>アーカイブ - Example Blog</title>
+  {'<link rel="stylesheet" href="https://cdn.blog.st-hatena.com/css/blog.css">' * 20}
+</head>
+<body class="page-archive header-image-disable">
+  <div id="container"><div id="container-inner">
+  <header id="blog-title"><h1><a href="{BLOG_URL}/">Example Blog</a></h1></header>
+  <div id="content"><div id="content-inner"><div id="wrapper"><div id="main"><div id="main-inner">
+    <div class="archive-entries">
+{sections}
+    </div>
+    <div class="pager">
+      <span class="pager-next">{pager}</span>
+    </div>
+  </div></div></div></div></div>
+  </div></div>
+</body>
+</html>"""
+
+
+def qiita_advent_calendar(n_calendars: int = 4, n_days: int = 25) -> str:
+    """A calendar page with `n_calendars` tables (the first is parsed).
+
+    Like the real page, the store comes after the header, the calendar
+    grid, the sidebar and the JSON of the other React components, so the
+    parser has to go through all of them.
+    """
+    calendars = [
+        {
+            "name": f"カレンダー{calendar + 1}",
+            "items": [
+                {
+                    "comment": _title(calendar * n_days + day),
+                    "day": day + 1,
+                    "url": f"https://qiita.com/user{day}/items/{day:020x}",
+                    "isRevealed": True,
+                    "article": {
+                        "title": _title(calendar * n_days + day),
+                        "likesCount": day * 3,
+                        "tags": [{"name": "Python"}, {"name": "Rust"}],
+                        "body": "記事本文の抜粋。" * 20,
+                    },
+                    "user": {
+                        "urlName": f"user{day}",
+                        "profileImageUrl": "https://example.com/u.png",
+                    },
+                }
+                for day in range(n_days)
+            ],
+        }
+        for calendar in range(n_calendars)
+    ]
+    data = {
+        "adventCalendars": {"tableAdventCalendars": calendars},
+        "currentUser": None,
+        "settings": {"locale": "ja", "features": ["x"] * 100},
+    }
+    cells = [f"""\
+      <td class="style-calendar-day">
+        <div class="style-day-number">{index % 25 + 1}</div>
+        <a href="https://qiita.com/user{index}/items/{index:020x}" class="style-article-link">
+          <img src="https://example.com/u.png" alt="user{index}" width="32" height="32" loading="lazy">
+          <span class="style-comment">{_title(index)}</span>
+        </a>
+      </td>""" for index in range(n_calendars * 35)]
+    grid = "\n".join(
+        '    <tr class="style-calendar-week">\n'
+        + "\n".join(cells[week : week + 7])
+        + "\n    </tr>"
+        for week in range(0, len(cells), 7)
+    )
+    related = "\n".join(
+        f'      <li><a href="https://qiita.com/advent-calendar/2026/topic{index}">'
+        f"{TOPICS[index % len(TOPICS)]} Advent Calendar 2026</a></li>"
+        for index in range(300)
+    )
+    components = "\n".join(
+        f'<script type="application/json" data-js-react-on-rails-store="Store{index}">'
+        f"{json.dumps({'items': [_title(item) for item in range(50)]}, ensure_ascii=False)}"
+        "</script>"
+        for index in range(20)
+    )
+    return f"""\
+<!DOCTYPE html>
+<html lang="ja">
+<head>
+  <meta charset="utf-8">
+  <title>Advent Calendar 2026 - Qiita</title>
+  {'<link rel="stylesheet" href="https://cdn.qiita.com/assets/public/style.css">' * 20}
+</head>
+<body>
+<header class="style-header">
+  <nav>{'<a href="https://qiita.com/trend" class="style-nav-link">トレンド</a>' * 30}</nav>
+</header>
+<main>
+  <table class="style-calendar">
+{grid}
+  </table>
+  <aside class="style-related">
+    <ul>
+{related}
+    </ul>
+  </aside>
+</main>
+{components}
+<script type="application/json" data-js-react-on-rails-store="AppStoreWithReactOnRails">
+{json.dumps(data, ensure_ascii=False)}
+</script>
+</body>
+</html>"""
+
+
+def adventar_calendar(n_entries: int = 25) -> str:
+    items = "\n".join(f"""\
+  <li class="EntryList-item">
+    <div class="EntryList-head">
+      <div class="EntryList-date">12/{index + 1}</div>
+      <div class="EntryList-user">
+        <a href="/users/{index}"><img class="Icon" src="https://example.com/{index}.png" alt="user{index}"></a>
+      </div>
+    </div>
+    <div class="EntryList-comment">{_title(index)}</div>
+    <div class="EntryList-article">
+      <div class="EntryList-articleBody">
+        <div class="EntryList-link">
+          <a href="https://example.com/article{index}">https://example.com/article{index}</a>
+        </div>
+        <div>{_title(index)}｜user{index}</div>
+      </div>
+    </div>
+  </li>""" for index in range(n_entries))
+    return f"""\
+<!DOCTYPE html>
+<html>
+<head><title>Example Advent Calendar 2026 - Adventar</title></head>
+<body>
+<div class="CalendarTable">{'<td class="CalendarTable-day"></td>' * 35}</div>
+<ul class="EntryList">
+{items}
+</ul>
+</body>
+</html>"""
+
+
+def qiita_official_event(
+    n_items: int = 100, next_page: int | None = None, *, start: int = 0
+) -> str:
+    data = {
+        "postingCampaign": {
+            "title": "イベント",
+            "paginatedPostingCampaignArticles": {
+                "items": [
+                    {
+                        "title": _title(index),
+                        "linkUrl": f"https://qiita.com/u/items/{index:020x}",
+                        "author": {"urlName": f"user{index}"},
+                        "likesCount": index,
+                        "tags": ["Python", "AI"],
+                    }
+                    for index in range(start, start + n_items)
+                ],
+                "pageData": {"nextPage": next_page},
+            },
+        }
+    }
+    return f"""\
+<!DOCTYPE html>
+<html>
+<body>
+<script type="application/json" data-component-name="PostingCampaignDetailPage">
+{json.dumps(data, ensure_ascii=False)}
+</script>
+</body>
+</html>"""
+
+
+def hatena_bookmark_rss(n_items: int = 1000) -> bytes:
+    resources = "\n".join(
+        f'        <rdf:li rdf:resource="https://example.com/article{i}"/>'
+        for i in range(n_items)
+    )
+    items = "\n".join(f"""\
+  <item rdf:about="https://example.com/article{index}">
+    <title>{_title(index)}</title>
+    <link>https://example.com/article{index}</link>
+    <description>{_title(index)}の概要。{"説明文。" * 10}</description>
+    <content:encoded>&lt;blockquote&gt;&lt;p&gt;{_title(index)}&lt;/p&gt;&lt;/blockquote&gt;</content:encoded>
+    <dc:date>{(PUBLISHED_FROM - timedelta(minutes=index)).isoformat()}</dc:date>
+    <dc:subject>テクノロジー</dc:subject>
+    <hatena:bookmarkcount>{index % 500}</hatena:bookmarkcount>
+  </item>""" for index in range(n_items))
+    return f"""\
+<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF
+  xmlns="http://purl.org/rss/1.0/"
+  xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+  xmlns:content="http://purl.org/rss/1.0/modules/content/"
+  xmlns:dc="http://purl.org/dc/elements/1.1/"
+  xmlns:hatena="http://www.hatena.ne.jp/info/xmlns#"
+>
+  <channel rdf:about="https://b.hatena.ne.jp/entrylist/it">
+    <title>はてなブックマーク - 新着エントリー - テクノロジー</title>
+    <link>https://b.hatena.ne.jp/entrylist/it</link>
+    <description>新着エントリー</description>
+    <items>
+      <rdf:Seq>
+{resources}
+      </rdf:Seq>
+    </items>
+  </channel>
+{items}
+</rdf:RDF>""".encode()
+
+
+def github_changelog_feed(n_items: int = 10, page: int = 1) -> bytes:
+    items = "\n".join(f"""\
+  <item>
+    <title>{_title(index)}</title>
+    <link>https://github.blog/changelog/2026-07-{index % 28 + 1:02}-entry-{index}/</link>
+    <pubDate>{format_datetime(PUBLISHED_FROM - timedelta(hours=index))}</pubDate>
+    <dc:creator><![CDATA[Author]]></dc:creator>
+    <category><![CDATA[Improvement]]></category>
+    <guid isPermaLink="false">https://github.blog/changelog/?p={index}</guid>
+    <description><![CDATA[<p>{"Description of the change. " * 10}</p>]]></description>
+    <content:encoded><![CDATA[{"<p>Details of the change.</p>" * 30}]]></content:encoded>
+  </item>""" for index in range((page - 1) * n_items, page * n_items))
+    return f"""\
+<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"
+  xmlns:content="http://purl.org/rss/1.0/modules/content/"
+  xmlns:dc="http://purl.org/dc/elements/1.1/"
+  xmlns:atom="http://www.w3.org/2005/Atom"
+>
+<channel>
+  <title>The GitHub Blog: GitHub Changelog</title>
+  <link>https://github.blog/changelog</link>
+  <description>Subscribe to Changelog</description>
+{items}
+</channel>
+</rss>""".encode()
+
+
+def zenn_contest_articles(
+    n_articles: int = 48, next_page: int | None = None, *, start: int = 0
+) -> str:
+    """JSON of the Zenn articles API (`/api/articles?contest_slug=...`)."""
+    return json.dumps(
+        {
+            "articles": [
+                {
+                    "id": index,
+                    "title": _title(index),
+                    "slug": f"{index:014x}",
+                    "path": f"/user{index}/articles/{index:014x}",
+                    "emoji": "🐍",
+                    "liked_count": index % 100,
+                    "published_at": (
+                        PUBLISHED_FROM - timedelta(hours=index)
+                    ).isoformat(),
+                    "user": {"username": f"user{index}", "name": "ユーザー"},
+                }
+                for index in range(start, start + n_articles)
+            ],
+            "next_page": next_page,
+        },
+        ensure_ascii=False,
+    )
+
+
+def zenn_feed(n_items: int = 100, user: str = "example") -> bytes:
+    """RSS 2.0 of a Zenn user (`/<user>/feed?all=1` lists every article)."""
+    items = "\n".join(f"""\
+    <item>
+      <title><![CDATA[{_title(index)}]]></title>
+      <description><![CDATA[{_title(index)}について書きました。{"記事の冒頭。" * 15}]]></description>
+      <link>https://zenn.dev/{user}/articles/{index:014x}</link>
+      <guid isPermaLink="true">https://zenn.dev/{user}/articles/{index:014x}</guid>
+      <pubDate>{format_datetime(PUBLISHED_FROM - timedelta(days=index))}</pubDate>
+      <enclosure url="https://res.cloudinary.com/zenn/image/upload/og-{index}.png" length="0" type="image/png"/>
+      <dc:creator>{user}</dc:creator>
+    </item>""" for index in range(n_items))
+    return f"""\
+<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel>
+    <title><![CDATA[{user}さんのフィード]]></title>
+    <description><![CDATA[Zennの{user}さんのRSSフィードです]]></description>
+    <link>https://zenn.dev/{user}</link>
+    <image>
+      <url>https://storage.googleapis.com/zenn-user-upload/avatar/{user}.jpeg</url>
+      <title>{user}さんのフィード</title>
+      <link>https://zenn.dev/{user}</link>
+    </image>
+    <generator>zenn.dev</generator>
+    <lastBuildDate>{format_datetime(PUBLISHED_FROM)}</lastBuildDate>
+    <atom:link href="https://zenn.dev/{user}/feed" rel="self" type="application/rss+xml"/>
+    <language><![CDATA[ja]]></language>
+{items}
+  </channel>
+</rss>""".encode()
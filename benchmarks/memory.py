@@ -0,0 +1,274 @@
+"""Trace the memory of `fetch` per stage against synthetic sites.
+
+`fetch.cli._main` walks each site served locally (`benchmarks.synthetic`)
+and writes the titles in both output formats, while tracemalloc records
+the peak and retained (still allocated at the end) memory of the run and
+of its stages (dispatch, parse, http and write).
+
+Streaming fetchers should keep about one page at a time, so the peak
+should not grow with the number of pages.
+
+Example:
+    python -m benchmarks.memory --pages 10 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import tempfile
+import tracemalloc
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from benchmarks import synthetic
+from recent_state_summarizer import __version__, profiling
+from recent_state_summarizer.fetch import (
+    cli,
+    github_changelog,
+    hatena_blog,
+    qiita_official_event,
+    zenn_contest,
+)
+from recent_state_summarizer.fetch.registry import Fetcher
+from recent_state_summarizer.profiling import Profiler
+
+DEFAULT_PAGES = (10, 100)
+FORMATS = {"title-list": True, "json": False}
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    fetcher: Fetcher
+    url: Callable[[synthetic.SyntheticSite], str]
+    fetcher_kwargs: dict[str, Any] = field(default_factory=dict)
+
+
+SCENARIOS = {
+    "hatena_blog": Scenario(
+        hatena_blog._fetch_titles, synthetic.SyntheticSite.hatena_url
+    ),
+    "qiita_official_event": Scenario(
+        qiita_official_event.fetch_qiita_official_event,
+        synthetic.SyntheticSite.qiita_official_event_url,
+    ),
+    "zenn_contest": Scenario(
+        zenn_contest.fetch_zenn_contest,
+        lambda site: "https://zenn.dev/contests/synthetic",
+    ),
+    "github_changelog": Scenario(
+        github_changelog.fetch_github_changelog,
+        synthetic.SyntheticSite.github_changelog_url,
+        {"days": 36500},
+    ),
+}
+
+
+class MemoryProfiler(Profiler):
+    """Profiler which also records the traced memory of each span.
+
+    `peak_bytes` is the peak and `retained_bytes` the growth of the traced
+    memory from the start of the span. tracemalloc must be tracing.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        # Peaks seen so far by the enclosing spans
+        self._peaks: list[int] = []
+
+    @contextmanager
+    def span(self, name: str, category: str, args: dict[str, Any]):
+        started, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        self._peaks.append(started)
+        with super().span(name, category, args) as span:
+            try:
+                yield span
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(self._peaks.pop(), peak)
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                span.set(
+                    peak_bytes=peak - started,
+                    retained_bytes=current - started,
+                )
+
+
+def _fetch(
+    scenario: Scenario,
+    site: synthetic.SyntheticSite,
+    save_path: Path,
+    *,
+    save_as_title_list: bool,
+) -> None:
+    with (
+        patch.object(cli, "get_fetcher", return_value=scenario.fetcher),
+        patch.object(
+            zenn_contest, "ZENN_ARTICLES_API_URL", site.zenn_articles_api_url()
+        ),
+        contextlib.redirect_stdout(io.StringIO()),
+    ):
+        cli._main(
+            scenario.url(site),
+            save_path,
+            save_as_title_list=save_as_title_list,
+            **scenario.fetcher_kwargs,
+        )
+
+
+def _stages(profiler: MemoryProfiler) -> dict[str, dict[str, int]]:
+    stages: dict[str, dict[str, int]] = {}
+    for span in profiler.spans:
+        # Phases of HTTP requests are recorded after the fact, untraced
+        if "peak_bytes" not in span.args:
+            continue
+        stage = stages.setdefault(
+            span.name, {"count": 0, "peak_bytes": 0, "retained_bytes": 0}
+        )
+        stage["count"] += 1
+        stage["peak_bytes"] = max(stage["peak_bytes"], span.args["peak_bytes"])
+        stage["retained_bytes"] += span.args["retained_bytes"]
+    return stages
+
+
+def measure(
+    scenario: Scenario,
+    site: synthetic.SyntheticSite,
+    *,
+    save_as_title_list: bool,
+    stages: bool = True,
+) -> dict:
+    """Fetch the site once untraced to warm up (imports, caches), then
+    traced for the peak and retained memory.
+
+    With `stages`, fetch once more with `MemoryProfiler` for the breakdown.
+    Its figures include the profiler's own spans, so they are not compared
+    with the totals.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        save_path = Path(directory) / "titles"
+
+        def fetch() -> None:
+            _fetch(
+                scenario,
+                site,
+                save_path,
+                save_as_title_list=save_as_title_list,
+            )
+
+        fetch()
+
+        tracemalloc.start()
+        try:
+            started, _ = tracemalloc.get_traced_memory()
+            fetch()
+            current, peak = tracemalloc.get_traced_memory()
+            result = {
+                "lines": len(save_path.read_text(encoding="utf8").split("\n")),
+                "peak_bytes": peak - started,
+                "retained_bytes": current - started,
+            }
+            if stages:
+                with profiling.profiling(
+                    None, stream=io.StringIO(), profiler=MemoryProfiler()
+                ) as profiler:
+                    fetch()
+                result["stages"] = _stages(profiler)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run(
+    pages: Iterable[int] = DEFAULT_PAGES,
+    keyword: str | None = None,
+    *,
+    stages: bool = True,
+) -> dict:
+    results: dict[str, dict[str, dict]] = {}
+    for n_pages in pages:
+        with synthetic.serve(n_pages) as site:
+            for name, scenario in SCENARIOS.items():
+                if keyword and keyword not in name:
+                    continue
+                for format_name, save_as_title_list in FORMATS.items():
+                    results.setdefault(f"{name} ({format_name})", {})[
+                        str(n_pages)
+                    ] = measure(
+                        scenario,
+                        site,
+                        save_as_title_list=save_as_title_list,
+                        stages=stages,
+                    )
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "entries_per_page": synthetic.ENTRIES_PER_PAGE,
+        "results": results,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{'fetcher':<40}{'pages':>7}{'lines':>8}{'peak KiB':>10}"
+        f"{'kept KiB':>10}  peak KiB by stage"
+    ]
+    for name, by_pages in report["results"].items():
+        for n_pages, result in by_pages.items():
+            stages = " ".join(
+                f"{stage}={figures['peak_bytes'] / 1024:.0f}"
+                for stage, figures in result.get("stages", {}).items()
+            )
+            lines.append(
+                f"{name:<40}{n_pages:>7}{result['lines']:>8}"
+                f"{result['peak_bytes'] / 1024:>10.0f}"
+                f"{result['retained_bytes'] / 1024:>10.0f}  {stages}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_PAGES),
+        help="Numbers of pages of the synthetic sites "
+        f"(default: {' '.join(map(str, DEFAULT_PAGES))})",
+    )
+    parser.add_argument(
+        "-k", dest="keyword", help="Run fetchers containing this name"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="JSON file to save the results "
+        "(default: benchmarks/results/memory-<version>.json)",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args.pages, args.keyword)
+    output = args.output or RESULTS_DIR / f"memory-{__version__}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf8")
+    print(format_report(report))
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
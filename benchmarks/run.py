@@ -0,0 +1,213 @@
+"""Time the parsers of the fetchers with large documents, offline.
+
+Example:
+    python -m benchmarks --output results.json --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+from benchmarks import fixtures
+from recent_state_summarizer import __version__
+from recent_state_summarizer.fetch import (
+    adventar,
+    github_changelog,
+    hatena_blog,
+    hatena_bookmark,
+    qiita_advent_calendar,
+    qiita_official_event,
+    zenn_rss,
+)
+
+DEFAULT_ROUNDS = 20
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    # Returns the number of parsed items
+    func: Callable[[], int]
+    document_bytes: int
+
+
+@contextmanager
+def offline(pages: dict[tuple[str, int | None], bytes]) -> Iterator[None]:
+    """Answer `client.get` with the documents keyed by URL and page.
+
+    Pages missing from `pages` are answered with 404.
+    """
+
+    def get(url, *, params=None, **kwargs):
+        params = params or {}
+        page = params.get("paged", params.get("page"))
+        request = httpx.Request("GET", url, params=params)
+        if (content := pages.get((url, page))) is None:
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, content=content, request=request)
+
+    with patch("recent_state_summarizer.fetch.client.get", get):
+        yield
+
+
+def _count(items) -> int:
+    return sum(1 for _ in items)
+
+
+def build_benchmarks() -> list[Benchmark]:
+    hatena_html = fixtures.hatena_blog_archive(50)
+    qiita_html = fixtures.qiita_advent_calendar(4, 25)
+    adventar_html = fixtures.adventar_calendar(25)
+    event_html = fixtures.qiita_official_event(100)
+    bookmark_rss = fixtures.hatena_bookmark_rss(1000)
+    changelog_feed = fixtures.github_changelog_feed(10)
+    zenn_feed = fixtures.zenn_feed(100)
+
+    def fetch_bookmarks() -> int:
+        url = "https://b.hatena.ne.jp/entrylist/it.rss"
+        with offline({(url, None): bookmark_rss}):
+            return _count(hatena_bookmark.fetch_hatena_bookmark_rss(url))
+
+    def fetch_changelog() -> int:
+        url = github_changelog.FEED_URL
+        with offline({(url, 1): changelog_feed}):
+            # All entries are recent enough, and page 2 is 404
+            return _count(
+                github_changelog.fetch_github_changelog(url, days=36500)
+            )
+
+    def fetch_zenn() -> int:
+        url = "https://zenn.dev/example/feed?all=1"
+        with offline({(url, None): zenn_feed}):
+            return _count(zenn_rss.fetch_zenn_rss(url))
+
+    return [
+        Benchmark(
+            "hatena_blog._parse_titles",
+            lambda: _count(hatena_blog._parse_titles(hatena_html)),
+            len(hatena_html.encode()),
+        ),
+        Benchmark(
+            "qiita_advent_calendar._parse_titles",
+            lambda: _count(qiita_advent_calendar._parse_titles(qiita_html)),
+            len(qiita_html.encode()),
+        ),
+        Benchmark(
+            "adventar._parse_titles",
+            lambda: _count(adventar._parse_titles(adventar_html)),
+            len(adventar_html.encode()),
+        ),
+        Benchmark(
+            "qiita_official_event._parse_paginated_articles",
+            lambda: len(
+                qiita_official_event._parse_paginated_articles(event_html)[
+                    "items"
+                ]
+            ),
+            len(event_html.encode()),
+        ),
+        Benchmark(
+            "hatena_bookmark.fetch_hatena_bookmark_rss",
+            fetch_bookmarks,
+            len(bookmark_rss),
+        ),
+        Benchmark(
+            "github_changelog.fetch_github_changelog",
+            fetch_changelog,
+            len(changelog_feed),
+        ),
+        Benchmark("zenn_rss.fetch_zenn_rss", fetch_zenn, len(zenn_feed)),
+    ]
+
+
+def measure(benchmark: Benchmark, rounds: int = DEFAULT_ROUNDS) -> dict:
+    items = benchmark.func()  # Warm up
+    durations = []
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        benchmark.func()
+        durations.append(time.perf_counter() - started_at)
+    return {
+        "items": items,
+        "document_bytes": benchmark.document_bytes,
+        "rounds": rounds,
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.fmean(durations),
+        "stdev": statistics.stdev(durations) if rounds > 1 else 0.0,
+    }
+
+
+def run(
+    rounds: int = DEFAULT_ROUNDS, keyword: str | None = None
+) -> dict[str, object]:
+    results = {}
+    for benchmark in build_benchmarks():
+        if keyword and keyword not in benchmark.name:
+            continue
+        results[benchmark.name] = measure(benchmark, rounds)
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "results": results,
+    }
+
+
+def format_report(report: dict, baseline: dict | None = None) -> str:
+    lines = []
+    for name, result in report["results"].items():
+        line = (
+            f"{name:<50} {result['median'] * 1000:9.2f} ms "
+            f"({result['items']} items)"
+        )
+        if baseline and (previous := baseline["results"].get(name)):
+            ratio = result["median"] / previous["median"]
+            line += f"  x{ratio:.2f} vs {baseline['version']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="JSON file to save the results "
+        "(default: benchmarks/results/<version>.json)",
+    )
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument(
+        "-k", dest="keyword", help="Run benchmarks containing this name"
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        help="JSON file of previous results to compare the medians with",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args.rounds, args.keyword)
+    output = args.output or RESULTS_DIR / f"{__version__}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf8")
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf8"))
+    print(format_report(report, baseline))
+    print(f"Saved to {output}")
@@ -0,0 +1,175 @@
+"""Measure how paginating fetchers scale with the number of pages.
+
+Each fetcher walks a synthetic site served locally (`benchmarks.synthetic`)
+and its wall time and peak traced memory are recorded per page count.
+A failure (e.g. RecursionError) is recorded instead of stopping the run.
+
+Example:
+    python -m benchmarks.scaling --pages 1 10 100 1000 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from benchmarks import synthetic
+from recent_state_summarizer import __version__
+from recent_state_summarizer.fetch import (
+    github_changelog,
+    hatena_blog,
+    qiita_official_event,
+    zenn_contest,
+)
+
+DEFAULT_PAGES = (1, 10, 100, 1000)
+RESULTS_DIR = Path(__file__).parent / "results"
+
+Scenario = Callable[[synthetic.SyntheticSite], Iterable]
+
+
+def _hatena(site: synthetic.SyntheticSite) -> Iterable:
+    return hatena_blog._fetch_titles(site.hatena_url())
+
+
+def _qiita(site: synthetic.SyntheticSite) -> Iterable:
+    return qiita_official_event.fetch_qiita_official_event(
+        site.qiita_official_event_url()
+    )
+
+
+def _zenn(site: synthetic.SyntheticSite) -> Iterable:
+    return zenn_contest.fetch_zenn_contest(
+        "https://zenn.dev/contests/synthetic"
+    )
+
+
+def _github(site: synthetic.SyntheticSite) -> Iterable:
+    return github_changelog.fetch_github_changelog(
+        site.github_changelog_url(), days=36500
+    )
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "hatena_blog._fetch_titles": _hatena,
+    "qiita_official_event.fetch_qiita_official_event": _qiita,
+    "zenn_contest.fetch_zenn_contest": _zenn,
+    "github_changelog.fetch_github_changelog": _github,
+}
+
+
+def _consume(scenario: Scenario, site: synthetic.SyntheticSite) -> int:
+    # The Zenn fetcher requests the fixed API URL
+    with (
+        patch.object(
+            zenn_contest, "ZENN_ARTICLES_API_URL", site.zenn_articles_api_url()
+        ),
+        contextlib.redirect_stdout(io.StringIO()),
+    ):
+        return sum(1 for _ in scenario(site))
+
+
+def measure(scenario: Scenario, site: synthetic.SyntheticSite) -> dict:
+    """Run the scenario twice: for the wall time, then traced for memory."""
+    try:
+        started_at = time.perf_counter()
+        items = _consume(scenario, site)
+        seconds = time.perf_counter() - started_at
+
+        tracemalloc.start()
+        try:
+            _consume(scenario, site)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as error:
+        return {"error": f"{type(error).__name__}: {error}"[:200]}
+    return {
+        "items": items,
+        "seconds": seconds,
+        "seconds_per_page": seconds / site.pages,
+        "peak_bytes": peak,
+    }
+
+
+def run(
+    pages: Iterable[int] = DEFAULT_PAGES, keyword: str | None = None
+) -> dict:
+    results: dict[str, dict[str, dict]] = {}
+    for n_pages in pages:
+        with synthetic.serve(n_pages) as site:
+            for name, scenario in SCENARIOS.items():
+                if keyword and keyword not in name:
+                    continue
+                results.setdefault(name, {})[str(n_pages)] = measure(
+                    scenario, site
+                )
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "entries_per_page": synthetic.ENTRIES_PER_PAGE,
+        "results": results,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{'fetcher':<50}{'pages':>7}{'items':>9}{'seconds':>10}"
+        f"{'ms/page':>9}{'peak MiB':>10}"
+    ]
+    for name, by_pages in report["results"].items():
+        for n_pages, result in by_pages.items():
+            if "error" in result:
+                lines.append(f"{name:<50}{n_pages:>7}  {result['error']}")
+                continue
+            lines.append(
+                f"{name:<50}{n_pages:>7}{result['items']:>9}"
+                f"{result['seconds']:>10.2f}"
+                f"{result['seconds_per_page'] * 1000:>9.2f}"
+                f"{result['peak_bytes'] / 2**20:>10.2f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_PAGES),
+        help="Numbers of pages of the synthetic sites "
+        f"(default: {' '.join(map(str, DEFAULT_PAGES))})",
+    )
+    parser.add_argument(
+        "-k", dest="keyword", help="Run fetchers containing this name"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="JSON file to save the results "
+        "(default: benchmarks/results/scaling-<version>.json)",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args.pages, args.keyword)
+    output = args.output or RESULTS_DIR / f"scaling-{__version__}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf8")
+    print(format_report(report))
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Serve synthetic multi-page sites from a local HTTP server.
+
+Pages are generated on request with the markup of `benchmarks.fixtures`:
+
+- `/hatena/archive?page=N`: Hatena blog archive linked by `test-pager-next`
+- `/qiita/official-events/<id>?page=N`: Qiita official event
+- `/zenn/api/articles?contest_slug=...&page=N`: Zenn articles API
+- `/github/changelog/feed/?paged=N`: GitHub Changelog feed (404 past N)
+
+The server runs in a child process so that its work is not measured with
+the fetchers.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks import fixtures
+
+ENTRIES_PER_PAGE = {"hatena": 20, "qiita": 20, "zenn": 48, "github": 10}
+
+
+class SyntheticSite:
+    def __init__(self, base_url: str, pages: int) -> None:
+        self.base_url = base_url
+        self.pages = pages
+
+    def render(self, path: str, query: dict[str, list[str]]):
+        """Return the content type and body of the page, or None for 404."""
+        site = path.split("/")[1]
+        page = int(query.get("paged", query.get("page", ["1"]))[0])
+        if site not in ENTRIES_PER_PAGE or not 1 <= page <= self.pages:
+            return None
+        per_page = ENTRIES_PER_PAGE[site]
+        start = (page - 1) * per_page
+        next_page = page + 1 if page < self.pages else None
+
+        if site == "hatena":
+            next_url = (
+                None
+                if next_page is None
+                else f"{self.base_url}/hatena/archive?page={next_page}"
+            )
+            body = fixtures.hatena_blog_archive(
+                per_page, start=start, next_url=next_url
+            )
+            return "text/html; charset=utf-8", body.encode()
+        if site == "qiita":
+            body = fixtures.qiita_official_event(
+                per_page, next_page, start=start
+            )
+            return "text/html; charset=utf-8", body.encode()
+        if site == "zenn":
+            body = fixtures.zenn_contest_articles(
+                per_page, next_page, start=start
+            )
+            return "application/json", body.encode()
+        return "application/rss+xml", fixtures.github_changelog_feed(
+            per_page, page
+        )
+
+    def hatena_url(self) -> str:
+        return f"{self.base_url}/hatena/archive?page=1"
+
+    def qiita_official_event_url(self) -> str:
+        return f"{self.base_url}/qiita/official-events/synthetic"
+
+    def zenn_articles_api_url(self) -> str:
+        return f"{self.base_url}/zenn/api/articles"
+
+    def github_changelog_url(self) -> str:
+        return f"{self.base_url}/github/changelog/feed/"
+
+
+def _make_handler(site: SyntheticSite):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            parsed = urlparse(self.path)
+            rendered = site.render(parsed.path, parse_qs(parsed.query))
+            if rendered is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            content_type, body = rendered
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return Handler
+
+
+def _serve(pages: int, connection) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    host, port = server.server_address
+    server.RequestHandlerClass = _make_handler(
+        SyntheticSite(f"http://{host}:{port}", pages)
+    )
+    connection.send(port)
+    server.serve_forever()
+
+
+@contextmanager
+def serve(pages: int) -> Iterator[SyntheticSite]:
+    """Serve sites of `pages` pages each in a child process."""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=_serve, args=(pages, child), daemon=True
+    )
+    process.start()
+    try:
+        port = parent.recv()
+        yield SyntheticSite(f"http://127.0.0.1:{port}", pages)
+    finally:
+        process.terminate()
+        process.join()
@@ -1,14 +1,49 @@
 import argparse
+import functools
+import json
 import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, closing
 from textwrap import dedent
 
+from recent_state_summarizer import profiling, telemetry
+from recent_state_summarizer.backends import OpenAICompatibleBackend
 from recent_state_summarizer.fetch.cli import _main as fetch_main
 from recent_state_summarizer.fetch.cli import (
+    add_days_argument,
+    add_limit_argument,
+    add_metrics_arguments,
+    add_profile_arguments,
     configure_logging,
+    maybe_collecting_metrics,
+    maybe_profiling,
+    save_title_tags,
     select_parser_builder,
 )
-from recent_state_summarizer.summarize import summarize_titles
+from recent_state_summarizer.fetch.parallel import fetch_many
+from recent_state_summarizer.incremental import (
+    DEFAULT_DRIFT_THRESHOLD,
+    summarize_incrementally,
+)
+from recent_state_summarizer.jobs import (
+    DEFAULT_LEASE_SECONDS,
+    JobQueue,
+    run_workers,
+)
+from recent_state_summarizer.selection import (
+    DEFAULT_TOKEN_BUDGET,
+    select_representative_titles,
+)
+from recent_state_summarizer.serve import DEFAULT_HOST, DEFAULT_PORT, serve
+from recent_state_summarizer.sharding import (
+    add_shard_arguments,
+    merge_outputs,
+    select_shard,
+    shard_of,
+)
+from recent_state_summarizer.summarize import print_delta, summarize_titles
+from recent_state_summarizer.watch import Watcher, load_config
 
 
 def _fetch_argv(argv: list[str] | None) -> list[str]:
@@ -39,6 +74,73 @@ def build_parser(argv: list[str] | None = None):
         "run", help="Fetch article titles and generate summary (default)"
     )
     run_parser.add_argument("url", help="URL of archive page")
+    add_days_argument(run_parser)
+    add_limit_argument(run_parser)
+    run_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Always call the API instead of reusing a cached summary",
+    )
+    run_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Update the previous summary of the URL with new titles only",
+    )
+    run_parser.add_argument(
+        "--drift-threshold",
+        type=float,
+        default=DEFAULT_DRIFT_THRESHOLD,
+        help="With --incremental, summarize all titles again when this "
+        "ratio of titles changed "
+        f"(default: {DEFAULT_DRIFT_THRESHOLD})",
+    )
+    run_parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        default=False,
+        help="Print the summary after the whole response is received",
+    )
+    run_parser.add_argument(
+        "--compact",
+        action="store_true",
+        default=False,
+        help="Normalize the titles and remove duplicates and repeated "
+        "series labels before sending them (lossy)",
+    )
+    run_parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="Keep the newest titles within this number of tokens",
+    )
+    run_parser.add_argument(
+        "--cluster",
+        action="store_true",
+        default=False,
+        help="Send only representative titles of clusters of similar titles "
+        "within --token-budget "
+        f"(default: {DEFAULT_TOKEN_BUDGET}, requires NumPy)",
+    )
+    run_parser.add_argument(
+        "--model",
+        help="Chat model (default: chosen by the size of the prompt)",
+    )
+    run_parser.add_argument(
+        "--latency-target",
+        type=float,
+        help="Prefer a model expected to answer within this many seconds",
+    )
+    run_parser.add_argument(
+        "--base-url",
+        help="Base URL of an OpenAI-compatible API "
+        "(e.g. http://localhost:8000/v1 for a local server)",
+    )
+    run_parser.add_argument(
+        "--timeout", type=float, help="Timeout of an API call in seconds"
+    )
+    add_profile_arguments(run_parser)
+    add_metrics_arguments(run_parser)
     run_parser.set_defaults(func=run_cli)
 
     build_fetch_parser = select_parser_builder(_fetch_argv(argv))
@@ -50,29 +152,345 @@ def build_parser(argv: list[str] | None = None):
         formatter_class=argparse.RawDescriptionHelpFormatter,
         description=fetch_parser_template.description,
     )
+    add_shard_arguments(fetch_parser)
     fetch_parser.set_defaults(func=fetch_cli)
 
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Fetch article titles of many URLs, parsing pages in parallel",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=dedent("""
+            Fetch the titles of the URLs listed in a file (one per line) and
+            save them as JSON Lines with the `source` URL, in the order of
+            the file.
+            Pages of Hatena blog and Adventar are parsed in worker
+            processes while the next pages are downloaded.
+
+            Example:
+                omae-douyo batch urls.txt articles.jsonl --processes 8
+            """),
+    )
+    batch_parser.add_argument(
+        "urls_path", help="File listing the URLs, one per line"
+    )
+    batch_parser.add_argument("save_path", help="Local file path")
+    batch_parser.add_argument(
+        "--as-title-list",
+        action="store_true",
+        default=False,
+        help="Save as title-only bullet list instead of JSON Lines",
+    )
+    batch_parser.add_argument(
+        "--processes",
+        type=int,
+        help="Number of worker processes parsing pages "
+        "(default: number of CPUs)",
+    )
+    add_shard_arguments(batch_parser)
+    add_profile_arguments(batch_parser)
+    add_metrics_arguments(batch_parser)
+    batch_parser.set_defaults(func=batch_cli)
+
+    merge_parser = subparsers.add_parser(
+        "merge",
+        help="Combine the JSON Lines outputs of batch shards",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=dedent("""
+            Combine the JSON Lines outputs of `batch --shard`, sorted by
+            source (keeping the order of its titles), dropping duplicated
+            URLs.
+
+            Example:
+                omae-douyo merge articles.jsonl shard-*.jsonl
+            """),
+    )
+    merge_parser.add_argument("save_path", help="Local file path")
+    merge_parser.add_argument(
+        "inputs", nargs="+", help="JSON Lines outputs of the shards"
+    )
+    merge_parser.set_defaults(
+        func=merge_cli, profile=False, metrics_textfile=None, metrics_port=None
+    )
+
+    jobs_parser = subparsers.add_parser(
+        "jobs",
+        help="Queue fetch and summarize jobs of many URLs in SQLite",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=dedent("""
+            Run a campaign over many URLs with a crash-safe job queue.
+            Workers claim the jobs with leases and retry failures with
+            backoff; run `work` again to resume after a crash (the jobs
+            of the crashed workers wait for their `--lease` to expire).
+
+            Example:
+                omae-douyo jobs enqueue campaign.db urls.txt
+                omae-douyo jobs work campaign.db --processes 4
+                omae-douyo jobs status campaign.db
+                omae-douyo jobs export campaign.db summaries.jsonl
+            """),
+    )
+    jobs_subparsers = jobs_parser.add_subparsers(
+        dest="jobs_command", required=True
+    )
+    enqueue_parser = jobs_subparsers.add_parser(
+        "enqueue", help="Queue the URLs listed in a file (one per line)"
+    )
+    enqueue_parser.add_argument("database", help="SQLite database file")
+    enqueue_parser.add_argument(
+        "urls_path", help="File listing the URLs, one per line"
+    )
+    add_shard_arguments(enqueue_parser)
+    enqueue_parser.set_defaults(func=jobs_enqueue_cli)
+    work_parser = jobs_subparsers.add_parser(
+        "work", help="Process the queued jobs until none is left"
+    )
+    work_parser.add_argument("database", help="SQLite database file")
+    work_parser.add_argument(
+        "--processes",
+        type=int,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    work_parser.add_argument(
+        "--fetch-only",
+        action="store_true",
+        default=False,
+        help="Save the titles without summarizing them",
+    )
+    work_parser.add_argument(
+        "--lease",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help="Seconds after which the job of a dead worker is claimed again "
+        f"(default: {DEFAULT_LEASE_SECONDS})",
+    )
+    work_parser.set_defaults(func=jobs_work_cli)
+    status_parser = jobs_subparsers.add_parser(
+        "status", help="Print the number of jobs per status and the failures"
+    )
+    status_parser.add_argument("database", help="SQLite database file")
+    status_parser.set_defaults(func=jobs_status_cli)
+    export_parser = jobs_subparsers.add_parser(
+        "export", help="Save the results of the done jobs as JSON Lines"
+    )
+    export_parser.add_argument("database", help="SQLite database file")
+    export_parser.add_argument("save_path", help="Local file path")
+    export_parser.set_defaults(func=jobs_export_cli)
+    jobs_parser.set_defaults(
+        profile=False, metrics_textfile=None, metrics_port=None
+    )
+
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="Poll the sources in a config on a schedule and keep new titles",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=dedent("""
+            Poll the sources listed in a JSON config, each every `interval`
+            seconds with jitter, until interrupted.
+            New titles are appended to the `output` of each source, and its
+            `summary` (if any) is updated.
+
+            Example:
+                omae-douyo watch sources.json --metrics-port 9464
+            """),
+    )
+    watch_parser.add_argument("config", help="Path of the JSON config")
+    add_metrics_arguments(watch_parser)
+    watch_parser.set_defaults(func=watch_cli, profile=False)
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Serve fetch and summarize over local HTTP",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=dedent("""
+            Serve until interrupted:
+
+            - GET /fetch?url=URL streams the titles as JSON Lines
+            - POST /summarize with {"url": URL} or {"titles": [...]}
+              returns {"summary": ...}
+
+            Example:
+                omae-douyo serve --port 8080
+                curl 'http://127.0.0.1:8080/fetch?url=https://awesome.hatenablog.com/archive/2023'
+            """),
+    )
+    serve_parser.add_argument(
+        "--host", default=DEFAULT_HOST, help=f"(default: {DEFAULT_HOST})"
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"(default: {DEFAULT_PORT})",
+    )
+    add_metrics_arguments(serve_parser)
+    serve_parser.set_defaults(func=serve_cli, profile=False)
+
     return parser
 
 
 def run_cli(args):
     with tempfile.NamedTemporaryFile(mode="w+") as tempf:
-        fetch_main(args.url, tempf.name, save_as_title_list=True)
+        fetch_main(
+            args.url,
+            tempf.name,
+            save_as_title_list=True,
+            days=args.days,
+            limit=args.limit,
+        )
         tempf.seek(0)
         titles = tempf.read()
-    summary = summarize_titles(titles)
-    print(summary)
+    if args.cluster:
+        with profiling.span("cluster"):
+            titles = "\n".join(
+                f"- {title}"
+                for title in select_representative_titles(
+                    [line.removeprefix("- ") for line in titles.splitlines()],
+                    args.token_budget or DEFAULT_TOKEN_BUDGET,
+                )
+            )
+    on_delta = None if args.no_stream else print_delta
+    summarize_kwargs = {
+        "use_cache": not args.no_cache,
+        "on_delta": on_delta,
+        "compact": args.compact,
+        "token_budget": args.token_budget,
+        "model": args.model,
+        "latency_target": args.latency_target,
+        "timeout": args.timeout,
+    }
+    with ExitStack() as stack:
+        if args.base_url:
+            summarize_kwargs["backend"] = stack.enter_context(
+                closing(OpenAICompatibleBackend(args.base_url))
+            )
+        if args.incremental:
+            summary = summarize_incrementally(
+                args.url,
+                titles,
+                drift_threshold=args.drift_threshold,
+                **summarize_kwargs,
+            )
+        else:
+            summary = summarize_titles(titles, **summarize_kwargs)
+    if on_delta is None:
+        print(summary)
+    else:
+        print()
 
 
 def fetch_cli(args):
+    if args.shard is not None and (
+        shard_of(args.url, args.shard.count, args.shard_by) != args.shard.index
+    ):
+        print(f"{args.url} is not in shard {args.shard}", file=sys.stderr)
+        return
     fetch_main(
         args.url,
         args.save_path,
         save_as_title_list=args.as_title_list,
         days=args.days,
+        limit=args.limit,
     )
 
 
+def batch_cli(args):
+    with open(args.urls_path, encoding="utf8") as f:
+        urls = [
+            line.strip()
+            for line in f
+            if line.strip() and not line.startswith("#")
+        ]
+    if args.shard is not None:
+        urls = select_shard(urls, args.shard, args.shard_by)
+        print(f"Shard {args.shard}: {len(urls)} URLs", file=sys.stderr)
+    with ProcessPoolExecutor(args.processes) as executor:
+        title_tags = (
+            {**title_tag, "source": url}
+            for url, title_tags in fetch_many(urls, executor=executor)
+            for title_tag in title_tags
+        )
+        save_title_tags(
+            args.save_path,
+            title_tags,
+            save_as_title_list=args.as_title_list,
+        )
+
+
+def merge_cli(args):
+    count = merge_outputs(args.inputs, args.save_path)
+    print(f"Merged {count} titles into {args.save_path}")
+
+
+def jobs_enqueue_cli(args):
+    with open(args.urls_path, encoding="utf8") as f:
+        urls = [
+            line.strip()
+            for line in f
+            if line.strip() and not line.startswith("#")
+        ]
+    if args.shard is not None:
+        urls = select_shard(urls, args.shard, args.shard_by)
+        print(f"Shard {args.shard}: {len(urls)} URLs", file=sys.stderr)
+    with closing(JobQueue(args.database)) as queue:
+        added = queue.enqueue(urls)
+    print(f"Queued {added} jobs ({len(urls) - added} already queued)")
+
+
+def jobs_work_cli(args):
+    processed = run_workers(
+        args.database,
+        args.processes,
+        summarize=not args.fetch_only,
+        lease=args.lease,
+    )
+    print(f"Processed {processed} jobs")
+
+
+def jobs_status_cli(args):
+    with closing(JobQueue(args.database)) as queue:
+        for status, count in queue.counts().items():
+            print(f"{status}: {count}")
+        for result in queue.results("failed"):
+            print(f"- {result.url}: {result.error}")
+
+
+def jobs_export_cli(args):
+    with closing(JobQueue(args.database)) as queue:
+        lines = (
+            json.dumps(
+                {
+                    "url": result.url,
+                    "titles": result.titles,
+                    "summary": result.summary,
+                },
+                ensure_ascii=False,
+            )
+            for result in queue.results("done")
+        )
+        with open(args.save_path, "w", encoding="utf8") as f:
+            for line in lines:
+                f.write(line + "\n")
+
+
+def watch_cli(args):
+    config = load_config(args.config)
+    on_poll = None
+    if args.metrics_textfile:
+        # The run never ends by itself, so save after each poll
+        on_poll = functools.partial(
+            telemetry.write_textfile, args.metrics_textfile
+        )
+    watcher = Watcher(config.sources, jitter=config.jitter, on_poll=on_poll)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_cli(args):
+    serve(args.host, args.port)
+
+
 def normalize_argv() -> list[str]:
     argv = sys.argv[1:]
     if len(argv) == 0:
@@ -82,7 +500,15 @@ def normalize_argv() -> list[str]:
     if argv[0] in help_flags:
         return argv
 
-    known_subcommands = {"run", "fetch"}
+    known_subcommands = {
+        "run",
+        "fetch",
+        "batch",
+        "merge",
+        "jobs",
+        "watch",
+        "serve",
+    }
     if argv[0] not in known_subcommands:
         return ["run"] + argv
 
@@ -94,4 +520,5 @@ def main():
     argv = normalize_argv()
     parser = build_parser(argv)
     args = parser.parse_args(argv)
-    args.func(args)
+    with maybe_profiling(args), maybe_collecting_metrics(args):
+        args.func(args)
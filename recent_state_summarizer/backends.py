@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterator
+from typing import Any, Protocol
+from urllib.parse import urlparse
+
+import httpx
+import openai
+
+from recent_state_summarizer.retry import (
+    RETRY_STATUSES,
+    UNPROCESSED_STATUSES,
+    TransientError,
+    parse_retry_after,
+)
+
+DEFAULT_TIMEOUT = 60.0
+MAX_CONNECTIONS = 10
+
+_TRANSIENT_OPENAI_ERRORS = (
+    openai.error.Timeout,
+    openai.error.APIConnectionError,
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.TryAgain,
+)
+
+
+class ChatBackend(Protocol):
+    """Sends chat completion requests.
+
+    `complete()` returns the whole completion as a dict, or an iterator of
+    chunk dicts when `stream` is True, in the OpenAI response format.
+    Failures worth retrying are raised as `TransientError`.
+    """
+
+    @property
+    def host(self) -> str: ...
+
+    def complete(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        model: str,
+        temperature: float,
+        stream: bool = False,
+        timeout: float | None = None,
+    ) -> dict[str, Any] | Iterator[dict[str, Any]]: ...
+
+
+class OpenAIModuleBackend:
+    """Calls the module-level API of `openai<1` (`openai.ChatCompletion`)."""
+
+    @property
+    def base_url(self) -> str:
+        return openai.api_base
+
+    @property
+    def api_key(self) -> str | None:
+        return openai.api_key or os.environ.get("OPENAI_API_KEY")
+
+    @property
+    def host(self) -> str:
+        return urlparse(openai.api_base).netloc
+
+    def complete(
+        self,
+        messages,
+        *,
+        model,
+        temperature,
+        stream=False,
+        timeout=None,
+    ):
+        try:
+            return openai.ChatCompletion.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=stream,
+                request_timeout=timeout,
+                # The usage comes in the last chunk when streaming
+                **(
+                    {"stream_options": {"include_usage": True}}
+                    if stream
+                    else {}
+                ),
+            )
+        except openai.error.OpenAIError as error:
+            if not _is_transient_openai_error(error):
+                raise
+            raise TransientError(
+                repr(error),
+                retry_after=parse_retry_after(
+                    (error.headers or {}).get("retry-after")
+                ),
+            ) from error
+
+
+def _is_transient_openai_error(error: openai.error.OpenAIError) -> bool:
+    if isinstance(error, _TRANSIENT_OPENAI_ERRORS):
+        return True
+    return (
+        isinstance(error, openai.error.APIError)
+        and error.http_status in RETRY_STATUSES
+    )
+
+
+class OpenAICompatibleBackend:
+    """Calls any OpenAI-compatible `/chat/completions` endpoint over HTTP.
+
+    One pooled `httpx.Client` is kept for all the calls, so connections
+    are reused. Pass `transport` (e.g. `httpx.MockTransport`) to serve the
+    calls in-process.
+
+    Args:
+        base_url: e.g. `http://localhost:8000/v1` for a local server
+        api_key: Sent as a bearer token (default: `OPENAI_API_KEY`)
+        timeout: Default timeout of a call in seconds
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str | None = None,
+        *,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        self.api_key = (
+            api_key or openai.api_key or os.environ.get("OPENAI_API_KEY")
+        )
+        headers = (
+            {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        )
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS),
+            transport=transport,
+        )
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.base_url).netloc
+
+    def complete(
+        self,
+        messages,
+        *,
+        model,
+        temperature,
+        stream=False,
+        timeout=None,
+    ):
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        request = self._client.build_request(
+            "POST",
+            "/chat/completions",
+            json=payload,
+            timeout=(
+                timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            ),
+        )
+        try:
+            response = self._client.send(request, stream=stream)
+        except httpx.TransportError as error:
+            raise TransientError(repr(error)) from error
+
+        if response.is_error:
+            response.read()
+            response.close()
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as error:
+                if response.status_code not in RETRY_STATUSES:
+                    raise
+                # Chained, so the status error is raised when the retries
+                # are exhausted
+                raise TransientError(
+                    f"{response.status_code} from {self.host}",
+                    retry_after=parse_retry_after(
+                        response.headers.get("retry-after")
+                    ),
+                    sent=response.status_code not in UNPROCESSED_STATUSES,
+                ) from error
+
+        if stream:
+            return _iter_events(response)
+        return response.json()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def _iter_events(response: httpx.Response) -> Iterator[dict[str, Any]]:
+    """Parse server-sent events of a streamed completion."""
+    try:
+        for line in response.iter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line.removeprefix("data:").strip()
+            if data == "[DONE]":
+                return
+            yield json.loads(data)
+    finally:
+        response.close()
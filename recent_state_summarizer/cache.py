@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from recent_state_summarizer import telemetry
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "RECENT_STATE_SUMMARIZER_CACHE_DIR"
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    if directory := os.environ.get(CACHE_DIR_ENV):
+        return Path(directory)
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "recent-state-summarizer" / "summaries"
+
+
+def summary_cache_key(
+    model: str, temperature: float, prompt_text: str, *, host: str
+) -> str:
+    """Hash everything that determines the completion into a cache key.
+
+    `host` is the API host, since the same model name may be served by
+    different servers (e.g. a local one).
+    """
+    payload = json.dumps(
+        [host, model, temperature, prompt_text], ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+class SummaryCache:
+    """Summaries stored as one JSON file per key.
+
+    Entries older than `ttl` seconds are treated as missing.
+    When the directory grows beyond `max_bytes`, the least recently used
+    entries (by file modification time, refreshed on every hit) are removed.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        *,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.directory = (
+            Path(directory) if directory is not None else default_cache_dir()
+        )
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        summary = self._get(key)
+        telemetry.inc(
+            "summary_cache_requests_total",
+            result="miss" if summary is None else "hit",
+        )
+        return summary
+
+    def _get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf8") as f:
+                entry = json.load(f)
+            created_at = entry["created_at"]
+            summary = entry["summary"]
+        except (OSError, ValueError, TypeError, KeyError):
+            # A missing or malformed entry is a miss
+            return None
+
+        if time.time() - created_at > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+
+        os.utime(path)
+        logger.debug("Summary cache hit: %s", key)
+        return summary
+
+    def set(self, key: str, summary: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # A unique temporary file per writer, so that concurrent writers
+        # (threads included) never replace each other's half-written file
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf8",
+            dir=self.directory,
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            json.dump(
+                {"created_at": time.time(), "summary": summary},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(f.name, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import logging
+import math
+import random
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+
+from recent_state_summarizer.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.9
+# A series label shared by at least this number of titles is boilerplate
+MIN_PREFIX_SHARE = 3
+# Buckets of near-duplicate candidates (see `remove_near_duplicates()`)
+MINHASH_BANDS = 8
+MINHASH_MAX_ROWS = 4
+MINHASH_MISS_RATE = 0.001
+_MERSENNE_PRIME = (1 << 61) - 1
+
+_DATE_PREFIX = re.compile(
+    r"^\d{4}\s*[-/.年]\s*\d{1,2}\s*[-/.月]\s*\d{1,2}\s*日?[\s:：|｜\-]*"
+)
+# Only bracketed labels mark a series. A word before a colon or a dash is
+# often the topic of the title (e.g. "Python: ...") and is kept.
+_PREFIX = re.compile(r"^(?:【[^】]+】|\[[^\]]+\])\s*")
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\d+")
+
+
+@dataclass(frozen=True)
+class CompactionResult:
+    titles: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def normalize_title(title: str) -> str:
+    """NFKC-normalize the title and collapse whitespace."""
+    normalized = unicodedata.normalize("NFKC", title)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def _bigrams(text: str) -> set[str]:
+    text = text.casefold()
+    if len(text) < 2:
+        return {text}
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+def remove_near_duplicates(
+    titles: list[str],
+    *,
+    similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+) -> list[str]:
+    """Keep the first of the titles whose character bigrams mostly overlap.
+
+    Exact duplicates (ignoring case) are always removed.
+    Titles with different numbers (e.g. episodes of a series) are never
+    treated as near-duplicates.
+
+    Only the titles put in the same bucket by MinHash LSH are compared,
+    so that the time grows linearly with the number of titles. A pair at
+    the default threshold is missed with a probability below
+    `MINHASH_MISS_RATE` (higher for much lower thresholds).
+    """
+    rows = _minhash_rows(similarity_threshold)
+    minhash = _MinHash()
+    buckets: dict[tuple, list[int]] = {}
+    kept: list[tuple[str, set[str]]] = []
+    seen = set()
+    for title in titles:
+        key = title.casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+
+        grams = _bigrams(title)
+        numbers = tuple(_NUMBER.findall(title))
+        signature = minhash.signature(grams)
+        bucket_keys = [
+            (numbers, band, signature[band * rows : (band + 1) * rows])
+            for band in range(MINHASH_BANDS)
+        ]
+        candidates = {
+            kept_index
+            for bucket_key in bucket_keys
+            for kept_index in buckets.get(bucket_key, ())
+        }
+        if any(
+            # Jaccard similarity cannot reach the threshold otherwise
+            min(len(grams), len(kept[i][1]))
+            >= similarity_threshold * max(len(grams), len(kept[i][1]))
+            and _jaccard(grams, kept[i][1]) >= similarity_threshold
+            for i in candidates
+        ):
+            continue
+        for bucket_key in bucket_keys:
+            buckets.setdefault(bucket_key, []).append(len(kept))
+        kept.append((title, grams))
+    return [title for title, _ in kept]
+
+
+def _minhash_rows(similarity_threshold: float) -> int:
+    """Return the most rows per band which keep the misses rare enough."""
+    if similarity_threshold >= 1:
+        return MINHASH_MAX_ROWS
+    if similarity_threshold <= 0:
+        return 1
+    # A pair of similarity t shares a band with probability
+    # 1 - (1 - t ** rows) ** bands
+    max_rows = math.log(
+        1 - MINHASH_MISS_RATE ** (1 / MINHASH_BANDS)
+    ) / math.log(similarity_threshold)
+    return max(1, min(MINHASH_MAX_ROWS, math.floor(max_rows)))
+
+
+class _MinHash:
+    """MinHash signatures of sets of strings, the same in every process."""
+
+    def __init__(self) -> None:
+        generator = random.Random(0)
+        self._coefficients = [
+            (
+                generator.randrange(1, _MERSENNE_PRIME),
+                generator.randrange(0, _MERSENNE_PRIME),
+            )
+            for _ in range(MINHASH_BANDS * MINHASH_MAX_ROWS)
+        ]
+        self._hashes: dict[str, tuple[int, ...]] = {}
+
+    def _hash(self, item: str) -> tuple[int, ...]:
+        if (hashes := self._hashes.get(item)) is None:
+            value = zlib.crc32(item.encode("utf8"))
+            hashes = tuple(
+                (a * value + b) % _MERSENNE_PRIME
+                for a, b in self._coefficients
+            )
+            self._hashes[item] = hashes
+        return hashes
+
+    def signature(self, items: set[str]) -> tuple[int, ...]:
+        return tuple(map(min, zip(*map(self._hash, items))))
+
+
+def strip_boilerplate(titles: list[str]) -> list[str]:
+    """Remove date prefixes and series labels repeated across many titles.
+
+    A series label is a bracketed prefix (e.g. `【連載】`). When many titles
+    share it, it is kept on its first occurrence only.
+    """
+    titles = [_DATE_PREFIX.sub("", title) or title for title in titles]
+    prefixes = [
+        match.group(0) if (match := _PREFIX.match(title)) else None
+        for title in titles
+    ]
+    counts = Counter(prefix for prefix in prefixes if prefix)
+    seen = set()
+    stripped = []
+    for title, prefix in zip(titles, prefixes):
+        if prefix and counts[prefix] >= MIN_PREFIX_SHARE and title != prefix:
+            if prefix in seen:
+                title = title.removeprefix(prefix)
+            seen.add(prefix)
+        stripped.append(title)
+    return stripped
+
+
+def trim_to_budget(titles: list[str], token_budget: int) -> list[str]:
+    """Keep leading titles (the newest) while the bullet list fits."""
+    trimmed = []
+    total = 0
+    for title in titles:
+        total += estimate_tokens(f"- {title}\n")
+        if total > token_budget:
+            break
+        trimmed.append(title)
+    return trimmed
+
+
+def fit_to_budget(titles: str, token_budget: int) -> str:
+    """Keep the leading titles (the newest) of a bullet list which fit."""
+    lines = [line.strip() for line in titles.splitlines() if line.strip()]
+    trimmed = trim_to_budget(
+        [line.removeprefix("- ") for line in lines], token_budget
+    )
+    return "\n".join(f"- {title}" for title in trimmed)
+
+
+def compact_titles(
+    titles: str,
+    *,
+    token_budget: int | None = None,
+    similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+) -> CompactionResult:
+    """Shrink a bullet list of titles before embedding it in the prompt.
+
+    Titles are normalized, de-duplicated (exactly and nearly), stripped of
+    boilerplate prefixes, and trimmed to `token_budget` tokens if given.
+    """
+    lines = [line.strip() for line in titles.splitlines() if line.strip()]
+    compacted = [normalize_title(line.removeprefix("- ")) for line in lines]
+    compacted = strip_boilerplate(compacted)
+    compacted = remove_near_duplicates(
+        compacted, similarity_threshold=similarity_threshold
+    )
+    if token_budget is not None:
+        compacted = trim_to_budget(compacted, token_budget)
+
+    compacted_titles = "\n".join(f"- {title}" for title in compacted)
+    result = CompactionResult(
+        titles=compacted_titles,
+        tokens_before=estimate_tokens(titles),
+        tokens_after=estimate_tokens(compacted_titles),
+    )
+    logger.info(
+        "Compacted %d titles into %d (saved about %d tokens)",
+        len(lines),
+        len(compacted),
+        result.saved_tokens,
+    )
+    return result
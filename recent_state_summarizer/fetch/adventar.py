@@ -1,9 +1,9 @@
 from collections.abc import Generator
 from urllib.parse import urlparse
 
-import httpx
 from bs4 import BeautifulSoup
 
+from recent_state_summarizer.fetch import client
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
@@ -16,7 +16,7 @@ def _match_adventar(url: str) -> bool:
 
 
 def _fetch(url: str) -> str:
-    response = httpx.get(url)
+    response = client.get(url)
     response.raise_for_status()
     return response.text
 
@@ -25,11 +25,17 @@ def _fetch(url: str) -> str:
     name="Adventar",
     matcher=_match_adventar,
 )
-def fetch_adventar_calendar(url: str) -> Generator[TitleTag, None, None]:
+def fetch_adventar_calendar(
+    url: str, *, days: int | None = None
+) -> Generator[TitleTag, None, None]:
     """Fetch article titles and URLs from Adventar calendar.
 
+    The calendar shows the days of the entries without the year, so
+    `days` is accepted like the other fetchers but not applied.
+
     Args:
         url: Adventar calendar URL (e.g., https://adventar.org/calendars/11474)
+        days: Ignored
 
     Yields:
         TitleTag dictionaries containing title and url
@@ -38,6 +44,11 @@ def fetch_adventar_calendar(url: str) -> Generator[TitleTag, None, None]:
     yield from _parse_titles(raw_html)
 
 
+def _parse_page(raw_html: str) -> tuple[list[TitleTag], None]:
+    """Return the titles of the calendar (which has no next page)."""
+    return list(_parse_titles(raw_html)), None
+
+
 def _parse_titles(raw_html: str) -> Generator[TitleTag, None, None]:
     """Parse titles from Adventar calendar HTML."""
     soup = BeautifulSoup(raw_html, "html.parser")
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import itertools
 import json
 import logging
 import sys
 import textwrap
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
 
+from recent_state_summarizer import profiling, telemetry
 from recent_state_summarizer.fetch.github_changelog import (
     FEED_URL as GITHUB_BLOG_FEED_URL,
 )
@@ -31,32 +34,58 @@ def _main(
     *,
     save_as_title_list: bool,
     days: int | None = None,
+    limit: int | None = None,
 ) -> None:
-    fetcher = get_fetcher(url)
+    with profiling.span("dispatch", url=url):
+        fetcher = get_fetcher(url)
     fetcher_kwargs = {} if days is None else {"days": days}
-    title_tags = fetcher(url, **fetcher_kwargs)
-    if save_as_title_list:
-        contents = _as_bullet_list(
-            title_tag["title"] for title_tag in title_tags
+    # Fetching and parsing happen lazily while the titles are serialized.
+    # Closing the fetcher after `limit` titles skips the rest of its page
+    # and the requests of the next pages.
+    with contextlib.closing(fetcher(url, **fetcher_kwargs)) as all_title_tags:
+        title_tags = profiling.iterate(
+            itertools.islice(all_title_tags, limit), "parse"
         )
+        with profiling.span("write", path=str(save_path)):
+            save_title_tags(
+                save_path, title_tags, save_as_title_list=save_as_title_list
+            )
+
+
+def save_title_tags(
+    path: str | Path,
+    title_tags: Iterable[TitleTag],
+    *,
+    save_as_title_list: bool,
+) -> None:
+    """Save as JSON Lines or, with `save_as_title_list`, a bullet list."""
+    if save_as_title_list:
+        lines = _as_bullet_list(title_tag["title"] for title_tag in title_tags)
     else:
-        contents = _as_json(title_tags)
-    _save(save_path, contents)
+        lines = _as_json(title_tags)
+    _save(path, lines)
 
 
-def _as_bullet_list(titles: Iterable[str]) -> str:
-    return "\n".join(f"- {title}" for title in titles)
+def _as_bullet_list(titles: Iterable[str]) -> Iterator[str]:
+    return (f"- {title}" for title in titles)
 
 
-def _as_json(title_tags: Iterable[TitleTag]) -> str:
-    return "\n".join(
+def _as_json(title_tags: Iterable[TitleTag]) -> Iterator[str]:
+    return (
         json.dumps(title_tag, ensure_ascii=False) for title_tag in title_tags
     )
 
 
-def _save(path: str | Path, contents: str) -> None:
+def _save(path: str | Path, lines: Iterable[str]) -> None:
+    """Write the lines as they come, separated by (not ending with) newline.
+
+    Titles are not buffered, so memory does not grow with the archive.
+    """
     with open(path, "w", encoding="utf8", newline="") as f:
-        f.write(contents)
+        for index, line in enumerate(lines):
+            if index:
+                f.write("\n")
+            f.write(line)
 
 
 def _build_support_list() -> str:
@@ -92,7 +121,10 @@ def build_parser(add_help: bool = True) -> argparse.ArgumentParser:
         default=False,
         help="Save as title-only bullet list instead of JSON Lines",
     )
-    parser.set_defaults(days=None)
+    add_days_argument(parser)
+    add_limit_argument(parser)
+    add_profile_arguments(parser)
+    add_metrics_arguments(parser)
     return parser
 
 
@@ -132,10 +164,76 @@ def build_github_blog_parser(
         help="Number of recent days to fetch entries from "
         f"(default: {RECENT_DAYS})",
     )
+    add_limit_argument(parser)
+    add_profile_arguments(parser)
+    add_metrics_arguments(parser)
     parser.set_defaults(url=GITHUB_BLOG_FEED_URL)
     return parser
 
 
+def add_days_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--days",
+        type=int,
+        help="Fetch only the entries of the recent days, without requesting "
+        "older pages (default: all, or 30 days for the GitHub Changelog)",
+    )
+
+
+def parse_positive_int(value: str) -> int:
+    """Parse a positive integer (e.g. `--limit`) for argparse."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Must be a positive integer: {value!r}"
+        ) from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f"Must be a positive integer: {value!r}"
+        )
+    return number
+
+
+def add_limit_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--limit",
+        type=parse_positive_int,
+        help="Fetch only the newest N titles, without requesting "
+        "the pages after them",
+    )
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        help="Time each stage, print a summary to stderr "
+        "and save a Chrome trace",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=profiling.DEFAULT_PROFILE_PATH,
+        help="Path of the Chrome trace (JSON) with --profile "
+        f"(default: {profiling.DEFAULT_PROFILE_PATH})",
+    )
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--metrics-textfile",
+        help="Save Prometheus metrics of the run to this file "
+        "(e.g. for the textfile collector of node_exporter)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics "
+        "during the run",
+    )
+
+
 ParserBuilder = Callable[..., argparse.ArgumentParser]
 
 
@@ -156,9 +254,25 @@ def cli():
     parser = select_parser_builder(argv)()
     args = parser.parse_args(argv)
 
-    _main(
-        args.url,
-        args.save_path,
-        save_as_title_list=args.as_title_list,
-        days=args.days,
-    )
+    with maybe_profiling(args), maybe_collecting_metrics(args):
+        _main(
+            args.url,
+            args.save_path,
+            save_as_title_list=args.as_title_list,
+            days=args.days,
+            limit=args.limit,
+        )
+
+
+def maybe_profiling(args: argparse.Namespace):
+    if args.profile:
+        return profiling.profiling(args.profile_output)
+    return contextlib.nullcontext()
+
+
+def maybe_collecting_metrics(args: argparse.Namespace):
+    if args.metrics_textfile or args.metrics_port is not None:
+        return telemetry.collecting(
+            args.metrics_textfile, port=args.metrics_port
+        )
+    return contextlib.nullcontext()
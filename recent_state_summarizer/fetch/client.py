@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+from urllib.parse import urlparse
+
+import httpx
+
+from recent_state_summarizer import profiling, telemetry
+from recent_state_summarizer.fetch import politeness
+from recent_state_summarizer.retry import (
+    DEFAULT_RETRY_POLICY,
+    RETRY_STATUSES,
+    UNPROCESSED_STATUSES,
+    RetryPolicy,
+    TransientError,
+    call_with_retry,
+    parse_retry_after,
+)
+
+TIMEOUT = 5.0
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# The request never reached the server with these errors
+_UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Steps of httpcore traced as phases of a request. DNS lookup is not
+# traced separately and is included in "connect".
+PHASES = {
+    "connection.connect_tcp": "connect",
+    "connection.connect_unix_socket": "connect",
+    "connection.start_tls": "tls",
+    "http11.send_request_headers": "send",
+    "http11.send_request_body": "send",
+    "http2.send_request_headers": "send",
+    "http2.send_request_body": "send",
+    "http11.receive_response_headers": "wait",
+    "http2.receive_response_headers": "wait",
+    "http11.receive_response_body": "receive",
+    "http2.receive_response_body": "receive",
+}
+
+# Not valid for the body decoded by httpx
+_ENCODING_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+T = TypeVar("T")
+
+_client: httpx.Client | None = None
+
+
+@dataclass
+class _Fetch:
+    fetcher: str
+    limits: politeness.HostLimits = politeness.DEFAULT_LIMITS
+    pages: int = 0
+
+
+_current_fetch: ContextVar[_Fetch | None] = ContextVar(
+    "current_fetch", default=None
+)
+
+
+class _PhaseTracer:
+    """Record the phases of a request as profiling spans.
+
+    httpcore calls this with "<step>.started" and "<step>.complete" (or
+    ".failed") events.
+    """
+
+    def __init__(self) -> None:
+        self.connected = False
+        self._started: dict[str, float] = {}
+
+    def __call__(self, event_name: str, info: dict[str, Any]) -> None:
+        step, _, status = event_name.rpartition(".")
+        phase = PHASES.get(step)
+        if phase is None:
+            return
+        if status == "started":
+            self._started[step] = profiling.now()
+            return
+        if step not in self._started:
+            return
+        args = {"failed": True} if status == "failed" else {}
+        profiling.record(
+            phase,
+            "http.phase",
+            self._started.pop(step),
+            profiling.now(),
+            **args,
+        )
+        if phase == "connect":
+            self.connected = True
+
+
+def _trace_phases(request: httpx.Request) -> None:
+    if profiling.enabled():
+        request.extensions["trace"] = _PhaseTracer()
+
+
+def _shared_client() -> httpx.Client:
+    """Return the client shared by the fetchers.
+
+    Unlike `httpx.get()`, which builds (and leaves to the GC) a client per
+    request, pages of a site are fetched over pooled connections.
+    While profiling, the phases of each request are traced.
+    """
+    global _client
+
+    if _client is None:
+        _client = httpx.Client(event_hooks={"request": [_trace_phases]})
+    return _client
+
+
+class ResponseCache:
+    """Responses with a validator (ETag or Last-Modified), to revalidate
+    them with conditional GETs.
+
+    A 304 Not Modified is replaced with the cached response, so fetchers
+    parse it as usual. When the bodies exceed `max_bytes`, the least
+    recently used responses are dropped (and fetched in full next time).
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._responses: OrderedDict[
+            str, tuple[list[tuple[str, str]], bytes]
+        ] = OrderedDict()
+        self._size = 0
+
+    def conditional_headers(self, key: str) -> dict[str, str]:
+        if key not in self._responses:
+            return {}
+        self._responses.move_to_end(key)
+        headers = httpx.Headers(self._responses[key][0])
+        conditions = {}
+        if etag := headers.get("etag"):
+            conditions["If-None-Match"] = etag
+        if last_modified := headers.get("last-modified"):
+            conditions["If-Modified-Since"] = last_modified
+        return conditions
+
+    def update(self, key: str, response: httpx.Response) -> httpx.Response:
+        if response.status_code == 304 and key in self._responses:
+            headers, content = self._responses[key]
+            return httpx.Response(
+                200, headers=headers, content=content, request=response.request
+            )
+        if response.status_code == 200 and (
+            "etag" in response.headers or "last-modified" in response.headers
+        ):
+            headers = [
+                (name, value)
+                for name, value in response.headers.items()
+                if name not in _ENCODING_HEADERS
+            ]
+            self._store(key, headers, response.content)
+        return response
+
+    def _store(
+        self, key: str, headers: list[tuple[str, str]], content: bytes
+    ) -> None:
+        if key in self._responses:
+            self._size -= len(self._responses.pop(key)[1])
+        if len(content) > self.max_bytes:
+            return
+        self._responses[key] = (headers, content)
+        self._size += len(content)
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._responses.popitem(last=False)
+            self._size -= len(evicted)
+
+
+_response_cache: ContextVar[ResponseCache | None] = ContextVar(
+    "response_cache", default=None
+)
+
+
+@contextmanager
+def conditional_requests(cache: ResponseCache | None = None):
+    """Revalidate the responses fetched before with conditional GETs in
+    the block (e.g. while polling the same feeds) of the current thread."""
+    cache = cache or ResponseCache()
+    token = _response_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _response_cache.reset(token)
+
+
+def tag_requests(
+    items: Iterator[T],
+    fetcher: str,
+    limits: politeness.HostLimits = politeness.DEFAULT_LIMITS,
+) -> Iterator[T]:
+    """Tag the requests sent while iterating `items` with the fetcher name
+    and the page number (the count of its requests) in the profile, and
+    send them within the `limits` of the fetcher."""
+    fetch = _Fetch(fetcher, limits)
+    while True:
+        with tagged(fetch):
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+        yield item
+
+
+@contextmanager
+def tagged(fetch: _Fetch) -> Iterator[None]:
+    """Tag the requests sent in the block like `tag_requests()`.
+
+    For callers which send the requests of a fetcher themselves (e.g. the
+    batch fetch), keeping one `_Fetch` per source across its pages.
+    """
+    token = _current_fetch.set(fetch)
+    try:
+        yield
+    finally:
+        _current_fetch.reset(token)
+
+
+def get(
+    url: str,
+    *,
+    params: dict[str, Any] | None = None,
+    follow_redirects: bool = False,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+) -> httpx.Response:
+    """Send GET request retrying timeouts, connection errors and 5xx/429.
+
+    The last response is returned when the retries are exhausted, so that
+    fetchers handle errors with `raise_for_status()` as usual.
+    Within `conditional_requests()`, unchanged responses are revalidated.
+    Each attempt waits for a slot within the limits of the host
+    (see `politeness`).
+    """
+
+    host = urlparse(url).netloc
+    cache = _response_cache.get()
+    key = str(httpx.URL(url, params=params))
+    headers = cache.conditional_headers(key) if cache is not None else None
+    tags = {}
+    limits = politeness.DEFAULT_LIMITS
+    if (fetch := _current_fetch.get()) is not None:
+        fetch.pages += 1
+        tags = {"fetcher": fetch.fetcher, "page": fetch.pages}
+        limits = fetch.limits
+
+    def send(remaining: float | None) -> httpx.Response:
+        timeout = TIMEOUT if remaining is None else min(TIMEOUT, remaining)
+        with (
+            politeness.scheduler.slot(url, limits),
+            profiling.span(
+                "http", "http", method="GET", url=url, **tags
+            ) as span,
+        ):
+            started_at = time.perf_counter()
+            try:
+                response = _shared_client().get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    follow_redirects=follow_redirects,
+                    timeout=max(timeout, 0.001),
+                )
+            except httpx.TransportError as error:
+                telemetry.inc("http_requests_total", host=host, status="error")
+                raise TransientError(
+                    repr(error), sent=not isinstance(error, _UNSENT_ERRORS)
+                ) from error
+            span.set(
+                url=str(response.url),
+                status=response.status_code,
+                bytes=len(response.content),
+            )
+            tracer = response.request.extensions.get("trace")
+            if isinstance(tracer, _PhaseTracer):
+                span.set(new_connection=tracer.connected)
+        _record(host, response, time.perf_counter() - started_at)
+        if response.status_code in RETRY_STATUSES:
+            raise TransientError(
+                f"{response.status_code} from {url}",
+                retry_after=parse_retry_after(
+                    response.headers.get("retry-after")
+                ),
+                sent=response.status_code not in UNPROCESSED_STATUSES,
+                result=response,
+            )
+        return response
+
+    response = call_with_retry(send, host=host, policy=policy)
+    if cache is not None:
+        response = cache.update(key, response)
+    return response
+
+
+def _record(host: str, response: httpx.Response, seconds: float) -> None:
+    telemetry.inc(
+        "http_requests_total", host=host, status=str(response.status_code)
+    )
+    telemetry.inc(
+        "http_response_bytes_total", len(response.content), host=host
+    )
+    telemetry.observe("http_request_duration_seconds", seconds, host=host)
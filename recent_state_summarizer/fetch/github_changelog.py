@@ -1,11 +1,12 @@
 import logging
 from collections.abc import Generator
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from urllib.parse import urlparse
 
 import feedparser
 import httpx
 
+from recent_state_summarizer.fetch import client, recency
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
@@ -24,7 +25,7 @@ def _match_github_changelog(url: str) -> bool:
 
 
 def _recent_cutoff(days: int = RECENT_DAYS) -> datetime:
-    return datetime.now(timezone.utc) - timedelta(days=days)
+    return recency.cutoff(days)
 
 
 def _published_at(entry) -> datetime:
@@ -33,7 +34,7 @@ def _published_at(entry) -> datetime:
 
 @register_fetcher(name="GitHub Changelog", matcher=_match_github_changelog)
 def fetch_github_changelog(
-    url: str, *, days: int = RECENT_DAYS
+    url: str, *, days: int | None = RECENT_DAYS
 ) -> Generator[TitleTag, None, None]:
     """Fetch changelog entries published within the recent days.
 
@@ -47,16 +48,17 @@ def fetch_github_changelog(
     Args:
         url: GitHub Changelog feed URL (https://github.blog/changelog/feed/)
         days: Number of recent days to fetch entries from
+            (None: the default of 30 days, as the feed goes back years)
 
     Yields:
         TitleTag dictionaries containing title and url
     """
-    cutoff = _recent_cutoff(days)
+    cutoff = _recent_cutoff(RECENT_DAYS if days is None else days)
 
     page = 1
     while True:
         logger.info("Fetching page %s of %s", page, url)
-        response = httpx.get(
+        response = client.get(
             url, params={"paged": page}, follow_redirects=True
         )
         if response.status_code == httpx.codes.NOT_FOUND:
@@ -1,13 +1,19 @@
+from __future__ import annotations
+
 from collections.abc import Generator
+from datetime import datetime
 from urllib.parse import urlparse
 
-import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 
+from recent_state_summarizer.fetch import client, recency
+from recent_state_summarizer.fetch.politeness import HostLimits
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
 PARSE_HATENABLOG_KWARGS = {"name": "a", "attrs": {"class": "entry-title-link"}}
+# Both the titles and the link to the next page are <a> tags
+ONLY_LINKS = SoupStrainer("a")
 
 
 def _match_hatena_blog(url: str) -> bool:
@@ -17,31 +23,125 @@ def _match_hatena_blog(url: str) -> bool:
 
 
 def _fetch(url: str) -> str:
-    with httpx.Client() as client:
-        response = client.get(url)
-        response.raise_for_status()
-        return response.text
+    response = client.get(url)
+    response.raise_for_status()
+    return response.text
 
 
 @register_fetcher(
     name="はてなブログ（Hatena blog）",
     matcher=_match_hatena_blog,
+    # The blogs are served by the same infrastructure
+    limits=HostLimits(max_in_flight=2, group="hatenablog"),
 )
-def _fetch_titles(url: str) -> Generator[TitleTag, None, None]:
-    raw_html = _fetch(url)
-    yield from _parse_titles(raw_html)
-
-    soup = BeautifulSoup(raw_html, "html.parser")
-    next_link = soup.find("a", class_="test-pager-next")
-    if next_link and "href" in next_link.attrs:
-        next_url = next_link["href"]
-        print(f"Next page found, fetching... {next_url}")
-        yield from _fetch_titles(next_url)
+def _fetch_titles(
+    url: str, *, days: int | None = None
+) -> Generator[TitleTag, None, None]:
+    cutoff = recency.cutoff(days)
+    # Walk the pages in a loop so that only the current page is kept
+    next_url = url
+    while next_url:
+        soup = _parse_links(_fetch(next_url))
+        try:
+            # Titles are taken one by one, so that the rest of the page is
+            # skipped when the caller stops (e.g. `--limit`)
+            past_cutoff = yield from _recent_titles_in(soup, cutoff)
+            next_url = None if past_cutoff else _next_page_url(soup)
+        finally:
+            _free(soup)
+        if next_url:
+            print(f"Next page found, fetching... {next_url}")
 
 
 def _parse_titles(raw_html: str) -> Generator[TitleTag, None, None]:
-    soup = BeautifulSoup(raw_html, "html.parser")
-    body = soup.body
-    title_tags = body.find_all(**PARSE_HATENABLOG_KWARGS)
+    yield from _titles_in(_parse_links(raw_html))
+
+
+def _parse_page(
+    raw_html: str, cutoff: datetime | None = None
+) -> tuple[list[TitleTag], str | None]:
+    """Return the titles of an archive page and the URL of the next page.
+
+    Entries are listed newest first, so the next page is not returned
+    once an entry is older than `cutoff`.
+    Plain values are returned, so that pages can be parsed in other
+    processes (see `fetch.parallel`).
+    """
+    soup = _parse_links(raw_html)
+    try:
+        title_tags = []
+        recent_titles = _recent_titles_in(soup, cutoff)
+        while True:
+            try:
+                title_tags.append(next(recent_titles))
+            except StopIteration as stop:
+                past_cutoff = stop.value
+                break
+        return title_tags, None if past_cutoff else _next_page_url(soup)
+    finally:
+        _free(soup)
+
+
+def _parse_links(raw_html: str) -> BeautifulSoup:
+    return BeautifulSoup(raw_html, "html.parser", parse_only=ONLY_LINKS)
+
+
+def _free(soup: BeautifulSoup) -> None:
+    """Break the reference cycles of the tree so that it is freed at once.
+
+    Otherwise the trees are freed only by the (rarely run) full GC and
+    pile up while walking the archive.
+    `BeautifulSoup.decompose()` alone does not free the children.
+    """
+    for element in list(soup.contents):
+        if isinstance(element, Tag):
+            element.decompose()
+        else:
+            element.extract()
+    soup.decompose()
+
+
+def _titles_in(soup: BeautifulSoup) -> Generator[TitleTag, None, None]:
+    title_tags = soup.find_all(**PARSE_HATENABLOG_KWARGS)
     for title_tag in title_tags:
         yield {"title": title_tag.text, "url": title_tag["href"]}
+
+
+def _recent_titles_in(
+    soup: BeautifulSoup, cutoff: datetime | None
+) -> Generator[TitleTag, None, bool]:
+    """Yield the titles until an entry older than `cutoff`.
+
+    Returns:
+        Whether an older entry was found
+    """
+    for title_tag, published_at in _dated_titles_in(soup):
+        if recency.is_before(published_at, cutoff):
+            return True
+        yield title_tag
+    return False
+
+
+def _dated_titles_in(
+    soup: BeautifulSoup,
+) -> Generator[tuple[TitleTag, datetime | None], None, None]:
+    """Yield the titles with their dates.
+
+    The date of an entry is the <time> in the link to the archive of its
+    day, which precedes the title link.
+    """
+    published_at = None
+    for link in soup.find_all("a"):
+        time_tag = link.find("time", attrs={"datetime": True})
+        if time_tag is not None:
+            published_at = recency.parse_datetime(time_tag["datetime"])
+        if "entry-title-link" in link.get("class", []):
+            yield {"title": link.text, "url": link["href"]}, published_at
+            published_at = None
+
+
+def _next_page_url(soup: BeautifulSoup) -> str | None:
+    next_link = soup.find("a", class_="test-pager-next")
+    if next_link and "href" in next_link.attrs:
+        return next_link["href"]
+    return None
@@ -2,8 +2,8 @@ from typing import Generator, TypedDict
 from urllib.parse import urlparse
 
 import feedparser
-import httpx
 
+from recent_state_summarizer.fetch import client, recency
 from recent_state_summarizer.fetch.registry import register_fetcher
 
 
@@ -27,22 +27,26 @@ class BookmarkEntry(TypedDict):
     matcher=_match_hatena_bookmark_rss,
 )
 def fetch_hatena_bookmark_rss(
-    url: str,
+    url: str, *, days: int | None = None
 ) -> Generator[BookmarkEntry, None, None]:
     """Fetch entries from Hatena Bookmark RSS feed.
 
     Args:
         url: URL of the Hatena Bookmark RSS feed
+        days: Keep only the entries of the recent days
 
     Yields:
         Bookmark entries with title, url, and description
     """
-    response = httpx.get(url)
+    cutoff = recency.cutoff(days)
+    response = client.get(url)
     response.raise_for_status()
 
     feed = feedparser.parse(response.content)
 
     for entry in feed.entries:
+        if recency.is_before(recency.feed_entry_published_at(entry), cutoff):
+            continue
         yield {
             "title": entry.title,
             "url": entry.link,
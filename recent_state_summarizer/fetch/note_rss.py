@@ -2,8 +2,8 @@ from collections.abc import Generator
 from urllib.parse import urlparse
 
 import feedparser
-import httpx
 
+from recent_state_summarizer.fetch import client, recency
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
@@ -14,11 +14,16 @@ def _match_note_rss(url: str) -> bool:
 
 
 @register_fetcher(name="note RSS", matcher=_match_note_rss)
-def fetch_note_rss(url: str) -> Generator[TitleTag, None, None]:
-    response = httpx.get(url)
+def fetch_note_rss(
+    url: str, *, days: int | None = None
+) -> Generator[TitleTag, None, None]:
+    cutoff = recency.cutoff(days)
+    response = client.get(url)
     response.raise_for_status()
 
     feed = feedparser.parse(response.content)
 
     for entry in feed.entries:
+        if recency.is_before(recency.feed_entry_published_at(entry), cutoff):
+            continue
         yield {"title": entry.title, "url": entry.link}
@@ -0,0 +1,155 @@
+"""Fetch many sources, parsing the HTML pages in a process pool.
+
+Parsing with BeautifulSoup is CPU-bound and holds the GIL, so one process
+parses one page at a time however many pages are downloaded. Here the
+pages are downloaded by the calling thread (over the pooled connections)
+while worker processes parse them, so that a batch of archives uses all
+the cores. The downloads are sent within the `HostLimits` registered for
+their fetcher, like the requests of the fetcher itself.
+
+Only the sources with a page parser (Hatena blog and Adventar) are parsed
+in the pool. The others are fetched by their fetcher in the calling
+thread.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.fetch import adventar, client, hatena_blog
+from recent_state_summarizer.fetch.registry import (
+    get_fetcher,
+    get_fetcher_limits,
+)
+from recent_state_summarizer.fetch.types import TitleTag
+
+logger = logging.getLogger(__name__)
+
+# Return the titles of a page and the URL of the next page (if any)
+PageParser = Callable[[str], "tuple[list[TitleTag], str | None]"]
+
+PAGE_PARSERS: list[tuple[str, Callable[[str], bool], PageParser]] = [
+    ("hatena_blog", hatena_blog._match_hatena_blog, hatena_blog._parse_page),
+    ("adventar", adventar._match_adventar, adventar._parse_page),
+]
+
+
+def find_page_parser(url: str) -> tuple[str, PageParser] | None:
+    for label, matcher, parser in PAGE_PARSERS:
+        if matcher(url):
+            return label, parser
+    return None
+
+
+@dataclass
+class _Source:
+    url: str
+    label: str = ""
+    parser: PageParser | None = None
+    # Tags the downloads with the fetcher and sends them within its limits
+    fetch: client._Fetch | None = None
+    # Parses of the pages in page order
+    pages: list[Future] = field(default_factory=list)
+    done: bool = False
+
+
+def fetch_many(
+    urls: Iterable[str], *, executor: Executor | None = None
+) -> Iterator[tuple[str, list[TitleTag]]]:
+    """Yield the URL and the titles of each source in the order of `urls`.
+
+    Pages are parsed by `executor` (by default, a process pool with a
+    worker per core). The next page of an archive is requested once its
+    previous page is parsed, and meanwhile the pages of the other sources
+    are downloaded.
+
+    Raises:
+        ValueError: If no fetcher matches a URL
+        httpx.HTTPError: If a page cannot be fetched
+    """
+    sources = []
+    for url in urls:
+        # Fail before downloading anything
+        get_fetcher(url)
+        found = find_page_parser(url)
+        if found is None:
+            sources.append(_Source(url))
+        else:
+            label, parser = found
+            fetch = client._Fetch(label, get_fetcher_limits(url))
+            sources.append(_Source(url, label, parser, fetch))
+
+    if executor is None:
+        with ProcessPoolExecutor() as executor:
+            yield from _fetch_many(sources, executor)
+    else:
+        yield from _fetch_many(sources, executor)
+
+
+def _fetch_many(
+    sources: list[_Source], executor: Executor
+) -> Iterator[tuple[str, list[TitleTag]]]:
+    to_download = deque(
+        (source, source.url) for source in sources if source.parser
+    )
+    # Parses whose next page is not requested yet
+    parsing: dict[Future, _Source] = {}
+    emitted = 0
+    try:
+        while emitted < len(sources):
+            # Request the next pages as soon as they are known
+            for future in [future for future in parsing if future.done()]:
+                page_source = parsing.pop(future)
+                _, next_url = future.result()
+                if next_url:
+                    logger.debug("Next page found: %s", next_url)
+                    to_download.append((page_source, next_url))
+                else:
+                    page_source.done = True
+
+            source = sources[emitted]
+            if source.parser is None:
+                yield source.url, list(get_fetcher(source.url)(source.url))
+                emitted += 1
+            elif source.done:
+                yield source.url, _collect(source)
+                emitted += 1
+            elif to_download:
+                page_source, page_url = to_download.popleft()
+                with client.tagged(page_source.fetch):
+                    page = _download(page_url)
+                future = executor.submit(page_source.parser, page)
+                page_source.pages.append(future)
+                parsing[future] = page_source
+            else:
+                wait(parsing, return_when=FIRST_COMPLETED)
+    finally:
+        for future in parsing:
+            future.cancel()
+
+
+def _download(url: str) -> str:
+    response = client.get(url)
+    response.raise_for_status()
+    return response.text
+
+
+def _collect(source: _Source) -> list[TitleTag]:
+    title_tags = [
+        title_tag
+        for future in source.pages
+        for title_tag in future.result()[0]
+    ]
+    telemetry.inc("fetch_records_total", len(title_tags), fetcher=source.label)
+    return title_tags
@@ -0,0 +1,158 @@
+"""Limit the requests sent to each host.
+
+Every request of `client.get()` takes a slot of `scheduler` first, which
+waits while the host has `max_in_flight` requests in flight, until
+`min_delay` seconds passed since the last request to the host started
+(or the Crawl-delay of its robots.txt, if respected), and while the
+requests of all hosts reach `global_limit`. Requests to other hosts are
+not held up, so concurrent fetches of many sites keep their throughput.
+
+The limits are given per fetcher (see `register_fetcher()`).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from recent_state_summarizer import telemetry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GLOBAL_LIMIT = 16
+ROBOTS_TIMEOUT = 5.0
+
+
+@dataclass(frozen=True)
+class HostLimits:
+    """Limits of the requests to a host.
+
+    Args:
+        max_in_flight: Requests sent at the same time
+        min_delay: Seconds between the starts of the requests
+        respect_robots: Wait at least the Crawl-delay of robots.txt
+        group: Share the limits among all the hosts of the fetcher
+            (e.g. the subdomains of a blog service) under this name
+    """
+
+    max_in_flight: int = 2
+    min_delay: float = 0.0
+    respect_robots: bool = False
+    group: str | None = None
+
+
+DEFAULT_LIMITS = HostLimits()
+
+
+def _read_robots(url: str) -> str | None:
+    try:
+        response = httpx.get(url, timeout=ROBOTS_TIMEOUT)
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.text
+
+
+class RobotsCache:
+    """Crawl-delay of the robots.txt of each site, read once."""
+
+    def __init__(
+        self, read: Callable[[str], str | None] = _read_robots
+    ) -> None:
+        self._read = read
+        self._delays: dict[str, float | None] = {}
+        self._lock = threading.Lock()
+
+    def crawl_delay(self, url: str) -> float | None:
+        parsed = urlparse(url)
+        site = f"{parsed.scheme}://{parsed.netloc}"
+        with self._lock:
+            if site in self._delays:
+                return self._delays[site]
+        content = self._read(f"{site}/robots.txt")
+        delay = None
+        if content is not None:
+            parser = RobotFileParser()
+            parser.parse(content.splitlines())
+            delay = parser.crawl_delay("*")
+        with self._lock:
+            self._delays[site] = None if delay is None else float(delay)
+        return self._delays[site]
+
+
+@dataclass
+class _HostState:
+    in_flight: int = 0
+    next_start: float = float("-inf")
+
+
+class HostScheduler:
+    """Slots of requests within the `HostLimits` of each host."""
+
+    def __init__(
+        self,
+        global_limit: int = DEFAULT_GLOBAL_LIMIT,
+        *,
+        robots: RobotsCache | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.global_limit = global_limit
+        self.robots = robots or RobotsCache()
+        self._clock = clock
+        self._hosts: dict[str, _HostState] = {}
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(
+        self, url: str, limits: HostLimits = DEFAULT_LIMITS
+    ) -> Iterator[None]:
+        """Wait for a slot of the host of `url` and hold it in the block."""
+        key = limits.group or urlparse(url).netloc
+        delay = limits.min_delay
+        if limits.respect_robots:
+            delay = max(delay, self.robots.crawl_delay(url) or 0.0)
+
+        waited_from = self._clock()
+        with self._condition:
+            state = self._hosts.setdefault(key, _HostState())
+            while True:
+                now = self._clock()
+                if (
+                    state.in_flight >= limits.max_in_flight
+                    or self._in_flight >= self.global_limit
+                ):
+                    # Until a request ends
+                    self._condition.wait()
+                elif state.next_start > now:
+                    self._condition.wait(state.next_start - now)
+                else:
+                    break
+            state.in_flight += 1
+            state.next_start = now + delay
+            self._in_flight += 1
+        if (waited := now - waited_from) > 0:
+            telemetry.inc("http_throttled_seconds_total", waited, host=key)
+        try:
+            yield
+        finally:
+            with self._condition:
+                state.in_flight -= 1
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def reset(self) -> None:
+        with self._condition:
+            self._hosts.clear()
+
+
+scheduler = HostScheduler()
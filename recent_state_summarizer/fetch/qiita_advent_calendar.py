@@ -2,9 +2,10 @@ import json
 from collections.abc import Generator
 from urllib.parse import urlparse
 
-import httpx
 from bs4 import BeautifulSoup
 
+from recent_state_summarizer.fetch import client
+from recent_state_summarizer.fetch.politeness import HostLimits
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
@@ -15,7 +16,7 @@ def _match_qiita_advent_calendar(url: str) -> bool:
 
 
 def _fetch(url: str) -> str:
-    response = httpx.get(url)
+    response = client.get(url)
     response.raise_for_status()
     return response.text
 
@@ -23,12 +24,19 @@ def _fetch(url: str) -> str:
 @register_fetcher(
     name="Qiita Advent Calendar",
     matcher=_match_qiita_advent_calendar,
+    limits=HostLimits(max_in_flight=1, group="qiita.com"),
 )
-def fetch_qiita_advent_calendar(url: str) -> Generator[TitleTag, None, None]:
+def fetch_qiita_advent_calendar(
+    url: str, *, days: int | None = None
+) -> Generator[TitleTag, None, None]:
     """Fetch article titles and URLs from Qiita Advent Calendar.
 
+    The calendar data has no dates of the articles, so `days` is accepted
+    like the other fetchers but not applied.
+
     Args:
         url: Qiita Advent Calendar URL (e.g., https://qiita.com/advent-calendar/2025/python-type-hints)
+        days: Ignored
 
     Yields:
         TitleTag dictionaries containing title and url
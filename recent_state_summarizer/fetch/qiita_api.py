@@ -1,8 +1,8 @@
 from collections.abc import Generator
 from urllib.parse import urlparse
 
-import httpx
-
+from recent_state_summarizer.fetch import client, recency
+from recent_state_summarizer.fetch.politeness import HostLimits
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
@@ -12,12 +12,22 @@ def _match_qiita_api(url: str) -> bool:
     return parsed.netloc == "qiita.com" and "/api/v2/users/" in parsed.path
 
 
-@register_fetcher(name="Qiita API v2", matcher=_match_qiita_api)
-def fetch_qiita_api(url: str) -> Generator[TitleTag, None, None]:
-    response = httpx.get(url, params={"per_page": 20})
+@register_fetcher(
+    name="Qiita API v2",
+    matcher=_match_qiita_api,
+    limits=HostLimits(max_in_flight=1, group="qiita.com"),
+)
+def fetch_qiita_api(
+    url: str, *, days: int | None = None
+) -> Generator[TitleTag, None, None]:
+    cutoff = recency.cutoff(days)
+    response = client.get(url, params={"per_page": 20})
     response.raise_for_status()
 
     items = response.json()
 
     for item in items:
+        published_at = recency.parse_datetime(item.get("created_at"))
+        if recency.is_before(published_at, cutoff):
+            continue
         yield {"title": item["title"], "url": item["url"]}
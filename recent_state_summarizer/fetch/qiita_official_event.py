@@ -1,11 +1,13 @@
 import json
 from collections.abc import Generator
+from datetime import datetime
 from typing import Any
 from urllib.parse import urlparse
 
-import httpx
 from bs4 import BeautifulSoup
 
+from recent_state_summarizer.fetch import client, recency
+from recent_state_summarizer.fetch.politeness import HostLimits
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
@@ -20,31 +22,53 @@ def _match_qiita_official_event(url: str) -> bool:
 @register_fetcher(
     name="Qiita Official Event",
     matcher=_match_qiita_official_event,
+    limits=HostLimits(max_in_flight=1, group="qiita.com"),
 )
-def fetch_qiita_official_event(url: str) -> Generator[TitleTag, None, None]:
+def fetch_qiita_official_event(
+    url: str, *, days: int | None = None
+) -> Generator[TitleTag, None, None]:
     """Fetch article titles and URLs from Qiita official event.
 
+    With `days`, no more pages are requested after a page whose articles
+    are all older than the cutoff.
+
     Args:
         url: Qiita official event URL (e.g., https://qiita.com/official-events/bd14d28b53326d318fec)
+        days: Keep only the articles of the recent days
 
     Yields:
         TitleTag dictionaries containing title and url
     """
+    cutoff = recency.cutoff(days)
     page = 1
     while page:
-        response = httpx.get(url, params={"page": page})
+        response = client.get(url, params={"page": page})
         response.raise_for_status()
 
         paginated_articles = _parse_paginated_articles(response.text)
         if paginated_articles is None:
             return
 
-        for item in paginated_articles["items"]:
+        items = paginated_articles["items"]
+        recent_items = [
+            item
+            for item in items
+            if not recency.is_before(_published_at(item), cutoff)
+        ]
+        for item in recent_items:
             yield {"title": item["title"], "url": item["linkUrl"]}
+        if items and not recent_items:
+            return
 
         page = paginated_articles["pageData"]["nextPage"]
 
 
+def _published_at(item: dict[str, Any]) -> datetime | None:
+    return recency.parse_datetime(
+        item.get("publishedAt") or item.get("createdAt")
+    )
+
+
 def _parse_paginated_articles(raw_html: str) -> dict[str, Any] | None:
     soup = BeautifulSoup(raw_html, "html.parser")
     script_tag = soup.find(
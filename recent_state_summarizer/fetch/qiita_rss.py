@@ -2,8 +2,9 @@ from collections.abc import Generator
 from urllib.parse import urlparse
 
 import feedparser
-import httpx
 
+from recent_state_summarizer.fetch import client, recency
+from recent_state_summarizer.fetch.politeness import HostLimits
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
@@ -13,12 +14,21 @@ def _match_qiita_rss(url: str) -> bool:
     return parsed.netloc == "qiita.com" and parsed.path.endswith("/feed.atom")
 
 
-@register_fetcher(name="Qiita RSS", matcher=_match_qiita_rss)
-def fetch_qiita_rss(url: str) -> Generator[TitleTag, None, None]:
-    response = httpx.get(url)
+@register_fetcher(
+    name="Qiita RSS",
+    matcher=_match_qiita_rss,
+    limits=HostLimits(max_in_flight=1, group="qiita.com"),
+)
+def fetch_qiita_rss(
+    url: str, *, days: int | None = None
+) -> Generator[TitleTag, None, None]:
+    cutoff = recency.cutoff(days)
+    response = client.get(url)
     response.raise_for_status()
 
     feed = feedparser.parse(response.content)
 
     for entry in feed.entries:
+        if recency.is_before(recency.feed_entry_published_at(entry), cutoff):
+            continue
         yield {"title": entry.title, "url": entry.link}
@@ -0,0 +1,47 @@
+"""Recency window (`days`) of the fetchers.
+
+Every fetcher takes `days` (None: no window). Entries published before
+the cutoff are skipped, and paginating fetchers stop requesting pages
+once the entries (listed newest first) fall past the cutoff.
+Entries without a date are kept.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+
+def cutoff(days: int | None) -> datetime | None:
+    """Return the start of the window of the recent `days` (UTC)."""
+    if days is None:
+        return None
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def parse_datetime(value: str | None) -> datetime | None:
+    """Parse an ISO 8601 date or datetime (UTC if without offset)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def feed_entry_published_at(entry: Any) -> datetime | None:
+    """Return when a feedparser entry was published (or updated)."""
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if parsed is None:
+        return None
+    return datetime(*parsed[:6], tzinfo=timezone.utc)
+
+
+def is_before(published_at: datetime | None, cutoff: datetime | None) -> bool:
+    """Whether the entry is out of the window (False if either is None)."""
+    if published_at is None or cutoff is None:
+        return False
+    return published_at < cutoff
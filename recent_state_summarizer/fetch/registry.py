@@ -1,47 +1,85 @@
 from __future__ import annotations
 
+import functools
 from collections.abc import Callable, Generator
+from contextlib import closing
 from typing import TYPE_CHECKING
 
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.fetch import client
+from recent_state_summarizer.fetch.politeness import DEFAULT_LIMITS, HostLimits
+
 if TYPE_CHECKING:
     from recent_state_summarizer.fetch.types import TitleTag
 
 Fetcher = Callable[..., Generator["TitleTag", None, None]]
 URLMatcher = Callable[[str], bool]
 
-_registry: list[tuple[str, URLMatcher, Fetcher]] = []
+_registry: list[tuple[str, URLMatcher, Fetcher, HostLimits]] = []
 
 
 def register_fetcher(
     name: str,
     matcher: URLMatcher,
+    limits: HostLimits = DEFAULT_LIMITS,
 ) -> Callable[[Fetcher], Fetcher]:
     """Decorator to register a fetcher with a URL matcher.
 
     Args:
         name: Human-readable name for the fetcher (used in help messages)
         matcher: Function that takes a URL and returns True if this fetcher handles it
+        limits: Limits of the requests to each host of the fetcher
+
+    The registered fetcher counts the titles it yields in the metrics and
+    tags its requests in the profile with its module name
+    (e.g. `hatena_blog`).
     """
 
     def decorator(func: Fetcher) -> Fetcher:
-        _registry.append((name, matcher, func))
-        return func
+        instrumented = _instrument(func, limits)
+        _registry.append((name, matcher, instrumented, limits))
+        return instrumented
 
     return decorator
 
 
+def _instrument(func: Fetcher, limits: HostLimits) -> Fetcher:
+    label = func.__module__.rsplit(".", 1)[-1]
+
+    @functools.wraps(func)
+    def fetcher(*args, **kwargs):
+        with closing(func(*args, **kwargs)) as title_tags:
+            for title_tag in client.tag_requests(title_tags, label, limits):
+                telemetry.inc("fetch_records_total", fetcher=label)
+                yield title_tag
+
+    return fetcher
+
+
 def get_fetcher(url: str) -> Fetcher:
     """Get the appropriate fetcher for a URL.
 
     Raises:
         ValueError: If no fetcher matches the URL
     """
-    for name, matcher, fetcher in _registry:
+    for _, matcher, fetcher, _ in _registry:
         if matcher(url):
             return fetcher
     raise ValueError(f"Unsupported URL: {url}")
 
 
+def get_fetcher_limits(url: str) -> HostLimits:
+    """Get the limits of the requests of the fetcher for a URL.
+
+    Raises:
+        ValueError: If no fetcher matches the URL
+    """
+    for _, matcher, _, limits in _registry:
+        if matcher(url):
+            return limits
+    raise ValueError(f"Unsupported URL: {url}")
+
+
 def get_registered_names() -> list[str]:
     """Get list of registered fetcher names for help messages."""
-    return [name for name, _, _ in _registry]
+    return [name for name, _, _, _ in _registry]
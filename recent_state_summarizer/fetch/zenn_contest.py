@@ -1,8 +1,7 @@
 from collections.abc import Generator
 from urllib.parse import urljoin, urlparse
 
-import httpx
-
+from recent_state_summarizer.fetch import client, recency
 from recent_state_summarizer.fetch.registry import register_fetcher
 from recent_state_summarizer.fetch.types import TitleTag
 
@@ -23,23 +22,30 @@ def _match_zenn_contest(url: str) -> bool:
     name="Zenn Contest (experimental)",
     matcher=_match_zenn_contest,
 )
-def fetch_zenn_contest(url: str) -> Generator[TitleTag, None, None]:
+def fetch_zenn_contest(
+    url: str, *, days: int | None = None
+) -> Generator[TitleTag, None, None]:
     """Fetch article titles and URLs submitted to a Zenn contest.
 
     Zenn provides no RSS feed for contests, so this fetcher depends on the
     undocumented JSON API which Zenn may change without notice.
 
+    Articles are requested newest first, so no more pages are requested
+    once an article is older than the cutoff of `days`.
+
     Args:
         url: Zenn contest URL (e.g., https://zenn.dev/contests/example-2026)
+        days: Keep only the articles of the recent days
 
     Yields:
         TitleTag dictionaries containing title and url
     """
     contest_slug = _extract_contest_slug(url)
+    cutoff = recency.cutoff(days)
 
     page = 1
     while page:
-        response = httpx.get(
+        response = client.get(
             ZENN_ARTICLES_API_URL,
             params={
                 "contest_slug": contest_slug,
@@ -52,6 +58,9 @@ def fetch_zenn_contest(url: str) -> Generator[TitleTag, None, None]:
         paginated_articles = response.json()
 
         for article in paginated_articles["articles"]:
+            published_at = recency.parse_datetime(article.get("published_at"))
+            if recency.is_before(published_at, cutoff):
+                return
             yield {
                 "title": article["title"],
                 "url": urljoin(ZENN_ORIGIN, article["path"]),
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TypedDict
+
+from recent_state_summarizer.backends import ChatBackend
+from recent_state_summarizer.compaction import compact_titles, fit_to_budget
+from recent_state_summarizer.instrumentation import MetricsCallback
+from recent_state_summarizer.summarize import (
+    DeltaCallback,
+    summarize_titles,
+    update_summary,
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR_ENV = "RECENT_STATE_SUMMARIZER_STATE_DIR"
+DEFAULT_DRIFT_THRESHOLD = 0.5
+
+
+class SummaryState(TypedDict):
+    summary: str
+    titles: list[str]
+
+
+def default_state_dir() -> Path:
+    if directory := os.environ.get(STATE_DIR_ENV):
+        return Path(directory)
+    state_home = (
+        os.environ.get("XDG_STATE_HOME") or Path.home() / ".local" / "state"
+    )
+    return Path(state_home) / "recent-state-summarizer" / "summaries"
+
+
+def _state_path(source: str, state_dir: Path) -> Path:
+    digest = hashlib.sha256(source.encode("utf8")).hexdigest()
+    return state_dir / f"{digest}.json"
+
+
+def load_state(
+    source: str, state_dir: str | Path | None = None
+) -> SummaryState | None:
+    state_dir = Path(state_dir) if state_dir else default_state_dir()
+    try:
+        with open(_state_path(source, state_dir), encoding="utf8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(
+    source: str, state: SummaryState, state_dir: str | Path | None = None
+) -> None:
+    state_dir = Path(state_dir) if state_dir else default_state_dir()
+    state_dir.mkdir(parents=True, exist_ok=True)
+    path = _state_path(source, state_dir)
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def title_drift(previous_titles: list[str], titles: list[str]) -> float:
+    """Ratio of added and removed titles to all titles seen in either list."""
+    previous, current = set(previous_titles), set(titles)
+    union = previous | current
+    if not union:
+        return 0.0
+    return len(previous ^ current) / len(union)
+
+
+def summarize_incrementally(
+    source: str,
+    titles: str,
+    *,
+    drift_threshold: float = DEFAULT_DRIFT_THRESHOLD,
+    state_dir: str | Path | None = None,
+    use_cache: bool = True,
+    on_delta: DeltaCallback | None = None,
+    compact: bool = False,
+    token_budget: int | None = None,
+    on_metrics: MetricsCallback | None = None,
+    model: str | None = None,
+    latency_target: float | None = None,
+    timeout: float | None = None,
+    backend: ChatBackend | None = None,
+) -> str:
+    """Summarize titles by updating the previous summary of the source.
+
+    Only the previous summary and the titles added since then are sent.
+    The whole title list is summarized again when there is no previous
+    summary or when the titles drifted more than `drift_threshold`.
+
+    Args:
+        source: Key of the stored summary (e.g. the URL of the archive page)
+        titles: Titles as bullet list, one title per line
+        drift_threshold: Ratio of changed titles to fall back to full summary
+        state_dir: Directory to store the previous summaries
+        use_cache: Whether to reuse cached summaries
+        on_delta: Called with each piece of the summary (streaming)
+        compact: Whether to compact the titles (lossy) before comparing them
+        token_budget: Number of tokens to keep the newest titles within
+        on_metrics: Called with the latency, tokens and cost of the call
+        model: Chat model (default: chosen by the size of the prompt)
+        latency_target: Seconds the chosen model is expected to answer in
+        timeout: Timeout of an API call in seconds
+        backend: Backend to send the request (default: `openai` module)
+    """
+    call_options = {
+        "use_cache": use_cache,
+        "on_delta": on_delta,
+        "on_metrics": on_metrics,
+        "model": model,
+        "latency_target": latency_target,
+        "timeout": timeout,
+        "backend": backend,
+    }
+    if compact:
+        titles = compact_titles(titles, token_budget=token_budget).titles
+    elif token_budget is not None:
+        titles = fit_to_budget(titles, token_budget)
+    title_lines = [line for line in titles.splitlines() if line.strip()]
+    state = load_state(source, state_dir)
+
+    if state is None:
+        logger.info("No previous summary of %s, summarizing all", source)
+        summary = summarize_titles(titles, compact=False, **call_options)
+    else:
+        previous_lines = set(state["titles"])
+        new_lines = [
+            line for line in title_lines if line not in previous_lines
+        ]
+        drift = title_drift(state["titles"], title_lines)
+        if drift > drift_threshold:
+            logger.info(
+                "Titles drifted %.0f%% (> %.0f%%), summarizing all",
+                drift * 100,
+                drift_threshold * 100,
+            )
+            summary = summarize_titles(titles, compact=False, **call_options)
+        elif not new_lines:
+            logger.info("No new titles in %s", source)
+            summary = state["summary"]
+            if on_delta is not None:
+                on_delta(summary)
+        else:
+            logger.info("Updating summary with %d new titles", len(new_lines))
+            summary = update_summary(
+                state["summary"],
+                "\n".join(new_lines),
+                **call_options,
+            )
+
+    save_state(source, {"summary": summary, "titles": title_lines}, state_dir)
+    return summary
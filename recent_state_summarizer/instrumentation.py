@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (prompt, completion)
+PRICES_PER_MILLION_TOKENS = {
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1": (2.0, 8.0),
+}
+
+
+@dataclass(frozen=True)
+class CallMetrics:
+    """Measurements of one chat completion call.
+
+    Times are in seconds. `usage_estimated` is True when the API returned
+    no usage and the tokens were estimated from the texts.
+    """
+
+    model: str
+    latency: float
+    time_to_first_token: float | None
+    prompt_tokens: int
+    completion_tokens: int
+    cost: float | None
+    cached: bool = False
+    usage_estimated: bool = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+MetricsCallback = Callable[[CallMetrics], None]
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, completion_tokens: int
+) -> float | None:
+    """Estimate the cost in USD, or None for a model with unknown price."""
+    prices = PRICES_PER_MILLION_TOKENS.get(model)
+    if prices is None:
+        return None
+    prompt_price, completion_price = prices
+    return (
+        prompt_tokens * prompt_price + completion_tokens * completion_price
+    ) / 1_000_000
+
+
+class CallRecorder:
+    """Time a chat completion and collect its usage.
+
+    Pass the response through `observe()` before parsing it, so that the
+    first streamed content and the usage in the last chunk are noticed.
+    """
+
+    def __init__(
+        self, model: str, prompt_text: str, *, clock=time.perf_counter
+    ) -> None:
+        self.model = model
+        self.prompt_text = prompt_text
+        self._clock = clock
+        self.started_at = clock()
+        self.first_token_at: float | None = None
+        self.usage: dict[str, int] | None = None
+
+    def observe(self, response):
+        if isinstance(response, dict):
+            self.usage = response.get("usage")
+            return response
+        return self._observe_chunks(response)
+
+    def _observe_chunks(self, chunks: Iterable[dict]) -> Iterator[dict]:
+        for chunk in chunks:
+            if chunk.get("usage"):
+                self.usage = chunk["usage"]
+            if (
+                self.first_token_at is None
+                and chunk["choices"]
+                and chunk["choices"][0]["delta"].get("content")
+            ):
+                self.first_token_at = self._clock()
+            yield chunk
+
+    def finish(self, content: str, *, cached: bool = False) -> CallMetrics:
+        latency = self._clock() - self.started_at
+        if cached:
+            prompt_tokens = completion_tokens = 0
+        elif self.usage:
+            prompt_tokens = self.usage["prompt_tokens"]
+            completion_tokens = self.usage["completion_tokens"]
+        else:
+            prompt_tokens = estimate_tokens(self.prompt_text)
+            completion_tokens = estimate_tokens(content)
+        return CallMetrics(
+            model=self.model,
+            latency=latency,
+            time_to_first_token=(
+                None
+                if self.first_token_at is None
+                else self.first_token_at - self.started_at
+            ),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost=estimate_cost(self.model, prompt_tokens, completion_tokens),
+            cached=cached,
+            usage_estimated=not cached and not self.usage,
+        )
+
+
+def log_metrics(metrics: CallMetrics) -> None:
+    """Emit the metrics as one JSON log line."""
+    logger.info(json.dumps({"event": "llm_call", **metrics.as_dict()}))
+
+
+def export_metrics(metrics: CallMetrics) -> None:
+    """Add the call to the collected Prometheus metrics, if collecting."""
+    cached = str(metrics.cached).lower()
+    telemetry.inc("llm_calls_total", model=metrics.model, cached=cached)
+    if metrics.cached:
+        return
+    telemetry.inc(
+        "llm_tokens_total",
+        metrics.prompt_tokens,
+        model=metrics.model,
+        kind="prompt",
+    )
+    telemetry.inc(
+        "llm_tokens_total",
+        metrics.completion_tokens,
+        model=metrics.model,
+        kind="completion",
+    )
+    if metrics.cost is not None:
+        telemetry.inc("llm_cost_usd_total", metrics.cost, model=metrics.model)
+    telemetry.observe(
+        "llm_call_duration_seconds", metrics.latency, model=metrics.model
+    )
@@ -0,0 +1,311 @@
+"""Crash-safe queue of fetch (and summarize) jobs in SQLite.
+
+For campaigns over thousands of URLs, the jobs are kept in a SQLite
+database, so that a crash loses nothing:
+
+- A worker claims a job with a lease of `lease` seconds. When the worker
+  dies, the job is claimed again by another worker once the lease expires.
+- A failed job is retried after an exponential backoff, up to
+  `max_attempts` attempts, then marked `failed` with its error.
+- Running the workers again resumes the jobs left.
+
+Many worker processes can share a database file on one machine.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import sqlite3
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from recent_state_summarizer.fetch.registry import get_fetcher
+from recent_state_summarizer.retry import RetryPolicy
+from recent_state_summarizer.summarize import summarize_titles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 10 * 60
+# Seconds between the checks of a worker waiting for the jobs of others
+POLL_INTERVAL = 5.0
+DEFAULT_JOB_RETRY_POLICY = RetryPolicy(
+    max_attempts=3, base_delay=30.0, max_delay=15 * 60, deadline=None
+)
+STATUSES = ("pending", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_expires_at REAL,
+    worker TEXT,
+    error TEXT,
+    titles TEXT,
+    summary TEXT,
+    updated_at REAL
+)
+"""
+
+
+@dataclass(frozen=True)
+class Job:
+    id: int
+    url: str
+    attempts: int
+
+
+@dataclass(frozen=True)
+class JobResult:
+    url: str
+    status: str
+    attempts: int
+    error: str | None
+    titles: str | None
+    summary: str | None
+
+
+class JobQueue:
+    """Jobs of a database file.
+
+    Args:
+        policy: `max_attempts` and the backoff of the retries
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        lease: float = DEFAULT_LEASE_SECONDS,
+        policy: RetryPolicy = DEFAULT_JOB_RETRY_POLICY,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.lease = lease
+        self.policy = policy
+        self._clock = clock
+        # Autocommit, transactions are begun explicitly
+        self._connection = sqlite3.connect(
+            self.path, timeout=30.0, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Take the write lock at once, so that two workers never claim
+        # the same job
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._connection
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        """Add the jobs of the URLs not queued yet and return their count."""
+        with self._transaction() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO jobs (url, updated_at) VALUES (?, ?)",
+                ((url, self._clock()) for url in urls),
+            )
+            return connection.total_changes - before
+
+    def claim(self, worker: str) -> Job | None:
+        """Lease the next available job, if any.
+
+        Jobs whose lease expired (their worker died) are available again,
+        unless they used up `max_attempts`: those are marked `failed`, so
+        that a job killing its workers is not leased forever.
+        """
+        now = self._clock()
+        with self._transaction() as connection:
+            connection.execute(
+                """
+                UPDATE jobs SET status = 'failed', error = ?,
+                    lease_expires_at = NULL, updated_at = ?
+                WHERE status = 'running' AND lease_expires_at <= ?
+                    AND attempts >= ?
+                """,
+                ("lease expired", now, now, self.policy.max_attempts),
+            )
+            row = connection.execute(
+                """
+                SELECT id, url, attempts FROM jobs
+                WHERE (status = 'pending' AND available_at <= ?)
+                    OR (status = 'running' AND lease_expires_at <= ?)
+                ORDER BY id LIMIT 1
+                """,
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                """
+                UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                    lease_expires_at = ?, worker = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (now + self.lease, worker, now, row[0]),
+            )
+        return Job(row[0], row[1], row[2] + 1)
+
+    def complete(
+        self, job: Job, worker: str, titles: str, summary: str | None
+    ) -> bool:
+        """Save the result, unless the lease was lost to another worker."""
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                """
+                UPDATE jobs SET status = 'done', titles = ?, summary = ?,
+                    error = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND status = 'running' AND worker = ?
+                """,
+                (titles, summary, self._clock(), job.id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job: Job, worker: str, error: str) -> bool:
+        """Retry the job later, or give up after `max_attempts`."""
+        now = self._clock()
+        if job.attempts >= self.policy.max_attempts:
+            status, available_at = "failed", now
+        else:
+            status = "pending"
+            available_at = now + self.policy.backoff(job.attempts - 1)
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                """
+                UPDATE jobs SET status = ?, available_at = ?, error = ?,
+                    lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND status = 'running' AND worker = ?
+                """,
+                (status, available_at, error, now, job.id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def next_available_at(self) -> float | None:
+        """Return when the earliest job not available yet can be claimed.
+
+        That is a job waiting for a retry, or a running job once its lease
+        expires (if its worker died).
+        """
+        (available_at,) = self._connection.execute("""
+            SELECT MIN(available_at) FROM (
+                SELECT available_at FROM jobs WHERE status = 'pending'
+                UNION ALL
+                SELECT lease_expires_at FROM jobs WHERE status = 'running'
+            )
+            """).fetchone()
+        return available_at
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of jobs per status."""
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, count in self._connection.execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+    def results(self, status: str | None = None) -> Iterator[JobResult]:
+        """Iterate the jobs (of `status`) in the order they were queued."""
+        query = (
+            "SELECT url, status, attempts, error, titles, summary FROM jobs"
+        )
+        parameters: tuple[str, ...] = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            parameters = (status,)
+        for row in self._connection.execute(
+            query + " ORDER BY id", parameters
+        ):
+            yield JobResult(*row)
+
+
+def process_job(url: str, *, summarize: bool = True) -> tuple[str, str | None]:
+    """Fetch the titles of `url` and summarize them."""
+    titles = "\n".join(
+        f"- {title_tag['title']}" for title_tag in get_fetcher(url)(url)
+    )
+    if not summarize:
+        return titles, None
+    return titles, summarize_titles(titles, on_delta=None)
+
+
+def run_worker(
+    path: str | Path,
+    worker: str | None = None,
+    *,
+    summarize: bool = True,
+    lease: float = DEFAULT_LEASE_SECONDS,
+    process: Callable[..., tuple[str, str | None]] = process_job,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.time,
+) -> int:
+    """Process the jobs until none is left, waiting for the retries.
+
+    Jobs running in other workers are left to them, unless their lease
+    expires (e.g. the workers of a crashed run), so the worker keeps
+    polling while any job runs.
+
+    Returns:
+        The number of jobs processed (done or failed)
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    processed = 0
+    with closing(JobQueue(path, lease=lease, clock=clock)) as queue:
+        while True:
+            job = queue.claim(worker)
+            if job is None:
+                available_at = queue.next_available_at()
+                if available_at is None:
+                    break
+                sleep(min(max(available_at - clock(), 0.0), POLL_INTERVAL))
+                continue
+            try:
+                titles, summary = process(job.url, summarize=summarize)
+            except Exception as error:
+                logger.warning(
+                    "Job %s failed (attempt %d): %r",
+                    job.url,
+                    job.attempts,
+                    error,
+                )
+                queue.fail(job, worker, repr(error))
+            else:
+                if not queue.complete(job, worker, titles, summary):
+                    logger.warning("Lost the lease of %s", job.url)
+            processed += 1
+    return processed
+
+
+def run_workers(
+    path: str | Path,
+    processes: int | None = None,
+    *,
+    summarize: bool = True,
+    lease: float = DEFAULT_LEASE_SECONDS,
+) -> int:
+    """Run the workers in `processes` processes (default: number of CPUs)
+    until no job is available, and return the number of jobs processed."""
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(processes) as executor:
+        futures = [
+            executor.submit(run_worker, path, summarize=summarize, lease=lease)
+            for _ in range(processes)
+        ]
+        return sum(future.result() for future in futures)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+from collections.abc import Mapping
+
+from recent_state_summarizer.backends import ChatBackend, OpenAIModuleBackend
+from recent_state_summarizer.cache import SummaryCache, summary_cache_key
+from recent_state_summarizer.compaction import compact_titles, fit_to_budget
+from recent_state_summarizer.instrumentation import (
+    CallRecorder,
+    MetricsCallback,
+)
+from recent_state_summarizer.summarize import (
+    TEMPERATURE,
+    _report,
+    _route,
+    _summarize,
+    summarize_titles,
+)
+from recent_state_summarizer.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Tokens of the titles of all sources in one request
+PACK_TOKEN_BUDGET = 3000
+MAX_SOURCES_PER_PACK = 20
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class PackedResponseError(ValueError):
+    """The response to a packed prompt is not a JSON object."""
+
+
+def pack_sources(
+    titles_by_source: Mapping[str, str],
+    *,
+    token_budget: int = PACK_TOKEN_BUDGET,
+    max_sources: int = MAX_SOURCES_PER_PACK,
+) -> list[list[str]]:
+    """Group sources in order so that each group fits in one request.
+
+    A source exceeding `token_budget` by itself makes a group of its own.
+    """
+    packs: list[list[str]] = []
+    pack: list[str] = []
+    total = 0
+    for source, titles in titles_by_source.items():
+        tokens = estimate_tokens(titles)
+        if pack and (
+            total + tokens > token_budget or len(pack) >= max_sources
+        ):
+            packs.append(pack)
+            pack, total = [], 0
+        pack.append(source)
+        total += tokens
+    if pack:
+        packs.append(pack)
+    return packs
+
+
+def build_packed_prompt_text(titles_by_id: Mapping[str, str]) -> str:
+    sections = "\n".join(
+        f"### {source_id}\n```\n{titles}\n```\n"
+        for source_id, titles in titles_by_id.items()
+    )
+    return f"""\
+以下は、複数の人物がそれぞれ最近書いたブログ記事のタイトルの一覧です。
+一覧は人物ごとに「### ID」の見出しに続けて3つのバッククォートで囲まれています。
+一覧ごとに、その人物が最近何をやっているかを詳しく教えてください。
+応答は、IDをキー、要約を値とするJSONオブジェクトのみとしてください。
+要約は文ごとに改行で区切ってください。
+
+{sections}"""
+
+
+def parse_packed_response(content: str, ids: list[str]) -> dict[str, str]:
+    """Return the summaries in the response, keyed by the IDs.
+
+    IDs missing from the response or whose value is not a non-empty string
+    are left out.
+
+    Raises:
+        PackedResponseError: The response is not a JSON object
+    """
+    try:
+        parsed = json.loads(_CODE_FENCE.sub("", content.strip()))
+    except json.JSONDecodeError as error:
+        raise PackedResponseError(f"Invalid JSON: {error}") from error
+    if not isinstance(parsed, dict):
+        raise PackedResponseError(
+            f"Expected a JSON object, got {type(parsed).__name__}"
+        )
+    return {
+        source_id: parsed[source_id].strip()
+        for source_id in ids
+        if isinstance(parsed.get(source_id), str) and parsed[source_id].strip()
+    }
+
+
+def summarize_packed(
+    titles_by_source: Mapping[str, str],
+    *,
+    use_cache: bool = True,
+    compact: bool = False,
+    token_budget: int | None = None,
+    pack_token_budget: int = PACK_TOKEN_BUDGET,
+    max_sources: int = MAX_SOURCES_PER_PACK,
+    on_metrics: MetricsCallback | None = None,
+    model: str | None = None,
+    timeout: float | None = None,
+    backend: ChatBackend | None = None,
+) -> dict[str, str]:
+    """Summarize title lists of many small sources with few requests.
+
+    Title lists are packed into one prompt asking for a JSON object with a
+    summary per source, and the response is split back per source.
+    Sources missing from an invalid or incomplete response are summarized
+    one by one.
+
+    Args:
+        titles_by_source: Titles as bullet list keyed by source
+        token_budget: Number of tokens to fit the titles of each source in
+        pack_token_budget: Number of tokens of titles in one request
+        max_sources: Maximum number of sources in one request
+
+    Returns:
+        Summaries keyed by the same keys as `titles_by_source`
+    """
+    if compact:
+        titles_by_source = {
+            source: compact_titles(titles, token_budget=token_budget).titles
+            for source, titles in titles_by_source.items()
+        }
+    elif token_budget is not None:
+        titles_by_source = {
+            source: fit_to_budget(titles, token_budget)
+            for source, titles in titles_by_source.items()
+        }
+    options = {
+        "use_cache": use_cache,
+        "on_metrics": on_metrics,
+        "timeout": timeout,
+        "backend": backend,
+    }
+
+    summaries = {}
+    for pack in pack_sources(
+        titles_by_source,
+        token_budget=pack_token_budget,
+        max_sources=max_sources,
+    ):
+        if len(pack) > 1:
+            summaries.update(
+                _summarize_pack(
+                    {source: titles_by_source[source] for source in pack},
+                    model=model,
+                    **options,
+                )
+            )
+        for source in pack:
+            if source not in summaries:
+                summaries[source] = summarize_titles(
+                    titles_by_source[source],
+                    compact=False,
+                    model=model,
+                    **options,
+                )
+    return {source: summaries[source] for source in titles_by_source}
+
+
+def _summarize_pack(
+    titles_by_source: Mapping[str, str],
+    *,
+    use_cache: bool,
+    model: str | None,
+    **options,
+) -> dict[str, str]:
+    # Short IDs instead of the sources (e.g. URLs) which the model may alter
+    ids = {
+        f"source-{index}": source
+        for index, source in enumerate(titles_by_source, start=1)
+    }
+    prompt_text = build_packed_prompt_text(
+        {
+            source_id: titles_by_source[source]
+            for source_id, source in ids.items()
+        }
+    )
+    if model is None:
+        route, options["timeout"] = _route(
+            prompt_text, None, options["timeout"]
+        )
+        if route is None:
+            return {}
+        model = route.model
+
+    # Cache only valid responses, so that an invalid one is not reused
+    cache = SummaryCache() if use_cache else None
+    options["backend"] = options["backend"] or OpenAIModuleBackend()
+    key = summary_cache_key(
+        model, TEMPERATURE, prompt_text, host=options["backend"].host
+    )
+    if cache is not None and (content := cache.get(key)) is not None:
+        recorder = CallRecorder(model, prompt_text)
+        _report(recorder.finish(content, cached=True), options["on_metrics"])
+    else:
+        content = _summarize(
+            prompt_text, use_cache=False, model=model, **options
+        )
+
+    try:
+        parsed = parse_packed_response(content, list(ids))
+    except PackedResponseError as error:
+        logger.warning("Falling back to one request per source: %s", error)
+        return {}
+    if len(parsed) < len(ids):
+        logger.warning(
+            "Response lacks %d of %d sources, summarizing them one by one",
+            len(ids) - len(parsed),
+            len(ids),
+        )
+    elif cache is not None:
+        cache.set(key, content)
+    logger.info("Summarized %d sources in one request", len(parsed))
+    return {ids[source_id]: summary for source_id, summary in parsed.items()}
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TextIO
+
+DEFAULT_PROFILE_PATH = "profile.json"
+
+
+@dataclass
+class Span:
+    """A timed stage. Add details (e.g. bytes, status) with `set()`."""
+
+    name: str
+    category: str
+    start: float
+    args: dict[str, Any] = field(default_factory=dict)
+    duration: float = 0.0
+    child_duration: float = 0.0
+    thread_id: int = 0
+
+    @property
+    def self_duration(self) -> float:
+        return self.duration - self.child_duration
+
+    def set(self, **args: Any) -> None:
+        self.args.update(args)
+
+
+class _NullSpan:
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """Collect nested spans of the stages of a run."""
+
+    def __init__(self, *, clock=time.perf_counter) -> None:
+        self._clock = clock
+        self.started_at = clock()
+        self.spans: list[Span] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str, args: dict[str, Any]):
+        stack = self._stack()
+        span = Span(
+            name,
+            category,
+            self._clock(),
+            args,
+            thread_id=threading.get_ident(),
+        )
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.set(error=repr(error))
+            raise
+        finally:
+            span.duration = self._clock() - span.start
+            stack.pop()
+            if stack:
+                stack[-1].child_duration += span.duration
+            with self._lock:
+                self.spans.append(span)
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        end: float,
+        args: dict[str, Any],
+    ) -> None:
+        """Add a span measured elsewhere (e.g. from callbacks) as a child
+        of the current span."""
+        span = Span(
+            name,
+            category,
+            start,
+            args,
+            duration=end - start,
+            thread_id=threading.get_ident(),
+        )
+        stack = self._stack()
+        if stack:
+            stack[-1].child_duration += span.duration
+        with self._lock:
+            self.spans.append(span)
+
+    def now(self) -> float:
+        return self._clock()
+
+    def _stack(self) -> list[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """Return the spans in the Chrome trace event format.
+
+        Open the saved file with chrome://tracing or https://ui.perfetto.dev
+        """
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": (span.start - self.started_at) * 1_000_000,
+                    "dur": span.duration * 1_000_000,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": span.args,
+                }
+                for span in sorted(self.spans, key=lambda span: span.start)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write_chrome_trace(self, path: str | Path) -> None:
+        with open(path, "w", encoding="utf8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+    def summary(self) -> str:
+        """Tabulate the count, total and self time (excluding nested
+        stages) of each stage, the largest self time first."""
+        stages: dict[str, list[float]] = {}
+        for span in self.spans:
+            count, total, self_time = stages.get(span.name, [0, 0.0, 0.0])
+            stages[span.name] = [
+                count + 1,
+                total + span.duration,
+                self_time + span.self_duration,
+            ]
+        elapsed = self._clock() - self.started_at
+        lines = [
+            f"Profile of {elapsed * 1000:.1f} ms",
+            f"{'stage':<16}{'count':>8}{'total ms':>12}{'self ms':>12}",
+        ]
+        for name, (count, total, self_time) in sorted(
+            stages.items(), key=lambda item: item[1][2], reverse=True
+        ):
+            lines.append(
+                f"{name:<16}{count:>8}{total * 1000:>12.1f}"
+                f"{self_time * 1000:>12.1f}"
+            )
+        return "\n".join(lines)
+
+
+_profiler: Profiler | None = None
+
+
+@contextmanager
+def span(name: str, category: str = "stage", **args: Any):
+    """Time the block as a stage of the active profiler, if any."""
+    if _profiler is None:
+        yield _NULL_SPAN
+        return
+    with _profiler.span(name, category, args) as active_span:
+        yield active_span
+
+
+def enabled() -> bool:
+    return _profiler is not None
+
+
+def now() -> float:
+    """Return the time on the clock of the active profiler."""
+    if _profiler is None:
+        return time.perf_counter()
+    return _profiler.now()
+
+
+def record(
+    name: str, category: str, start: float, end: float, **args: Any
+) -> None:
+    """Add a stage timed with `now()` to the active profiler, if any."""
+    if _profiler is not None:
+        _profiler.record(name, category, start, end, args)
+
+
+def iterate(iterable: Iterable, name: str, category: str = "stage"):
+    """Time each step of a lazy iterable (e.g. a fetcher) as a stage.
+
+    The iterable is returned as is when profiling is disabled.
+    """
+    if _profiler is None:
+        return iterable
+    return _iterate(iter(iterable), name, category)
+
+
+def _iterate(iterator: Iterator, name: str, category: str):
+    while True:
+        with span(name, category):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+@contextmanager
+def profiling(
+    path: str | Path | None = DEFAULT_PROFILE_PATH,
+    *,
+    stream: TextIO | None = None,
+    profiler: Profiler | None = None,
+):
+    """Profile the block, save a Chrome trace to `path` and print a summary
+    to `stream` (default: stderr).
+
+    Pass `profiler` to collect the spans with a subclass of `Profiler`.
+    """
+    global _profiler
+
+    profiler = profiler or Profiler()
+    _profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = None
+        stream = stream or sys.stderr
+        print(profiler.summary(), file=stream)
+        if path is not None:
+            profiler.write_chrome_trace(path)
+            print(f"Trace saved to {path}", file=stream)
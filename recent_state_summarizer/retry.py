@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# The server did not process the request when answering with these
+UNPROCESSED_STATUSES = frozenset({429, 503})
+
+
+class TransientError(Exception):
+    """A failure which may succeed if the same call is tried again.
+
+    Args:
+        retry_after: Seconds the server asked to wait, if any
+        sent: Whether the server may have processed the request
+        result: Value to return when the retries are exhausted
+            (e.g. the last error response)
+    """
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        retry_after: float | None = None,
+        sent: bool = True,
+        result: Any = None,
+    ) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.sent = sent
+        self.result = result
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling when a host failed repeatedly just before."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How many times and how long to retry a call.
+
+    The delay before the n-th retry is chosen at random between 0 and
+    `base_delay * 2 ** n` seconds (capped to `max_delay`), unless the
+    server asked to wait with Retry-After. No retry is made which would
+    end after `deadline` seconds from the first attempt.
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    deadline: float | None = 60.0
+
+    def backoff(self, retry: int) -> float:
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2**retry)
+        )
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class CircuitBreaker:
+    """Stop calling a host for a while after consecutive failures.
+
+    After `failure_threshold` consecutive failures, calls to the host fail
+    fast with `CircuitOpenError` for `reset_timeout` seconds. Then one
+    trial call is let through, which closes the circuit if it succeeds.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+
+    def before_call(self, host: str) -> None:
+        opened_at = self._opened_at.get(host)
+        if opened_at is None:
+            return
+        if self._clock() - opened_at < self.reset_timeout:
+            raise CircuitOpenError(f"Circuit for {host} is open")
+        # Half-open: let this call through, fail fast again if it fails
+        self._failures[host] = self.failure_threshold - 1
+        del self._opened_at[host]
+
+    def record_success(self, host: str) -> None:
+        self._failures.pop(host, None)
+        self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        failures = self._failures.get(host, 0) + 1
+        self._failures[host] = failures
+        if failures >= self.failure_threshold:
+            logger.warning("Opening circuit for %s", host)
+            self._opened_at[host] = self._clock()
+
+    def reset(self) -> None:
+        self._failures.clear()
+        self._opened_at.clear()
+
+
+circuit_breaker = CircuitBreaker()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse Retry-After header given as seconds or HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # `-0000` is parsed without a time zone, but means UTC in HTTP
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def call_with_retry(
+    func: Callable[[float | None], T],
+    *,
+    host: str,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    idempotent: bool = True,
+    breaker: CircuitBreaker | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> T:
+    """Call `func` retrying `TransientError` with exponential backoff.
+
+    `func` is called with the seconds left until the deadline (or None),
+    which it should use as the timeout of the attempt.
+    A non-idempotent call is retried only when the server did not process
+    the request.
+
+    When the retries are exhausted, the `result` of the last
+    `TransientError` is returned if it has one, otherwise its cause
+    is raised.
+    """
+    breaker = breaker or circuit_breaker
+    started_at = clock()
+    retry = 0
+    while True:
+        breaker.before_call(host)
+        try:
+            result = func(_remaining(policy, clock() - started_at))
+        except TransientError as error:
+            breaker.record_failure(host)
+            delay = _retry_delay(
+                error, retry, policy, idempotent, clock() - started_at
+            )
+            if delay is None:
+                if error.result is not None:
+                    return error.result
+                raise (error.__cause__ or error)
+            retry += 1
+            logger.info("Retrying %s in %.1f seconds (%s)", host, delay, error)
+            sleep(delay)
+        else:
+            breaker.record_success(host)
+            return result
+
+
+async def acall_with_retry(
+    func: Callable[[float | None], Awaitable[T]],
+    *,
+    host: str,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    idempotent: bool = True,
+    breaker: CircuitBreaker | None = None,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> T:
+    """Await `func` like `call_with_retry()`, sleeping without blocking."""
+    breaker = breaker or circuit_breaker
+    started_at = clock()
+    retry = 0
+    while True:
+        breaker.before_call(host)
+        try:
+            result = await func(_remaining(policy, clock() - started_at))
+        except TransientError as error:
+            breaker.record_failure(host)
+            delay = _retry_delay(
+                error, retry, policy, idempotent, clock() - started_at
+            )
+            if delay is None:
+                if error.result is not None:
+                    return error.result
+                raise (error.__cause__ or error)
+            retry += 1
+            logger.info("Retrying %s in %.1f seconds (%s)", host, delay, error)
+            await sleep(delay)
+        else:
+            breaker.record_success(host)
+            return result
+
+
+def _remaining(policy: RetryPolicy, elapsed: float) -> float | None:
+    if policy.deadline is None:
+        return None
+    return policy.deadline - elapsed
+
+
+def _retry_delay(
+    error: TransientError,
+    retry: int,
+    policy: RetryPolicy,
+    idempotent: bool,
+    elapsed: float,
+) -> float | None:
+    """Return the seconds to wait before the next attempt, or None to give
+    up."""
+    delay = (
+        error.retry_after
+        if error.retry_after is not None
+        else policy.backoff(retry)
+    )
+    if (
+        retry + 1 >= policy.max_attempts
+        or (not idempotent and error.sent)
+        or (policy.deadline is not None and elapsed + delay >= policy.deadline)
+    ):
+        return None
+    return delay
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Mapping
+from urllib.parse import urlparse
+
+import httpx
+
+from recent_state_summarizer.backends import (
+    OpenAICompatibleBackend,
+    OpenAIModuleBackend,
+)
+from recent_state_summarizer.cache import SummaryCache, summary_cache_key
+from recent_state_summarizer.compaction import compact_titles, fit_to_budget
+from recent_state_summarizer.instrumentation import (
+    CallMetrics,
+    CallRecorder,
+    MetricsCallback,
+    export_metrics,
+    log_metrics,
+)
+from recent_state_summarizer.retry import (
+    RETRY_STATUSES,
+    RetryPolicy,
+    TransientError,
+    acall_with_retry,
+    parse_retry_after,
+)
+from recent_state_summarizer.summarize import (
+    COMPLETION_RETRY_POLICY,
+    TEMPERATURE,
+    _build_prompts,
+    _build_summarize_prompt_text,
+    _parse_response,
+    _route,
+)
+from recent_state_summarizer.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200_000
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_MAX_RETRIES = 5
+COMPLETION_TOKENS_ESTIMATE = 500
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class TokenBucket:
+    """Allow `capacity` units per `period` seconds, refilled continuously."""
+
+    def __init__(
+        self, capacity: float, period: float = 60.0, *, clock=time.monotonic
+    ) -> None:
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self._clock = clock
+        self._available = capacity
+        self._updated_at = clock()
+        self._paused_until = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - max(self._updated_at, self._paused_until)
+        if elapsed > 0:
+            self._available = min(
+                self.capacity, self._available + elapsed * self.refill_rate
+            )
+            self._updated_at = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds to wait until `amount` units are available."""
+        self._refill()
+        now = self._clock()
+        ready_at = max(self._paused_until, now)
+        shortage = min(amount, self.capacity) - self._available
+        if shortage > 0:
+            ready_at += shortage / self.refill_rate
+        return ready_at - now
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._available -= min(amount, self.capacity)
+
+    def pause(self, seconds: float) -> None:
+        """Make no units available for `seconds` (e.g. from Retry-After)."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+        self._available = 0.0
+        self._updated_at = self._paused_until
+
+    def sync(self, remaining: float) -> None:
+        """Lower the available units to what the server reports."""
+        self._refill()
+        self._available = min(self._available, remaining)
+
+
+def parse_duration(value: str) -> float | None:
+    """Parse Retry-After seconds or rate limit reset values like `6m0s`."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class RateLimitedSummarizer:
+    """Summarize many title lists concurrently within API rate limits.
+
+    Requests are dispatched as long as both the requests and the tokens
+    token buckets allow. Tokens are estimated from the prompt.
+    The buckets follow `x-ratelimit-remaining-*` response headers, and
+    are paused by `Retry-After` when the API answers 429.
+    Server errors and transport errors are retried with backoff by
+    `policy`, through the circuit breaker of the API host.
+
+    Like `summarize_titles()`, the completions are requested from `model`
+    at the endpoint of `backend` (default: the `openai` module), and
+    without `model` the model is chosen by `route_model()` per prompt.
+
+    Raises:
+        ValueError: If no API key is set for the OpenAI API
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        policy: RetryPolicy = COMPLETION_RETRY_POLICY,
+        period: float = 60.0,
+        api_key: str | None = None,
+        use_cache: bool = True,
+        compact: bool = False,
+        token_budget: int | None = None,
+        on_metrics: MetricsCallback | None = None,
+        model: str | None = None,
+        latency_target: float | None = None,
+        backend: OpenAIModuleBackend | OpenAICompatibleBackend | None = None,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute, period)
+        self.tokens = TokenBucket(tokens_per_minute, period)
+        self.max_retries = max_retries
+        self.policy = policy
+        backend = backend or OpenAIModuleBackend()
+        self.api_base = backend.base_url
+        self.host = urlparse(self.api_base).netloc
+        self.api_key = api_key or backend.api_key
+        # Unlike the OpenAI API, a compatible server may need no key
+        if self.api_key is None and isinstance(backend, OpenAIModuleBackend):
+            raise ValueError(
+                "No OpenAI API key, set OPENAI_API_KEY or pass api_key"
+            )
+        self.model = model
+        self.latency_target = latency_target
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+        self._cache = SummaryCache() if use_cache else None
+        self.compact = compact
+        self.token_budget = token_budget
+        self.on_metrics = on_metrics
+
+    async def summarize_many(
+        self, titles_by_source: Mapping[str, str]
+    ) -> dict[str, str]:
+        """Summarize the title lists concurrently.
+
+        Sources which failed after the retries are logged and left out.
+        """
+        headers = (
+            {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        )
+        async with httpx.AsyncClient(
+            base_url=self.api_base, headers=headers, timeout=None
+        ) as client:
+            # A source failing does not discard the summaries of the others
+            results = await asyncio.gather(
+                *(
+                    self.summarize(client, titles)
+                    for titles in titles_by_source.values()
+                ),
+                return_exceptions=True,
+            )
+        summaries = {}
+        for source, result in zip(titles_by_source, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to summarize %s: %r", source, result)
+            else:
+                summaries[source] = result
+        return summaries
+
+    async def summarize(self, client: httpx.AsyncClient, titles: str) -> str:
+        if self.compact:
+            titles = compact_titles(
+                titles, token_budget=self.token_budget
+            ).titles
+        elif self.token_budget is not None:
+            titles = fit_to_budget(titles, self.token_budget)
+        prompt_text = _build_summarize_prompt_text(titles)
+        model = self.model
+        if model is None:
+            route, _ = _route(prompt_text, self.latency_target, None)
+            if route is None:
+                raise ValueError(
+                    "Titles fit no model, summarize them with"
+                    " summarize_titles() to split them into chunks"
+                )
+            model = route.model
+        if self._cache is not None:
+            key = summary_cache_key(
+                model, TEMPERATURE, prompt_text, host=self.host
+            )
+            if (summary := self._cache.get(key)) is not None:
+                recorder = CallRecorder(model, prompt_text)
+                self._report(recorder.finish(summary, cached=True))
+                return summary
+
+        estimated = estimate_tokens(prompt_text) + COMPLETION_TOKENS_ESTIMATE
+        payload = {
+            "model": model,
+            "messages": _build_prompts(prompt_text),
+            "temperature": TEMPERATURE,
+        }
+        async with self._concurrency:
+            # Waiting for the rate limits is included in the latency
+            recorder = CallRecorder(model, prompt_text)
+            response = await acall_with_retry(
+                # Like other completions, an attempt is not cut short
+                lambda _: self._post(client, payload, estimated),
+                host=self.host,
+                policy=self.policy,
+            )
+        response.raise_for_status()
+
+        summary = _parse_response(recorder.observe(response.json()))
+        self._report(recorder.finish(summary))
+        if self._cache is not None:
+            self._cache.set(key, summary)
+        return summary
+
+    async def _post(
+        self, client: httpx.AsyncClient, payload: dict, tokens: float
+    ) -> httpx.Response:
+        """Send a completion request, retrying while rate limited.
+
+        Raises:
+            TransientError: If the request failed and may succeed later
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(tokens)
+            try:
+                response = await client.post("/chat/completions", json=payload)
+            except httpx.TransportError as error:
+                raise TransientError(repr(error)) from error
+            self._adapt(response.headers)
+            if response.status_code != httpx.codes.TOO_MANY_REQUESTS:
+                break
+            if attempt == self.max_retries:
+                return response
+            retry_after = (
+                parse_duration(response.headers.get("retry-after", "")) or 1.0
+            )
+            logger.info(
+                "Rate limited, retrying after %.1f seconds", retry_after
+            )
+            self.requests.pause(retry_after)
+            self.tokens.pause(retry_after)
+        if response.status_code in RETRY_STATUSES:
+            raise TransientError(
+                f"{response.status_code} from {self.host}",
+                retry_after=parse_retry_after(
+                    response.headers.get("retry-after")
+                ),
+                result=response,
+            )
+        return response
+
+    def _report(self, metrics: CallMetrics) -> None:
+        log_metrics(metrics)
+        export_metrics(metrics)
+        if self.on_metrics is not None:
+            self.on_metrics(metrics)
+
+    async def _acquire(self, tokens: float) -> None:
+        while True:
+            wait = max(
+                self.requests.delay_for(1), self.tokens.delay_for(tokens)
+            )
+            if wait <= 0:
+                self.requests.consume(1)
+                self.tokens.consume(tokens)
+                return
+            await asyncio.sleep(wait)
+
+    def _adapt(self, headers: httpx.Headers) -> None:
+        for bucket, kind in (
+            (self.requests, "requests"),
+            (self.tokens, "tokens"),
+        ):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            bucket.sync(float(remaining))
+            if float(remaining) < 1:
+                reset = parse_duration(
+                    headers.get(f"x-ratelimit-reset-{kind}", "")
+                )
+                if reset:
+                    bucket.pause(reset)
+
+
+def summarize_many(
+    titles_by_source: Mapping[str, str], **kwargs
+) -> dict[str, str]:
+    """Summarize title lists of many sources within rate limits.
+
+    Keyword arguments are passed to `RateLimitedSummarizer`.
+
+    Returns:
+        Summaries keyed by the same keys as `titles_by_source`, without
+        the sources which failed
+    """
+
+    async def run() -> dict[str, str]:
+        return await RateLimitedSummarizer(**kwargs).summarize_many(
+            titles_by_source
+        )
+
+    return asyncio.run(run())
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from recent_state_summarizer.compaction import trim_to_budget
+from recent_state_summarizer.tokens import estimate_tokens
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 3000
+N_FEATURES = 256
+NGRAM_SIZES = (1, 2, 3)
+ITERATIONS = 10
+CHUNK_SIZE = 10_000
+ONE_HOT_SIZE = 10_000_000
+SAMPLE_SIZE = 20_000
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(
+            "Selecting representative titles requires NumPy. "
+            "Install it with `pip install recent-state-summarizer[cluster]`"
+        ) from error
+    return numpy
+
+
+def embed_titles(
+    titles: list[str], n_features: int = N_FEATURES
+) -> np.ndarray:
+    """Return L2-normalized TF-IDF vectors of hashed character n-grams."""
+    np = _import_numpy()
+    folded = [title.casefold() for title in titles]
+    lengths = np.fromiter((len(title) for title in folded), dtype=np.int64)
+    codes = np.frombuffer(
+        "".join(folded).encode("utf-32-le"), dtype=np.uint32
+    ).astype(np.int64)
+    rows = np.repeat(np.arange(len(titles)), lengths)
+    ends = np.cumsum(lengths)
+
+    counts = np.zeros((len(titles), n_features), dtype=np.float32)
+    for size in NGRAM_SIZES:
+        if len(codes) < size:
+            continue
+        starts = np.arange(len(codes) - size + 1)
+        # Keep n-grams which do not cross the boundary of titles
+        starts = starts[starts + size <= ends[rows[starts]]]
+        hashes = np.zeros(len(starts), dtype=np.int64)
+        for offset in range(size):
+            hashes = hashes * 1_000_003 + codes[starts + offset]
+        columns = hashes % n_features
+        ngram_rows = rows[starts]
+        # Count per chunk of titles to bound the memory of bincount
+        for begin in range(0, len(titles), CHUNK_SIZE):
+            end = min(begin + CHUNK_SIZE, len(titles))
+            first, last = np.searchsorted(ngram_rows, [begin, end])
+            flat = (ngram_rows[first:last] - begin) * n_features + columns[
+                first:last
+            ]
+            counts[begin:end] += np.bincount(
+                flat, minlength=(end - begin) * n_features
+            ).reshape(end - begin, n_features)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(titles)) / (1 + document_frequency)) + 1
+    vectors = counts * idf.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray):
+    np = _import_numpy()
+    labels = np.empty(len(vectors), dtype=np.int64)
+    similarities = np.empty(len(vectors), dtype=np.float32)
+    for begin in range(0, len(vectors), CHUNK_SIZE):
+        scores = vectors[begin : begin + CHUNK_SIZE] @ centroids.T
+        labels[begin : begin + CHUNK_SIZE] = scores.argmax(axis=1)
+        similarities[begin : begin + CHUNK_SIZE] = scores.max(axis=1)
+    return labels, similarities
+
+
+def _sum_by_cluster(
+    vectors: np.ndarray, labels: np.ndarray, n_clusters: int
+) -> np.ndarray:
+    np = _import_numpy()
+    sums = np.zeros((n_clusters, vectors.shape[1]), dtype=vectors.dtype)
+    # Multiply by one-hot matrices, which is faster than np.add.at
+    chunk_size = max(1, ONE_HOT_SIZE // n_clusters)
+    for begin in range(0, len(vectors), chunk_size):
+        chunk_labels = labels[begin : begin + chunk_size]
+        one_hot = np.zeros((n_clusters, len(chunk_labels)), vectors.dtype)
+        one_hot[chunk_labels, np.arange(len(chunk_labels))] = 1
+        sums += one_hot @ vectors[begin : begin + chunk_size]
+    return sums
+
+
+def cluster_titles(
+    vectors: np.ndarray,
+    n_clusters: int,
+    *,
+    iterations: int = ITERATIONS,
+    seed: int = 0,
+):
+    """Spherical k-means. Returns cluster labels and medoid indices.
+
+    Centroids are fitted on a random sample of at most `SAMPLE_SIZE`
+    vectors, then every vector is assigned to the nearest centroid.
+    """
+    np = _import_numpy()
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > SAMPLE_SIZE:
+        sample = vectors[np.sort(rng.choice(len(vectors), SAMPLE_SIZE, False))]
+    initial = rng.choice(len(sample), size=n_clusters, replace=False)
+    centroids = sample[np.sort(initial)]
+    for _ in range(iterations):
+        labels, _ = _assign(sample, centroids)
+        sums = _sum_by_cluster(sample, labels, n_clusters)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # Keep the previous centroid of a cluster which lost all members
+        centroids = np.where(
+            norms > 0, sums / np.maximum(norms, 1e-12), centroids
+        )
+
+    labels, similarities = _assign(vectors, centroids)
+    # The most similar member of each cluster comes last in this order
+    order = np.lexsort((similarities, labels))
+    last_of_cluster = np.r_[labels[order][1:] != labels[order][:-1], True]
+    medoids = order[last_of_cluster]
+    return labels, medoids
+
+
+def select_representative_titles(
+    titles: list[str],
+    token_budget: int,
+    *,
+    n_features: int = N_FEATURES,
+    iterations: int = ITERATIONS,
+    seed: int = 0,
+) -> list[str]:
+    """Pick medoids of title clusters which fit in `token_budget` tokens.
+
+    Titles are embedded as TF-IDF weighted, hashed character n-grams and
+    grouped by spherical k-means, all vectorized with NumPy (optional
+    dependency, `pip install recent-state-summarizer[cluster]`).
+    The number of clusters is the number of average titles fitting in the
+    budget. Selected titles keep the original order.
+    """
+    if not titles:
+        return []
+    total_tokens = sum(estimate_tokens(f"- {title}\n") for title in titles)
+    if total_tokens <= token_budget:
+        return list(titles)
+
+    np = _import_numpy()
+    average_tokens = total_tokens / len(titles)
+    n_clusters = max(1, min(len(titles), int(token_budget / average_tokens)))
+    vectors = embed_titles(titles, n_features)
+    labels, medoids = cluster_titles(
+        vectors, n_clusters, iterations=iterations, seed=seed
+    )
+    selected = [titles[index] for index in np.sort(medoids)]
+    logger.info(
+        "Selected %d representative titles out of %d",
+        len(selected),
+        len(titles),
+    )
+    return trim_to_budget(selected, token_budget)
@@ -0,0 +1,283 @@
+"""Serve fetch and summarize over local HTTP.
+
+- `GET /fetch?url=...[&days=N]` streams the titles as JSON Lines
+- `POST /summarize` with `{"url": ...}` or `{"titles": [...]}` (and
+  optionally `"model"` and `"incremental": true` with `url`) returns
+  `{"summary": ...}`
+
+One process keeps the fetcher registry, the pooled connections, the
+revalidated responses and the summary cache warm across requests.
+Concurrent requests for the same URL (or summary) share one run. Invalid
+requests are answered with 400, and incremental updates of the state of
+a URL run one at a time.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.fetch import client
+from recent_state_summarizer.fetch.registry import get_fetcher
+from recent_state_summarizer.incremental import summarize_incrementally
+from recent_state_summarizer.summarize import summarize_titles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+JSON_LINES = "application/x-ndjson; charset=utf-8"
+
+
+class _Flight:
+    """One run of an iterable, whose items are kept for its followers."""
+
+    def __init__(self) -> None:
+        self.items: list[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self._condition = threading.Condition()
+
+    def run(
+        self, start: Callable[[], Iterable], on_finish: Callable[[], None]
+    ) -> None:
+        """Run `start()`, calling `on_finish` before the followers end."""
+        try:
+            for item in start():
+                with self._condition:
+                    self.items.append(item)
+                    self._condition.notify_all()
+        except Exception as error:
+            self.error = error
+        finally:
+            on_finish()
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    def follow(self) -> Iterator:
+        index = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: index < len(self.items) or self.done
+                )
+                if index >= len(self.items):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                item = self.items[index]
+            index += 1
+            yield item
+
+
+class Coalescer:
+    """Share one run among concurrent requests of the same key.
+
+    The run happens in its own thread, so that it completes for the other
+    requests even when the first one disconnects.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Any, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def stream(self, key: Any, start: Callable[[], Iterable]) -> Iterator:
+        """Iterate the items of `start()`, run once per concurrent key."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                threading.Thread(
+                    target=self._run, args=(key, flight, start), daemon=True
+                ).start()
+            else:
+                telemetry.inc("serve_coalesced_requests_total")
+        return flight.follow()
+
+    def call(self, key: Any, func: Callable[[], Any]) -> Any:
+        """Return `func()`, called once per concurrent key."""
+        (result,) = self.stream(key, lambda: [func()])
+        return result
+
+    def _run(self, key: Any, flight: _Flight, start: Callable[[], Iterable]):
+        def forget() -> None:
+            # A request arriving from now on starts a new run
+            with self._lock:
+                del self._flights[key]
+
+        flight.run(start, forget)
+
+
+class SummarizerServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int]) -> None:
+        super().__init__(address, _Handler)
+        self.coalescer = Coalescer()
+        self.response_cache = client.ResponseCache()
+        # Incremental updates of the state of a URL are run one at a time
+        self._state_locks: dict[str, threading.Lock] = {}
+        self._state_locks_lock = threading.Lock()
+
+    def fetch(self, url: str, days: int | None) -> Iterator:
+        """Stream the titles of `url`.
+
+        Raises:
+            ValueError: If `url` or `days` is invalid
+        """
+        if not isinstance(url, str):
+            raise ValueError("`url` must be a string")
+        if days is not None and (
+            not isinstance(days, int) or isinstance(days, bool) or days < 0
+        ):
+            raise ValueError("`days` must be a non-negative integer")
+        fetcher = get_fetcher(url)
+        kwargs = {} if days is None else {"days": days}
+
+        def start() -> Iterable:
+            with client.conditional_requests(self.response_cache):
+                yield from fetcher(url, **kwargs)
+
+        return self.coalescer.stream(("fetch", url, days), start)
+
+    def summarize(self, request: dict[str, Any]) -> str:
+        """Summarize the titles of the request.
+
+        Raises:
+            ValueError: If the request is invalid
+        """
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object")
+        model = request.get("model")
+        if model is not None and not isinstance(model, str):
+            raise ValueError("`model` must be a string")
+        if "url" in request:
+            url = request["url"]
+            titles = "\n".join(
+                f"- {title_tag['title']}"
+                for title_tag in self.fetch(url, request.get("days"))
+            )
+        elif "titles" in request:
+            url = None
+            if not isinstance(request["titles"], list) or not all(
+                isinstance(title, str) for title in request["titles"]
+            ):
+                raise ValueError("`titles` must be a list of strings")
+            titles = "\n".join(f"- {title}" for title in request["titles"])
+        else:
+            raise ValueError("Specify `url` or `titles`")
+
+        incremental = bool(request.get("incremental")) and url is not None
+        digest = hashlib.sha256(titles.encode("utf8")).hexdigest()
+        if incremental:
+            return self.coalescer.call(
+                ("summarize", url, digest, model),
+                lambda: self._summarize_incrementally(url, titles, model),
+            )
+        return self.coalescer.call(
+            ("summarize", None, digest, model),
+            lambda: summarize_titles(titles, on_delta=None, model=model),
+        )
+
+    def _summarize_incrementally(
+        self, url: str, titles: str, model: str | None
+    ) -> str:
+        # Requests with other titles would race on the state of the URL
+        with self._state_locks_lock:
+            lock = self._state_locks.setdefault(url, threading.Lock())
+        with lock:
+            return summarize_incrementally(
+                url, titles, on_delta=None, model=model
+            )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: SummarizerServer
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        if parsed.path != "/fetch":
+            self._send_json(404, {"error": "Not found"})
+            return
+        query = parse_qs(parsed.query)
+        if "url" not in query:
+            self._send_json(400, {"error": "Specify `url`"})
+            return
+        try:
+            days = int(query["days"][0]) if "days" in query else None
+            title_tags = self.server.fetch(query["url"][0], days)
+            # Report failures before the first title with a status
+            first = next(title_tags, None)
+        except ValueError as error:
+            self._send_json(400, {"error": str(error)})
+            return
+        except Exception as error:
+            logger.exception("Failed to fetch %s", query["url"][0])
+            self._send_json(502, {"error": repr(error)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", JSON_LINES)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            if first is not None:
+                self._write_chunk(first)
+                for title_tag in title_tags:
+                    self._write_chunk(title_tag)
+        except Exception:
+            # The client sees the stream cut without the last chunk
+            logger.exception("Failed while streaming %s", query["url"][0])
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/summarize":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            summary = self.server.summarize(request)
+        except ValueError as error:
+            self._send_json(400, {"error": str(error)})
+        except Exception as error:
+            logger.exception("Failed to summarize")
+            self._send_json(502, {"error": repr(error)})
+        else:
+            self._send_json(200, {"summary": summary})
+
+    def _write_chunk(self, title_tag: dict[str, Any]) -> None:
+        line = json.dumps(title_tag, ensure_ascii=False).encode() + b"\n"
+        self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+
+    def _send_json(self, status: int, body: dict[str, Any]) -> None:
+        content = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args) -> None:
+        logger.debug(format, *args)
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    """Serve until interrupted."""
+    with SummarizerServer((host, port)) as server:
+        logger.info("Serving at http://%s:%d", *server.server_address)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,139 @@
+"""Split batches across machines without a coordinator.
+
+Each machine runs the same batch with `--shard i/N` (i from 1 to N) and
+takes the URLs whose stable hash falls in its shard. The hash is of the
+normalized URL, or of its host (`--shard-by host`), so that all the
+requests to a host are sent from one machine within its limits. Hosts
+sharing the limits of their fetcher (e.g. the subdomains of Hatena blog)
+are hashed as one.
+`merge_outputs` combines the outputs of the shards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+from recent_state_summarizer.fetch.cli import save_title_tags
+from recent_state_summarizer.fetch.registry import get_fetcher_limits
+
+SHARD_BY = ("url", "host")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+@dataclass(frozen=True)
+class Shard:
+    """The `index`-th (from 1) of `count` shards."""
+
+    index: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse `i/N` (e.g. `2/4`) for argparse."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Shard must be i/N (e.g. 1/4): {value!r}"
+        ) from None
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"Shard index must be from 1 to {count}: {value!r}"
+        )
+    return Shard(index, count)
+
+
+def normalize_url(url: str) -> str:
+    """Drop the differences which do not change the page: case of the
+    scheme and host, default port, fragment and trailing slash."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, host, path, parts.query, ""))
+
+
+def add_shard_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        help="Take only the URLs of the i-th of N shards (e.g. 1/4), "
+        "chosen by a stable hash, to split the work across machines",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=SHARD_BY,
+        default="url",
+        help="Hash the normalized URL, or its host to keep all the "
+        "requests to a host in one shard (default: url)",
+    )
+
+
+def shard_key(url: str, by: str = "url") -> str:
+    normalized = normalize_url(url)
+    if by == "host":
+        try:
+            group = get_fetcher_limits(url).group
+        except ValueError:
+            group = None
+        return group or urlsplit(normalized).netloc
+    return normalized
+
+
+def shard_of(url: str, count: int, by: str = "url") -> int:
+    """Return the shard (from 1) of the URL, the same on every machine.
+
+    Unlike `hash()`, SHA-256 does not change between processes.
+    """
+    digest = hashlib.sha256(shard_key(url, by).encode("utf8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(
+    urls: Iterable[str], shard: Shard, by: str = "url"
+) -> list[str]:
+    return [
+        url for url in urls if shard_of(url, shard.count, by) == shard.index
+    ]
+
+
+def _read_lines(paths: Iterable[str | Path]) -> Iterator[dict]:
+    for path in paths:
+        with open(path, encoding="utf8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def merge_outputs(paths: Iterable[str | Path], save_path: str | Path) -> int:
+    """Combine JSON Lines outputs of `batch` shards into one.
+
+    The titles are sorted by their `source`, keeping the order of the
+    titles of a source, and the duplicated URLs are dropped.
+
+    Returns:
+        The number of titles saved
+    """
+    seen = set()
+    title_tags = []
+    for title_tag in _read_lines(paths):
+        key = normalize_url(title_tag["url"])
+        if key in seen:
+            continue
+        seen.add(key)
+        title_tags.append(title_tag)
+    title_tags.sort(key=lambda title_tag: title_tag.get("source", ""))
+
+    save_title_tags(save_path, title_tags, save_as_title_list=False)
+    return len(title_tags)
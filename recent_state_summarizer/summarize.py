@@ -1,25 +1,363 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
 from pathlib import Path
 
-import openai
+from recent_state_summarizer import profiling
+from recent_state_summarizer.backends import (
+    DEFAULT_TIMEOUT,
+    ChatBackend,
+    OpenAICompatibleBackend,
+    OpenAIModuleBackend,
+)
+from recent_state_summarizer.cache import SummaryCache, summary_cache_key
+from recent_state_summarizer.compaction import compact_titles, fit_to_budget
+from recent_state_summarizer.instrumentation import (
+    CallRecorder,
+    MetricsCallback,
+    export_metrics,
+    log_metrics,
+)
+from recent_state_summarizer.retry import RetryPolicy, call_with_retry
+from recent_state_summarizer.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
 
 MODEL = "gpt-3.5-turbo"
+TEMPERATURE = 0.0
+# Room for the completion in the context window
+COMPLETION_TOKENS_RESERVE = 1000
+# Timeout of a routed call per second of its estimated latency
+ROUTE_TIMEOUT_MARGIN = 2.0
+
+# A completion may take longer than the deadline of other calls, so it is
+# bounded only by the timeout of each attempt
+COMPLETION_RETRY_POLICY = RetryPolicy(deadline=None)
+
+DeltaCallback = Callable[[str], None]
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """A model to send prompts to, with its context size and rough speed.
+
+    `first_token_latency` is in seconds, and the speeds are in tokens per
+    second.
+    """
+
+    model: str
+    context_tokens: int
+    first_token_latency: float
+    prompt_tokens_per_second: float
+    completion_tokens_per_second: float
+
+    def fits(self, prompt_tokens: int) -> bool:
+        return prompt_tokens + COMPLETION_TOKENS_RESERVE <= self.context_tokens
+
+    def estimate_latency(self, prompt_tokens: int) -> float:
+        return (
+            self.first_token_latency
+            + prompt_tokens / self.prompt_tokens_per_second
+            + COMPLETION_TOKENS_RESERVE / self.completion_tokens_per_second
+        )
+
+
+# In order of preference: the fastest model first
+MODEL_ROUTES = (
+    ModelRoute("gpt-3.5-turbo", 16_385, 0.4, 20_000, 100),
+    ModelRoute("gpt-4o-mini", 128_000, 0.5, 15_000, 80),
+    ModelRoute("gpt-4.1-mini", 1_047_576, 0.6, 12_000, 70),
+)
+
+
+def route_model(
+    prompt_tokens: int,
+    *,
+    latency_target: float | None = None,
+    timeout: float | None = None,
+    routes: tuple[ModelRoute, ...] | None = None,
+) -> ModelRoute | None:
+    """Choose the model for a prompt of `prompt_tokens` tokens.
+
+    The first of `routes` (default: `MODEL_ROUTES`) whose context fits the
+    prompt and whose estimated latency meets `latency_target` (seconds) is
+    chosen. When no fitting model meets the target, the fitting model with
+    the lowest estimated latency is chosen.
+    Models estimated to take longer than `timeout` (seconds) are chosen
+    only when no fitting model is expected to answer in time.
+    Returns None when the prompt fits no model and has to be chunked.
+    """
+    if routes is None:
+        routes = MODEL_ROUTES
+    fitting = [route for route in routes if route.fits(prompt_tokens)]
+    if not fitting:
+        return None
+    if timeout is not None:
+        fitting = [
+            route
+            for route in fitting
+            if route.estimate_latency(prompt_tokens) <= timeout
+        ] or fitting
+    if latency_target is None:
+        return fitting[0]
+    for route in fitting:
+        if route.estimate_latency(prompt_tokens) <= latency_target:
+            return route
+    return min(
+        fitting, key=lambda route: route.estimate_latency(prompt_tokens)
+    )
 
 
-def _main(titles_path: str | Path) -> str:
+def _main(titles_path: str | Path, **kwargs) -> str:
     titles = _read_titles(titles_path)
-    return summarize_titles(titles)
+    return summarize_titles(titles, **kwargs)
 
 
-def summarize_titles(titles: str) -> str:
-    prompts = _build_prompts(titles)
-    response = _complete_chat(prompts)
-    return _parse_response(response)
+def summarize_titles(
+    titles: str,
+    *,
+    use_cache: bool = True,
+    on_delta: DeltaCallback | None = None,
+    compact: bool = False,
+    token_budget: int | None = None,
+    on_metrics: MetricsCallback | None = None,
+    model: str | None = None,
+    latency_target: float | None = None,
+    timeout: float | None = None,
+    backend: ChatBackend | None = None,
+) -> str:
+    """Summarize titles given as bullet list.
+
+    When `on_delta` is given, the completion is streamed and `on_delta` is
+    called with each piece of the summary as it arrives.
+    With `compact`, the titles are compacted (see
+    `compaction.compact_titles`) before prompting, which drops duplicates
+    and repeated series labels. The newest titles within `token_budget`
+    tokens are kept if given.
+    `on_metrics` is called with the latency, tokens and cost of the call.
+    The completion is requested from `model` through `backend` (default:
+    the `openai` module), waiting at most `timeout` seconds per attempt.
+    Without `model`, the model is chosen by `route_model()` for the prompt
+    size, `latency_target` and `timeout`, and titles fitting no model are
+    summarized chunk by chunk. Without `timeout`, a slow route is given
+    `ROUTE_TIMEOUT_MARGIN` times its estimated latency.
+    """
+    with profiling.span("prompt build"):
+        if compact:
+            titles = compact_titles(titles, token_budget=token_budget).titles
+        elif token_budget is not None:
+            titles = fit_to_budget(titles, token_budget)
+        prompt_text = _build_summarize_prompt_text(titles)
+    options = {
+        "use_cache": use_cache,
+        "on_metrics": on_metrics,
+        "timeout": timeout,
+        "backend": backend,
+    }
+    if model is None:
+        route, options["timeout"] = _route(
+            prompt_text, latency_target, timeout
+        )
+        if route is None:
+            return _summarize_in_chunks(
+                None,
+                titles,
+                on_delta=on_delta,
+                latency_target=latency_target,
+                **options,
+            )
+        model = route.model
+    return _summarize(prompt_text, on_delta=on_delta, model=model, **options)
+
+
+def update_summary(
+    previous_summary: str,
+    new_titles: str,
+    *,
+    use_cache: bool = True,
+    on_delta: DeltaCallback | None = None,
+    on_metrics: MetricsCallback | None = None,
+    model: str | None = None,
+    latency_target: float | None = None,
+    timeout: float | None = None,
+    backend: ChatBackend | None = None,
+) -> str:
+    with profiling.span("prompt build"):
+        prompt_text = _build_update_prompt_text(previous_summary, new_titles)
+    options = {
+        "use_cache": use_cache,
+        "on_metrics": on_metrics,
+        "timeout": timeout,
+        "backend": backend,
+    }
+    if model is None:
+        route, options["timeout"] = _route(
+            prompt_text, latency_target, timeout
+        )
+        if route is None:
+            return _summarize_in_chunks(
+                previous_summary,
+                new_titles,
+                on_delta=on_delta,
+                latency_target=latency_target,
+                **options,
+            )
+        model = route.model
+    return _summarize(prompt_text, on_delta=on_delta, model=model, **options)
+
+
+def print_delta(delta: str) -> None:
+    print(delta, end="", flush=True)
+
+
+def _route(
+    prompt_text: str, latency_target: float | None, timeout: float | None
+) -> tuple[ModelRoute | None, float | None]:
+    """Route the prompt and return the route with the timeout to use."""
+    prompt_tokens = estimate_tokens(prompt_text)
+    route = route_model(
+        prompt_tokens, latency_target=latency_target, timeout=timeout
+    )
+    if route is None:
+        logger.info(
+            "Prompt of about %d tokens fits no model, summarizing in chunks",
+            prompt_tokens,
+        )
+        return None, timeout
+    estimate = route.estimate_latency(prompt_tokens)
+    logger.info(
+        "Routed prompt of about %d tokens to %s (estimated %.1fs)",
+        prompt_tokens,
+        route.model,
+        estimate,
+    )
+    if timeout is None:
+        # Give a slow route the time to answer, even when the default
+        # timeout of the backend is shorter
+        if estimate * ROUTE_TIMEOUT_MARGIN > DEFAULT_TIMEOUT:
+            timeout = estimate * ROUTE_TIMEOUT_MARGIN
+    elif estimate > timeout:
+        logger.warning(
+            "%s is estimated to take %.1fs, longer than the timeout %.1fs",
+            route.model,
+            estimate,
+            timeout,
+        )
+    return route, timeout
+
+
+def _chunk_titles(titles: str) -> list[str]:
+    """Split titles into chunks fitting the longest context of the routes."""
+    # Leave room for the instructions, the previous summary and the answer
+    budget = (
+        max(route.context_tokens for route in MODEL_ROUTES)
+        - estimate_tokens(_build_update_prompt_text("", ""))
+        - 2 * COMPLETION_TOKENS_RESERVE
+    )
+    chunks = []
+    lines: list[str] = []
+    total = 0
+    for line in titles.splitlines():
+        tokens = estimate_tokens(f"{line}\n")
+        if lines and total + tokens > budget:
+            chunks.append("\n".join(lines))
+            lines, total = [], 0
+        lines.append(line)
+        total += tokens
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+def _summarize_in_chunks(
+    previous_summary: str | None,
+    titles: str,
+    *,
+    on_delta: DeltaCallback | None = None,
+    latency_target: float | None = None,
+    **options,
+) -> str:
+    """Summarize the first chunk, then update the summary with the rest.
+
+    Only the final summary is streamed to `on_delta`.
+    """
+    chunks = _chunk_titles(titles)
+    summary = previous_summary
+    for index, chunk in enumerate(chunks):
+        chunk_on_delta = on_delta if index == len(chunks) - 1 else None
+        if summary is None:
+            summary = summarize_titles(
+                chunk,
+                compact=False,
+                on_delta=chunk_on_delta,
+                latency_target=latency_target,
+                **options,
+            )
+        else:
+            summary = update_summary(
+                summary,
+                chunk,
+                on_delta=chunk_on_delta,
+                latency_target=latency_target,
+                **options,
+            )
+    return summary
+
 
+def _summarize(
+    prompt_text: str,
+    *,
+    use_cache: bool,
+    on_delta: DeltaCallback | None = None,
+    on_metrics: MetricsCallback | None = None,
+    model: str = MODEL,
+    timeout: float | None = None,
+    backend: ChatBackend | None = None,
+) -> str:
+    backend = backend or OpenAIModuleBackend()
+    prompts = _build_prompts(prompt_text)
+    recorder = CallRecorder(model, prompt_text)
+    cache = SummaryCache() if use_cache else None
+    if cache is not None:
+        key = summary_cache_key(
+            model, TEMPERATURE, prompt_text, host=backend.host
+        )
+        if (summary := cache.get(key)) is not None:
+            if on_delta is not None:
+                on_delta(summary)
+            _report(recorder.finish(summary, cached=True), on_metrics)
+            return summary
 
-def _build_prompts(titles: str):
-    prompts = [
-        {"role": "user", "content": _build_summarize_prompt_text(titles)}
-    ]
+    with profiling.span("completion", "llm", model=model) as span:
+        response = _complete_chat(
+            prompts,
+            temperature=TEMPERATURE,
+            stream=on_delta is not None,
+            model=model,
+            timeout=timeout,
+            backend=backend,
+        )
+        summary = _parse_response(
+            recorder.observe(response), on_delta=on_delta
+        )
+        span.set(prompt_chars=len(prompt_text), completion_chars=len(summary))
+    _report(recorder.finish(summary), on_metrics)
+    if cache is not None:
+        cache.set(key, summary)
+    return summary
+
+
+def _report(metrics, on_metrics: MetricsCallback | None) -> None:
+    log_metrics(metrics)
+    export_metrics(metrics)
+    if on_metrics is not None:
+        on_metrics(metrics)
+
+
+def _build_prompts(prompt_text: str):
+    prompts = [{"role": "user", "content": prompt_text}]
     return prompts
 
 
@@ -35,14 +373,82 @@ def _build_summarize_prompt_text(titles_as_list: str) -> str:
 """
 
 
-def _complete_chat(prompts, temperature=0.0):
-    return openai.ChatCompletion.create(
-        model=MODEL, messages=prompts, temperature=temperature
+def _build_update_prompt_text(
+    previous_summary: str, new_titles_as_list: str
+) -> str:
+    return f"""\
+以下の「これまでの要約」は、同一人物が書いたブログ記事のタイトルの一覧から、この人物が最近何をやっているかをまとめたものです。
+3つのバッククォートで囲まれた「新しい記事のタイトル」を踏まえて、要約を更新してください。
+応答は更新後の要約のみとし、文ごとに改行して区切ってください。
+
+これまでの要約:
+{previous_summary}
+
+新しい記事のタイトル:
+```
+{new_titles_as_list}
+```
+"""
+
+
+def _complete_chat(
+    prompts,
+    temperature=TEMPERATURE,
+    stream=False,
+    *,
+    model: str = MODEL,
+    timeout: float | None = None,
+    backend: ChatBackend | None = None,
+):
+    backend = backend or OpenAIModuleBackend()
+
+    def create(remaining: float | None):
+        # Cut an attempt short only when the policy sets a deadline
+        attempt_timeout = timeout
+        if remaining is not None:
+            attempt_timeout = (
+                remaining if timeout is None else min(remaining, timeout)
+            )
+        return backend.complete(
+            prompts,
+            model=model,
+            temperature=temperature,
+            stream=stream,
+            timeout=attempt_timeout,
+        )
+
+    # Retrying a completion has no side effect other than its cost
+    return call_with_retry(
+        create,
+        host=backend.host,
+        policy=COMPLETION_RETRY_POLICY,
+        idempotent=True,
     )
 
 
-def _parse_response(response) -> str:
-    return response["choices"][0]["message"]["content"]
+def _parse_response(response, on_delta: DeltaCallback | None = None) -> str:
+    """Return the content of a completion, assembling streamed deltas.
+
+    `response` is either a whole completion or an iterable of streamed
+    chunks. `on_delta` is called with each piece of the content.
+    """
+    if isinstance(response, dict):
+        content = response["choices"][0]["message"]["content"]
+        if on_delta is not None:
+            on_delta(content)
+        return content
+
+    deltas = []
+    for chunk in response:
+        if not chunk["choices"]:
+            continue
+        delta = chunk["choices"][0]["delta"].get("content")
+        if not delta:
+            continue
+        deltas.append(delta)
+        if on_delta is not None:
+            on_delta(delta)
+    return "".join(deltas)
 
 
 def _read_titles(titles_path: str | Path) -> str:
@@ -54,8 +460,13 @@ if __name__ == "__main__":
     import argparse
     import textwrap
 
-    help_message = f"""
-    Summarize a list of blog article titles using the OpenAI API ({MODEL}).
+    from recent_state_summarizer.fetch.cli import (
+        add_profile_arguments,
+        maybe_profiling,
+    )
+
+    help_message = """
+    Summarize a list of blog article titles using the OpenAI API.
     This command prints the summary.
 
     ⚠️ Set `OPENAI_API_KEY` environment variable.
@@ -71,6 +482,64 @@ if __name__ == "__main__":
         "titles_path",
         help="Local file path where the list of titles is saved",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Always call the API instead of reusing a cached summary",
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        default=False,
+        help="Print the summary after the whole response is received",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        default=False,
+        help="Normalize the titles and remove duplicates and repeated "
+        "series labels before sending them (lossy)",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="Keep the newest titles within this number of tokens",
+    )
+    parser.add_argument(
+        "--model",
+        help="Chat model (default: chosen by the size of the prompt)",
+    )
+    parser.add_argument(
+        "--latency-target",
+        type=float,
+        help="Prefer a model expected to answer within this many seconds",
+    )
+    parser.add_argument(
+        "--base-url",
+        help="Base URL of an OpenAI-compatible API "
+        "(e.g. http://localhost:8000/v1 for a local server)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, help="Timeout of an API call in seconds"
+    )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    print(_main(args.titles_path))
+    with maybe_profiling(args):
+        summary = _main(
+            args.titles_path,
+            use_cache=not args.no_cache,
+            on_delta=None if args.no_stream else print_delta,
+            compact=args.compact,
+            token_budget=args.token_budget,
+            model=args.model,
+            latency_target=args.latency_target,
+            timeout=args.timeout,
+            backend=(
+                OpenAICompatibleBackend(args.base_url)
+                if args.base_url
+                else None
+            ),
+        )
+    print(summary if args.no_stream else "")
@@ -0,0 +1,273 @@
+"""Counters and histograms of a run in the Prometheus text format.
+
+Collection is enabled by `collecting()`. Otherwise `inc()` and `observe()`
+do nothing, so that the instrumented code costs almost nothing.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "recent_state_summarizer"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+@dataclass(frozen=True)
+class Family:
+    type: str
+    help: str
+    buckets: tuple[float, ...] = ()
+
+
+FAMILIES = {
+    "http_requests_total": Family(
+        "counter",
+        'HTTP requests of the fetchers (status "error": no response)',
+    ),
+    "http_response_bytes_total": Family(
+        "counter", "Bytes of the HTTP response bodies"
+    ),
+    "http_request_duration_seconds": Family(
+        "histogram", "Latency of the HTTP requests", HTTP_BUCKETS
+    ),
+    "http_throttled_seconds_total": Family(
+        "counter", "Seconds the requests waited for the limits of the host"
+    ),
+    "fetch_records_total": Family("counter", "Titles yielded by the fetchers"),
+    "summary_cache_requests_total": Family(
+        "counter", "Lookups of the summary cache (result: hit or miss)"
+    ),
+    "llm_calls_total": Family(
+        "counter", "Chat completion calls (cached: answered by the cache)"
+    ),
+    "llm_tokens_total": Family(
+        "counter", "Tokens of the chat completions (kind: prompt/completion)"
+    ),
+    "llm_cost_usd_total": Family(
+        "counter", "Estimated cost of the chat completions in USD"
+    ),
+    "llm_call_duration_seconds": Family(
+        "histogram", "Latency of the chat completion calls", LLM_BUCKETS
+    ),
+    "watch_polls_total": Family(
+        "counter", "Polls of the watched sources (result: new/unchanged/error)"
+    ),
+    "watch_new_records_total": Family(
+        "counter", "New entries found by polling the watched sources"
+    ),
+    "serve_coalesced_requests_total": Family(
+        "counter", "Requests served by joining a run of the same request"
+    ),
+    "run_duration_seconds": Family("gauge", "Duration of the last run"),
+    "run_success": Family("gauge", "1 if the last run succeeded, else 0"),
+    "run_last_timestamp_seconds": Family(
+        "gauge", "Unix time when the last run finished"
+    ),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Values of the `FAMILIES` by their labels."""
+
+    def __init__(self) -> None:
+        self._values: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            values = self._values.setdefault(name, {})
+            values[key] = values.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        buckets = FAMILIES[name].buckets
+        key = _labels(labels)
+        with self._lock:
+            # Counts per bucket (the last is +Inf), then the sum
+            histogram = self._histograms.setdefault(name, {}).setdefault(
+                key, [0] * (len(buckets) + 1) + [0.0]
+            )
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[index] += 1
+            histogram[len(buckets)] += 1
+            histogram[-1] += value
+
+    def value(self, name: str, **labels: str) -> float:
+        """Return the value of a counter or gauge (0 if never set)."""
+        with self._lock:
+            return self._values.get(name, {}).get(_labels(labels), 0)
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, family in FAMILIES.items():
+                if name in self._values:
+                    samples = [
+                        _sample(name, labels, value)
+                        for labels, value in sorted(self._values[name].items())
+                    ]
+                elif name in self._histograms:
+                    samples = [
+                        sample
+                        for labels, histogram in sorted(
+                            self._histograms[name].items()
+                        )
+                        for sample in _histogram_samples(
+                            name, family.buckets, labels, histogram
+                        )
+                    ]
+                else:
+                    continue
+                lines.append(f"# HELP {NAMESPACE}_{name} {family.help}")
+                lines.append(f"# TYPE {NAMESPACE}_{name} {family.type}")
+                lines.extend(samples)
+        return "".join(f"{line}\n" for line in lines)
+
+    def write_textfile(self, path: str | Path) -> None:
+        """Save the metrics for the textfile collector of node_exporter.
+
+        The file is replaced at once, so that it is never read half-written.
+        """
+        path = Path(path)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(self.render(), encoding="utf8")
+        os.replace(temp_path, path)
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _sample(name: str, labels: Labels, value: float) -> str:
+    label_text = ",".join(f'{key}="{_escape(text)}"' for key, text in labels)
+    if label_text:
+        label_text = f"{{{label_text}}}"
+    return f"{NAMESPACE}_{name}{label_text} {_format(value)}"
+
+
+def _histogram_samples(
+    name: str,
+    buckets: tuple[float, ...],
+    labels: Labels,
+    histogram: list[float],
+) -> Iterator[str]:
+    bounds = [_format(bound) for bound in buckets] + ["+Inf"]
+    for bound, count in zip(bounds, histogram):
+        yield _sample(f"{name}_bucket", labels + (("le", bound),), count)
+    yield _sample(f"{name}_sum", labels, histogram[-1])
+    yield _sample(f"{name}_count", labels, histogram[len(buckets)])
+
+
+_registry: MetricsRegistry | None = None
+
+
+def inc(name: str, amount: float = 1, **labels: str) -> None:
+    """Increase a counter of the active registry, if any."""
+    if _registry is not None:
+        _registry.inc(name, amount, **labels)
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Add a value to a histogram of the active registry, if any."""
+    if _registry is not None:
+        _registry.observe(name, value, **labels)
+
+
+def write_textfile(path: str | Path) -> None:
+    """Save the metrics collected so far, if collecting."""
+    if _registry is not None:
+        _registry.write_textfile(path)
+
+
+def serve_metrics(
+    registry: MetricsRegistry, port: int, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """Expose the metrics at http://host:port/metrics from a thread.
+
+    Call `shutdown()` of the returned server to stop it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(
+        "Serving metrics at http://%s:%d/metrics", *server.server_address
+    )
+    return server
+
+
+@contextmanager
+def collecting(
+    textfile: str | Path | None = None, *, port: int | None = None
+) -> Iterator[MetricsRegistry]:
+    """Collect the metrics of the block.
+
+    The metrics are served on `port` during the block, and saved to
+    `textfile` at the end with the duration and the outcome of the run.
+    """
+    global _registry
+
+    registry = MetricsRegistry()
+    server = None if port is None else serve_metrics(registry, port)
+    _registry = registry
+    started_at = time.perf_counter()
+    succeeded = False
+    try:
+        yield registry
+        succeeded = True
+    finally:
+        _registry = None
+        registry.set("run_duration_seconds", time.perf_counter() - started_at)
+        registry.set("run_success", int(succeeded))
+        registry.set("run_last_timestamp_seconds", time.time())
+        if textfile is not None:
+            registry.write_textfile(textfile)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,8 @@
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens without a tokenizer.
+
+    ASCII text is counted as 4 characters per token, and any other character
+    (e.g. Japanese) as one token.
+    """
+    ascii_chars = sum(1 for char in text if char.isascii())
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
@@ -0,0 +1,217 @@
+"""Poll many sources on a schedule in one long-running process.
+
+Sources are listed in a JSON config:
+
+    {
+      "jitter": 0.1,
+      "sources": [
+        {
+          "url": "https://awesome.hatenablog.com/archive",
+          "output": "awesome.jsonl",
+          "interval": 3600,
+          "summary": "awesome-summary.txt"
+        }
+      ]
+    }
+
+New entries (by URL) are appended to `output` as JSON Lines. With
+`summary`, the summary of the source is updated there when it has new
+entries. Relative paths are relative to the config file.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.fetch import client
+from recent_state_summarizer.fetch.registry import get_fetcher
+from recent_state_summarizer.fetch.types import TitleTag
+from recent_state_summarizer.incremental import summarize_incrementally
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 60 * 60
+DEFAULT_JITTER = 0.1
+
+
+@dataclass(frozen=True)
+class WatchedSource:
+    """A source to fetch every `interval` seconds.
+
+    With `days`, only the entries of the recent days are fetched.
+    """
+
+    url: str
+    output: Path
+    interval: float = DEFAULT_INTERVAL
+    summary: Path | None = None
+    days: int | None = None
+
+
+@dataclass(frozen=True)
+class WatchConfig:
+    sources: list[WatchedSource]
+    jitter: float = DEFAULT_JITTER
+
+
+def load_config(path: str | Path) -> WatchConfig:
+    """Read the config.
+
+    Raises:
+        ValueError: If a source has no `url` or `output`
+    """
+    path = Path(path)
+    with open(path, encoding="utf8") as f:
+        config = json.load(f)
+
+    sources = []
+    for index, source in enumerate(config.get("sources", [])):
+        if "url" not in source or "output" not in source:
+            raise ValueError(f"Source #{index} needs `url` and `output`")
+        summary = source.get("summary")
+        sources.append(
+            WatchedSource(
+                url=source["url"],
+                output=path.parent / source["output"],
+                interval=float(source.get("interval", DEFAULT_INTERVAL)),
+                summary=None if summary is None else path.parent / summary,
+                days=source.get("days"),
+            )
+        )
+    return WatchConfig(sources, float(config.get("jitter", DEFAULT_JITTER)))
+
+
+def _read_entries(path: Path) -> list[TitleTag]:
+    try:
+        with open(path, encoding="utf8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+class Watcher:
+    """Fetch each source when it is due and keep its new entries.
+
+    Each interval is stretched or shrunk at random by up to `jitter`
+    (a ratio), and the first fetches are spread over `jitter` of the
+    interval, so that sources with the same interval do not fire at once.
+    Responses are revalidated with conditional GETs over the pooled
+    connections of the shared client.
+    """
+
+    def __init__(
+        self,
+        sources: list[WatchedSource],
+        *,
+        jitter: float = DEFAULT_JITTER,
+        summarize: Callable[[str, str], str] = summarize_incrementally,
+        on_poll: Callable[[], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.sources = sources
+        self.jitter = jitter
+        self._summarize = summarize
+        self._on_poll = on_poll
+        self._clock = clock
+        self._rng = rng or random.Random()
+        # URLs of the entries kept in each output
+        self._seen = {
+            source.output: {
+                entry["url"] for entry in _read_entries(source.output)
+            }
+            for source in sources
+        }
+        self._response_cache = client.ResponseCache()
+        now = clock()
+        self._queue = [
+            (now + self._rng.uniform(0, source.interval * jitter), index)
+            for index, source in enumerate(sources)
+        ]
+        heapq.heapify(self._queue)
+
+    def next_interval(self, source: WatchedSource) -> float:
+        return source.interval * (
+            1 + self._rng.uniform(-self.jitter, self.jitter)
+        )
+
+    def poll(self, source: WatchedSource) -> list[TitleTag]:
+        """Fetch the source, append its new entries and return them."""
+        fetcher = get_fetcher(source.url)
+        kwargs = {} if source.days is None else {"days": source.days}
+        with client.conditional_requests(self._response_cache):
+            entries = list(fetcher(source.url, **kwargs))
+
+        seen = self._seen[source.output]
+        new_entries = [entry for entry in entries if entry["url"] not in seen]
+        if not new_entries:
+            return []
+        source.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(source.output, "a", encoding="utf8") as f:
+            for entry in new_entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        seen.update(entry["url"] for entry in new_entries)
+        logger.info("%d new entries from %s", len(new_entries), source.url)
+
+        if source.summary is not None:
+            # Newest first, so that trimming to a token budget drops the
+            # oldest: the entries listed now in the order of the source,
+            # then the ones kept before, last appended first
+            listed = {entry["url"] for entry in entries}
+            older = [
+                entry
+                for entry in reversed(_read_entries(source.output))
+                if entry["url"] not in listed
+            ]
+            titles = "\n".join(
+                f"- {entry['title']}" for entry in [*entries, *older]
+            )
+            source.summary.write_text(
+                self._summarize(source.url, titles), encoding="utf8"
+            )
+        return new_entries
+
+    def run_pending(self) -> float:
+        """Poll the due sources and return the seconds until the next."""
+        while self._queue and self._queue[0][0] <= self._clock():
+            _, index = heapq.heappop(self._queue)
+            source = self.sources[index]
+            try:
+                new_entries = self.poll(source)
+            except Exception:
+                # Keep watching the other sources
+                logger.exception("Failed to poll %s", source.url)
+                telemetry.inc("watch_polls_total", result="error")
+            else:
+                telemetry.inc(
+                    "watch_polls_total",
+                    result="new" if new_entries else "unchanged",
+                )
+                telemetry.inc("watch_new_records_total", len(new_entries))
+            heapq.heappush(
+                self._queue,
+                (self._clock() + self.next_interval(source), index),
+            )
+            if self._on_poll is not None:
+                self._on_poll()
+        if not self._queue:
+            return float("inf")
+        return max(self._queue[0][0] - self._clock(), 0.0)
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Watch until `stop` is set (or forever)."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            delay = self.run_pending()
+            if delay == float("inf"):
+                return
+            stop.wait(delay)
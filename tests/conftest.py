@@ -0,0 +1,70 @@
+import pytest
+
+from recent_state_summarizer.cache import CACHE_DIR_ENV
+from recent_state_summarizer.fetch.politeness import scheduler
+from recent_state_summarizer.incremental import STATE_DIR_ENV
+from recent_state_summarizer.retry import circuit_breaker
+
+
+@pytest.fixture(autouse=True)
+def summary_cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "summary-cache"
+    monkeypatch.setenv(CACHE_DIR_ENV, str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def summary_state_dir(tmp_path, monkeypatch):
+    state_dir = tmp_path / "summary-state"
+    monkeypatch.setenv(STATE_DIR_ENV, str(state_dir))
+    return state_dir
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breaker():
+    yield
+    circuit_breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_host_scheduler():
+    yield
+    scheduler.reset()
+
+
+class FakeClock:
+    """Clock returning `times` in turn if given, otherwise `now`.
+
+    `sleep()` advances `now` without waiting.
+    """
+
+    def __init__(self, *times, now=0.0):
+        self.times = list(times)
+        self.now = now
+
+    def __call__(self):
+        if self.times:
+            return self.times.pop(0)
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def build_response(content):
+    return {
+        "choices": [{"message": {"role": "assistant", "content": content}}]
+    }
+
+
+def build_chunk(content=None, *, usage=None):
+    # The usage comes in a last chunk without choices
+    if usage is not None:
+        return {"choices": [], "usage": usage}
+    delta = {} if content is None else {"content": content}
+    return {"choices": [{"index": 0, "delta": delta}]}
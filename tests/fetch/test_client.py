@@ -0,0 +1,176 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import respx
+
+from recent_state_summarizer import profiling
+from recent_state_summarizer.fetch import client
+from recent_state_summarizer.retry import RetryPolicy
+
+URL = "https://example.hatenablog.com/archive/2025"
+NO_WAIT = RetryPolicy(base_delay=0.0)
+
+
+class TestGet:
+    @respx.mock
+    def test_retries_server_error(self):
+        route = respx.get(URL).mock(
+            side_effect=[httpx.Response(503), httpx.Response(200, text="ok")]
+        )
+
+        response = client.get(URL, policy=NO_WAIT)
+
+        assert response.text == "ok"
+        assert route.call_count == 2
+
+    @respx.mock
+    def test_retries_timeout(self):
+        route = respx.get(URL).mock(
+            side_effect=[
+                httpx.ReadTimeout("timed out"),
+                httpx.Response(200, text="ok"),
+            ]
+        )
+
+        response = client.get(URL, policy=NO_WAIT)
+
+        assert response.text == "ok"
+        assert route.call_count == 2
+
+    @respx.mock
+    def test_returns_last_error_response(self):
+        route = respx.get(URL).mock(return_value=httpx.Response(502))
+
+        response = client.get(URL, policy=NO_WAIT)
+
+        assert response.status_code == 502
+        assert route.call_count == NO_WAIT.max_attempts
+        with pytest.raises(httpx.HTTPStatusError):
+            response.raise_for_status()
+
+    @respx.mock
+    def test_does_not_retry_not_found(self):
+        route = respx.get(URL).mock(return_value=httpx.Response(404))
+
+        response = client.get(URL, policy=NO_WAIT)
+
+        assert response.status_code == 404
+        assert route.call_count == 1
+
+    @respx.mock
+    def test_raises_connection_error_when_exhausted(self):
+        respx.get(URL).mock(side_effect=httpx.ConnectError("refused"))
+
+        with pytest.raises(httpx.ConnectError):
+            client.get(URL, policy=NO_WAIT)
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}/archive"
+    server.shutdown()
+    server.server_close()
+
+
+def test_traces_phases_tagged_with_fetcher_and_page(local_url):
+    def fetch_pages():
+        for _ in range(2):
+            yield client.get(local_url).text
+
+    with profiling.profiling(None, stream=io.StringIO()) as profiler:
+        assert list(client.tag_requests(fetch_pages(), "example")) == [
+            "ok",
+            "ok",
+        ]
+
+    https = [span for span in profiler.spans if span.name == "http"]
+    assert [(span.args["fetcher"], span.args["page"]) for span in https] == [
+        ("example", 1),
+        ("example", 2),
+    ]
+    # The connection of the first page is reused for the second
+    assert [span.args["new_connection"] for span in https] == [True, False]
+    phases = [
+        span.name for span in profiler.spans if span.category == "http.phase"
+    ]
+    assert phases == [
+        "connect",
+        "send",
+        "send",
+        "wait",
+        "receive",
+        "send",
+        "send",
+        "wait",
+        "receive",
+    ]
+    first = https[0]
+    assert first.self_duration < first.duration
+
+
+def test_no_tracing_without_profiling(local_url):
+    response = client.get(local_url)
+
+    assert "trace" not in response.request.extensions
+
+
+def test_response_cache_drops_least_recently_used():
+    cache = client.ResponseCache(max_bytes=10)
+
+    def response(content):
+        return httpx.Response(200, content=content, headers={"ETag": '"v"'})
+
+    cache.update("a", response(b"aaaa"))
+    cache.update("b", response(b"bbbb"))
+    cache.conditional_headers("a")
+    cache.update("c", response(b"cccc"))
+    cache.update("d", response(b"d" * 11))
+
+    assert cache.conditional_headers("a") == {"If-None-Match": '"v"'}
+    assert cache.conditional_headers("b") == {}
+    assert cache.conditional_headers("c") == {"If-None-Match": '"v"'}
+    assert cache.conditional_headers("d") == {}
+
+
+@respx.mock
+def test_conditional_requests_reuse_not_modified_response():
+    route = respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(
+                200,
+                text="ok",
+                headers={"Last-Modified": "Wed, 01 Jul 2026 00:00:00 GMT"},
+            ),
+            httpx.Response(304),
+        ]
+    )
+
+    with client.conditional_requests():
+        first = client.get(URL)
+        second = client.get(URL)
+
+    assert (first.status_code, second.status_code) == (200, 200)
+    assert second.text == "ok"
+    assert (
+        route.calls[1].request.headers["if-modified-since"]
+        == "Wed, 01 Jul 2026 00:00:00 GMT"
+    )
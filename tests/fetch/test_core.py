@@ -47,6 +47,7 @@ class TestCli:
             "output.jsonl",
             save_as_title_list=False,
             days=None,
+            limit=None,
         )
 
     def test_as_title_list(self, fetch_main, monkeypatch):
@@ -67,6 +68,7 @@ class TestCli:
             "output.txt",
             save_as_title_list=True,
             days=None,
+            limit=None,
         )
 
     def test_github_blog_sub_command(self, fetch_main, monkeypatch):
@@ -86,6 +88,7 @@ class TestCli:
             "output.jsonl",
             save_as_title_list=False,
             days=RECENT_DAYS,
+            limit=None,
         )
 
     def test_github_blog_sub_command_days(self, fetch_main, monkeypatch):
@@ -107,6 +110,7 @@ class TestCli:
             "output.jsonl",
             save_as_title_list=False,
             days=45,
+            limit=None,
         )
 
 
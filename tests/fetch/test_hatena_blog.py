@@ -1,3 +1,5 @@
+from datetime import date, timedelta
+
 import respx
 from httpx import Response
 
@@ -193,3 +195,74 @@ def test_fetch_multiple_archive_page(tmp_path):
 - Title 2
 - Title 1"""
     assert (tmp_path / "titles.txt").read_text(encoding="utf8") == expected
+
+
+@respx.mock
+def test_fetch_stops_past_recent_days(tmp_path):
+    base_url = "https://example.hatenablog.com"
+    today = date.today()
+
+    def entry(days_ago, title):
+        day = today - timedelta(days=days_ago)
+        return f"""\
+<section class="archive-entry">
+  <div class="date archive-date">
+    <a href="{base_url}/archive/{day:%Y/%m/%d}">
+      <time datetime="{day.isoformat()}" title="{day.isoformat()}">{day}</time>
+    </a>
+  </div>
+  <a class="entry-title-link" href="{base_url}/entry/{title}">{title}</a>
+</section>"""
+
+    archive = respx.get(f"{base_url}/archive").mock(
+        return_value=Response(
+            200,
+            text=f"""\
+<html><body>
+{entry(1, "Recent")}
+{entry(40, "Old")}
+<a class="test-pager-next" href="{base_url}/archive?page=2">Next</a>
+</body></html>""",
+        )
+    )
+
+    _main(
+        f"{base_url}/archive",
+        tmp_path / "titles.txt",
+        save_as_title_list=True,
+        days=30,
+    )
+
+    assert (tmp_path / "titles.txt").read_text(encoding="utf8") == "- Recent"
+    assert archive.call_count == 1
+
+
+@respx.mock
+def test_fetch_stops_at_limit(tmp_path):
+    base_url = "https://example.hatenablog.com"
+    next_page = respx.get(f"{base_url}/archive/page/2").mock(
+        return_value=Response(200, text="<html><body></body></html>")
+    )
+    respx.get(f"{base_url}/archive").mock(
+        return_value=Response(
+            200,
+            text=f"""\
+<html><body>
+<a class="entry-title-link" href="{base_url}/entry/3">Title 3</a>
+<a class="entry-title-link" href="{base_url}/entry/2">Title 2</a>
+<a class="entry-title-link" href="{base_url}/entry/1">Title 1</a>
+<a class="test-pager-next" href="{base_url}/archive/page/2">Next</a>
+</body></html>""",
+        )
+    )
+
+    _main(
+        f"{base_url}/archive",
+        tmp_path / "titles.txt",
+        save_as_title_list=True,
+        limit=2,
+    )
+
+    expected = "- Title 3\n- Title 2"
+    assert (tmp_path / "titles.txt").read_text(encoding="utf8") == expected
+    assert not next_page.called
@@ -1,3 +1,6 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
 import httpx
 import respx
 
@@ -41,3 +44,30 @@ class TestNoteRSS:
         assert result[0]["url"] == "https://note.com/ftnext/n/n1234567890ab"
         assert result[1]["title"] == "noteの記事タイトル2"
         assert result[1]["url"] == "https://note.com/ftnext/n/ncdef01234567"
+
+    @respx.mock
+    def test_fetch_note_rss_recent_days(self):
+        now = datetime.now(timezone.utc)
+        rss_feed = f"""\
+<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+  <channel>
+    <item>
+      <title>最近の記事</title>
+      <link>https://note.com/ftnext/n/recent</link>
+      <pubDate>{format_datetime(now - timedelta(days=1))}</pubDate>
+    </item>
+    <item>
+      <title>古い記事</title>
+      <link>https://note.com/ftnext/n/old</link>
+      <pubDate>{format_datetime(now - timedelta(days=40))}</pubDate>
+    </item>
+  </channel>
+</rss>"""
+        respx.get("https://note.com/ftnext/rss").mock(
+            return_value=httpx.Response(200, content=rss_feed.encode())
+        )
+
+        result = list(fetch_note_rss("https://note.com/ftnext/rss", days=30))
+
+        assert [entry["title"] for entry in result] == ["最近の記事"]
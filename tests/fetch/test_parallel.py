@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import pytest
+import respx
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.fetch import politeness
+from recent_state_summarizer.fetch.parallel import fetch_many
+from recent_state_summarizer.fetch.registry import (
+    get_fetcher,
+    get_fetcher_limits,
+)
+
+
+def archive_page(base_url, numbers, next_url=None):
+    entries = "\n".join(
+        f'<a class="entry-title-link" href="{base_url}/entry/{number}">'
+        f"Title {number}</a>"
+        for number in numbers
+    )
+    pager = (
+        f'<a class="test-pager-next" href="{next_url}">Next</a>'
+        if next_url
+        else ""
+    )
+    return f"<html><body>{entries}{pager}</body></html>"
+
+
+@pytest.fixture
+def archives():
+    first = "https://first.hatenablog.com"
+    second = "https://second.hatenablog.com"
+    with respx.mock:
+        respx.get(f"{first}/archive").mock(
+            return_value=httpx.Response(
+                200,
+                text=archive_page(first, [5, 4, 3], f"{first}/archive/page/2"),
+            )
+        )
+        respx.get(f"{first}/archive/page/2").mock(
+            return_value=httpx.Response(200, text=archive_page(first, [2, 1]))
+        )
+        respx.get(f"{second}/archive").mock(
+            return_value=httpx.Response(200, text=archive_page(second, [1]))
+        )
+        yield [f"{first}/archive", f"{second}/archive"]
+
+
+def test_fetch_many_in_order_of_urls_and_pages(archives):
+    with ProcessPoolExecutor(2) as executor:
+        results = list(fetch_many(archives, executor=executor))
+
+    assert [url for url, _ in results] == archives
+    assert [title_tag["title"] for title_tag in results[0][1]] == [
+        "Title 5",
+        "Title 4",
+        "Title 3",
+        "Title 2",
+        "Title 1",
+    ]
+    # Same titles as the fetchers parsing in this process
+    for url, title_tags in results:
+        assert title_tags == list(get_fetcher(url)(url))
+
+
+def test_fetch_many_counts_records(archives):
+    with telemetry.collecting() as registry:
+        with ProcessPoolExecutor(2) as executor:
+            for _ in fetch_many(archives, executor=executor):
+                pass
+
+    assert registry.value("fetch_records_total", fetcher="hatena_blog") == 6
+
+
+def test_fetch_many_downloads_within_fetcher_limits(archives, monkeypatch):
+    slots = []
+    slot = politeness.scheduler.slot
+
+    def recording_slot(url, limits=politeness.DEFAULT_LIMITS):
+        slots.append((url, limits))
+        return slot(url, limits)
+
+    monkeypatch.setattr(politeness.scheduler, "slot", recording_slot)
+
+    with ProcessPoolExecutor(2) as executor:
+        for _ in fetch_many(archives, executor=executor):
+            pass
+
+    assert len(slots) == 3
+    assert {limits for _, limits in slots} == {get_fetcher_limits(archives[0])}
+    assert get_fetcher_limits(archives[0]).group == "hatenablog"
+
+
+@respx.mock
+def test_unsupported_url_fails_before_fetching():
+    route = respx.get("https://first.hatenablog.com/archive")
+
+    with pytest.raises(ValueError, match="Unsupported URL"):
+        list(
+            fetch_many(
+                [
+                    "https://first.hatenablog.com/archive",
+                    "https://example.com/unknown",
+                ]
+            )
+        )
+
+    assert not route.called
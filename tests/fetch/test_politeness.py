@@ -0,0 +1,163 @@
+import threading
+import time
+
+import httpx
+import respx
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.fetch import client
+from recent_state_summarizer.fetch.politeness import (
+    HostLimits,
+    HostScheduler,
+    RobotsCache,
+)
+
+
+class InFlight:
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+def run_requests(scheduler, urls, limits, in_flight):
+    def request(url):
+        with scheduler.slot(url, limits), in_flight[url]:
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=request, args=(url,)) for url in urls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_max_in_flight_per_host():
+    scheduler = HostScheduler()
+    a, b = InFlight(), InFlight()
+    urls = ["https://a.example.com/"] * 4 + ["https://b.example.com/"] * 4
+
+    run_requests(
+        scheduler,
+        urls,
+        HostLimits(max_in_flight=2),
+        {"https://a.example.com/": a, "https://b.example.com/": b},
+    )
+
+    assert a.peak == 2
+    assert b.peak == 2
+
+
+def test_global_limit():
+    scheduler = HostScheduler(global_limit=1)
+    total = InFlight()
+    urls = ["https://a.example.com/", "https://b.example.com/"] * 2
+
+    run_requests(
+        scheduler,
+        urls,
+        HostLimits(max_in_flight=2),
+        dict.fromkeys(urls, total),
+    )
+
+    assert total.peak == 1
+
+
+def test_group_shares_limits_among_hosts():
+    scheduler = HostScheduler()
+    total = InFlight()
+    urls = ["https://a.hatenablog.com/", "https://b.hatenablog.com/"] * 2
+
+    run_requests(
+        scheduler,
+        urls,
+        HostLimits(max_in_flight=1, group="hatenablog"),
+        dict.fromkeys(urls, total),
+    )
+
+    assert total.peak == 1
+
+
+def test_min_delay_between_requests_to_host():
+    scheduler = HostScheduler()
+    limits = HostLimits(min_delay=0.1)
+    started = []
+
+    with telemetry.collecting() as registry:
+        for url in [
+            "https://a.example.com/1",
+            "https://b.example.com/1",
+            "https://a.example.com/2",
+        ]:
+            with scheduler.slot(url, limits):
+                started.append(time.monotonic())
+
+    # Other hosts are not delayed
+    assert started[1] - started[0] < 0.05
+    assert started[2] - started[0] >= 0.1
+    assert (
+        registry.value("http_throttled_seconds_total", host="a.example.com")
+        > 0
+    )
+
+
+def test_crawl_delay_of_robots():
+    read = []
+
+    def read_robots(url):
+        read.append(url)
+        return "User-agent: *\nCrawl-delay: 2\n"
+
+    robots = RobotsCache(read_robots)
+
+    assert robots.crawl_delay("https://a.example.com/archive") == 2.0
+    assert robots.crawl_delay("https://a.example.com/archive?page=2") == 2.0
+    assert read == ["https://a.example.com/robots.txt"]
+
+
+def test_robots_read_only_when_respected():
+    read = []
+    scheduler = HostScheduler(robots=RobotsCache(lambda url: read.append(url)))
+
+    with scheduler.slot("https://a.example.com/", HostLimits()):
+        pass
+    with scheduler.slot(
+        "https://b.example.com/", HostLimits(respect_robots=True)
+    ):
+        pass
+
+    assert read == ["https://b.example.com/robots.txt"]
+
+
+def test_robots_without_crawl_delay():
+    robots = RobotsCache(lambda url: None)
+
+    assert robots.crawl_delay("https://a.example.com/archive") is None
+
+
+@respx.mock
+def test_fetcher_requests_use_its_limits():
+    respx.get("https://a.example.com/").mock(
+        return_value=httpx.Response(200, text="ok")
+    )
+    limits = HostLimits(min_delay=0.1)
+
+    def fetch():
+        for _ in range(2):
+            yield client.get("https://a.example.com/").text
+
+    started_at = time.monotonic()
+    assert list(client.tag_requests(fetch(), "example", limits)) == [
+        "ok",
+        "ok",
+    ]
+    assert time.monotonic() - started_at >= 0.1
@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta, timezone
+
 import httpx
 import respx
 
@@ -42,3 +44,32 @@ class TestQiitaAPI:
         assert result[0]["url"] == "https://qiita.com/ftnext/items/abc123"
         assert result[1]["title"] == "Sample Qiita API Article 2"
         assert result[1]["url"] == "https://qiita.com/ftnext/items/def456"
+
+    @respx.mock
+    def test_fetch_qiita_api_recent_days(self):
+        now = datetime.now(timezone.utc)
+        respx.get("https://qiita.com/api/v2/users/ftnext/items").mock(
+            return_value=httpx.Response(
+                status_code=200,
+                json=[
+                    {
+                        "title": "Recent",
+                        "url": "https://qiita.com/ftnext/items/recent",
+                        "created_at": (now - timedelta(days=1)).isoformat(),
+                    },
+                    {
+                        "title": "Old",
+                        "url": "https://qiita.com/ftnext/items/old",
+                        "created_at": (now - timedelta(days=40)).isoformat(),
+                    },
+                ],
+            )
+        )
+
+        result = list(
+            fetch_qiita_api(
+                "https://qiita.com/api/v2/users/ftnext/items", days=30
+            )
+        )
+
+        assert [item["title"] for item in result] == ["Recent"]
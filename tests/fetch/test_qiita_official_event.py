@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta, timezone
+
 import httpx
 import respx
 
@@ -132,3 +134,30 @@ def test_fetch_qiita_official_event_with_fragment(tmp_path):
 
     expected = "- さくらのAI Engineを試す"
     assert (tmp_path / "titles.txt").read_text(encoding="utf8") == expected
+
+
+@respx.mock
+def test_fetch_qiita_official_event_stops_past_recent_days(tmp_path):
+    now = datetime.now(timezone.utc)
+    old = (now - timedelta(days=40)).isoformat()
+    recent = (now - timedelta(days=1)).isoformat()
+    first_page = build_html_response(
+        [("最近の記事", "https://qiita.com/user1/items/recent")], next_page=2
+    ).replace('"linkUrl"', f'"publishedAt": "{recent}", "linkUrl"')
+    second_page = build_html_response(
+        [("古い記事", "https://qiita.com/user2/items/old")], next_page=3
+    ).replace('"linkUrl"', f'"publishedAt": "{old}", "linkUrl"')
+    respx.get(EVENT_URL, params={"page": 1}).mock(
+        return_value=httpx.Response(200, text=first_page)
+    )
+    respx.get(EVENT_URL, params={"page": 2}).mock(
+        return_value=httpx.Response(200, text=second_page)
+    )
+    third_page = respx.get(EVENT_URL, params={"page": 3})
+
+    _main(EVENT_URL, tmp_path / "titles.txt", save_as_title_list=True, days=30)
+
+    assert (tmp_path / "titles.txt").read_text(
+        encoding="utf8"
+    ) == "- 最近の記事"
+    assert not third_page.called
@@ -1,4 +1,5 @@
 import json
+from datetime import datetime, timedelta, timezone
 
 import httpx
 import respx
@@ -103,3 +104,44 @@ def test_fetch_zenn_contest_with_tab_query(tmp_path):
 
     expected = "- OpenTelemetry入門"
     assert (tmp_path / "titles.txt").read_text(encoding="utf8") == expected
+
+
+@respx.mock
+def test_fetch_zenn_contest_stops_past_recent_days(tmp_path):
+    now = datetime.now(timezone.utc)
+    respx.get(
+        ARTICLES_API_URL,
+        params={"contest_slug": CONTEST_SLUG, "order": "latest", "page": 1},
+    ).mock(
+        return_value=httpx.Response(
+            200,
+            json={
+                "articles": [
+                    {
+                        "title": "最近の記事",
+                        "path": "/user1/articles/recent",
+                        "published_at": (now - timedelta(days=1)).isoformat(),
+                    },
+                    {
+                        "title": "古い記事",
+                        "path": "/user2/articles/old",
+                        "published_at": (now - timedelta(days=40)).isoformat(),
+                    },
+                ],
+                "next_page": 2,
+            },
+        )
+    )
+    second_page = respx.get(
+        ARTICLES_API_URL,
+        params={"contest_slug": CONTEST_SLUG, "order": "latest", "page": 2},
+    )
+
+    _main(
+        CONTEST_URL, tmp_path / "titles.txt", save_as_title_list=True, days=30
+    )
+
+    assert (tmp_path / "titles.txt").read_text(
+        encoding="utf8"
+    ) == "- 最近の記事"
+    assert not second_page.called
@@ -0,0 +1,157 @@
+import json
+
+import httpx
+import pytest
+
+from recent_state_summarizer.backends import OpenAICompatibleBackend
+from recent_state_summarizer.retry import (
+    RetryPolicy,
+    TransientError,
+    call_with_retry,
+)
+from recent_state_summarizer.summarize import summarize_titles
+
+
+class StubServer:
+    """In-process OpenAI-compatible chat completions endpoint."""
+
+    def __init__(self, responses=None):
+        self.requests = []
+        self.responses = list(responses or [])
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.responses:
+            return self.responses.pop(0)
+        body = json.loads(request.content)
+        content = f"summary by {body['model']}"
+        if body.get("stream"):
+            events = [
+                {"choices": [{"delta": {"content": content[:7]}}]},
+                {"choices": [{"delta": {"content": content[7:]}}]},
+                {
+                    "choices": [],
+                    "usage": {"prompt_tokens": 3, "completion_tokens": 2},
+                },
+            ]
+            lines = [f"data: {json.dumps(event)}\n\n" for event in events]
+            return httpx.Response(
+                200,
+                text="".join(lines) + "data: [DONE]\n\n",
+                headers={"content-type": "text/event-stream"},
+            )
+        return httpx.Response(
+            200,
+            json={
+                "choices": [{"message": {"content": content}}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 2},
+            },
+        )
+
+
+@pytest.fixture
+def server():
+    return StubServer()
+
+
+@pytest.fixture
+def backend(server):
+    backend = OpenAICompatibleBackend(
+        "http://localhost:8000/v1",
+        api_key="sk-test",
+        transport=httpx.MockTransport(server),
+    )
+    yield backend
+    backend.close()
+
+
+def test_complete(backend, server):
+    response = backend.complete(
+        [{"role": "user", "content": "hi"}],
+        model="local-model",
+        temperature=0.0,
+        timeout=3.0,
+    )
+
+    assert response["choices"][0]["message"]["content"] == (
+        "summary by local-model"
+    )
+    request = server.requests[0]
+    assert request.url == "http://localhost:8000/v1/chat/completions"
+    assert request.headers["authorization"] == "Bearer sk-test"
+    assert request.extensions["timeout"]["read"] == 3.0
+    assert json.loads(request.content) == {
+        "model": "local-model",
+        "messages": [{"role": "user", "content": "hi"}],
+        "temperature": 0.0,
+    }
+
+
+def test_complete_stream(backend):
+    chunks = list(
+        backend.complete(
+            [{"role": "user", "content": "hi"}],
+            model="local-model",
+            temperature=0.0,
+            stream=True,
+        )
+    )
+
+    assert [chunk["choices"] for chunk in chunks][:2] == [
+        [{"delta": {"content": "summary"}}],
+        [{"delta": {"content": " by local-model"}}],
+    ]
+    assert chunks[-1]["usage"] == {"prompt_tokens": 3, "completion_tokens": 2}
+
+
+def test_raises_transient_error_on_server_error(server, backend):
+    server.responses.append(httpx.Response(503, headers={"retry-after": "2"}))
+
+    with pytest.raises(TransientError) as excinfo:
+        backend.complete([], model="local-model", temperature=0.0)
+
+    assert excinfo.value.retry_after == 2.0
+
+
+def test_raises_status_error_when_retries_are_exhausted(server, backend):
+    server.responses.extend([httpx.Response(503)] * 2)
+
+    with pytest.raises(httpx.HTTPStatusError) as excinfo:
+        call_with_retry(
+            lambda timeout: backend.complete(
+                [], model="local-model", temperature=0.0, timeout=timeout
+            ),
+            host=backend.host,
+            policy=RetryPolicy(max_attempts=2, base_delay=0.0, deadline=None),
+        )
+
+    assert excinfo.value.response.status_code == 503
+
+
+def test_raises_client_error(server, backend):
+    server.responses.append(httpx.Response(400))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        backend.complete([], model="local-model", temperature=0.0)
+
+
+def test_summarize_titles_with_backend(server, backend):
+    server.responses.append(httpx.Response(500))
+    deltas = []
+    metrics = []
+
+    summary = summarize_titles(
+        "- title",
+        model="local-model",
+        timeout=5.0,
+        backend=backend,
+        on_delta=deltas.append,
+        on_metrics=metrics.append,
+    )
+
+    assert summary == "summary by local-model"
+    assert "".join(deltas) == summary
+    assert metrics[0].model == "local-model"
+    assert metrics[0].prompt_tokens == 3
+    # Retried on the same pooled client after the server error
+    assert len(server.requests) == 2
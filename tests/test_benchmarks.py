@@ -0,0 +1,55 @@
+import json
+
+from benchmarks import scaling
+from benchmarks.run import build_benchmarks, main
+from benchmarks.synthetic import ENTRIES_PER_PAGE
+
+EXPECTED_ITEMS = {
+    "hatena_blog._parse_titles": 50,
+    "qiita_advent_calendar._parse_titles": 25,
+    "adventar._parse_titles": 25,
+    "qiita_official_event._parse_paginated_articles": 100,
+    "hatena_bookmark.fetch_hatena_bookmark_rss": 1000,
+    "github_changelog.fetch_github_changelog": 10,
+    "zenn_rss.fetch_zenn_rss": 100,
+}
+
+
+def test_fixtures_are_parsed():
+    assert {
+        benchmark.name: benchmark.func() for benchmark in build_benchmarks()
+    } == EXPECTED_ITEMS
+
+
+def test_saves_results_as_json(tmp_path, capsys):
+    output = tmp_path / "results.json"
+
+    main(["--rounds", "1", "-k", "qiita", "--output", str(output)])
+
+    report = json.loads(output.read_text(encoding="utf8"))
+    assert set(report["results"]) == {
+        "qiita_advent_calendar._parse_titles",
+        "qiita_official_event._parse_paginated_articles",
+    }
+    assert (
+        report["results"]["qiita_advent_calendar._parse_titles"]["items"] == 25
+    )
+    assert "qiita_advent_calendar._parse_titles" in capsys.readouterr().out
+
+
+def test_scaling_walks_all_pages():
+    report = scaling.run([2])
+
+    assert {
+        name: by_pages["2"]["items"]
+        for name, by_pages in report["results"].items()
+    } == {
+        "hatena_blog._fetch_titles": 2 * ENTRIES_PER_PAGE["hatena"],
+        "qiita_official_event.fetch_qiita_official_event": (
+            2 * ENTRIES_PER_PAGE["qiita"]
+        ),
+        "zenn_contest.fetch_zenn_contest": 2 * ENTRIES_PER_PAGE["zenn"],
+        "github_changelog.fetch_github_changelog": (
+            2 * ENTRIES_PER_PAGE["github"]
+        ),
+    }
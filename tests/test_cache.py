@@ -0,0 +1,140 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from recent_state_summarizer.backends import OpenAICompatibleBackend
+from recent_state_summarizer.cache import SummaryCache, summary_cache_key
+from recent_state_summarizer.summarize import summarize_titles
+from tests.conftest import build_response
+
+
+class TestSummaryCacheKey:
+    def test_same_inputs(self):
+        assert summary_cache_key(
+            "gpt-3.5-turbo", 0.0, "prompt", host="api.openai.com"
+        ) == summary_cache_key(
+            "gpt-3.5-turbo", 0.0, "prompt", host="api.openai.com"
+        )
+
+    def test_differs_by_model_temperature_prompt_and_host(self):
+        keys = {
+            summary_cache_key(
+                "gpt-3.5-turbo", 0.0, "prompt", host="api.openai.com"
+            ),
+            summary_cache_key(
+                "gpt-4o-mini", 0.0, "prompt", host="api.openai.com"
+            ),
+            summary_cache_key(
+                "gpt-3.5-turbo", 0.7, "prompt", host="api.openai.com"
+            ),
+            summary_cache_key(
+                "gpt-3.5-turbo", 0.0, "another prompt", host="api.openai.com"
+            ),
+            summary_cache_key(
+                "gpt-3.5-turbo", 0.0, "prompt", host="localhost:8000"
+            ),
+        }
+        assert len(keys) == 5
+
+
+class TestSummaryCache:
+    def test_miss(self, tmp_path):
+        cache = SummaryCache(tmp_path)
+
+        assert cache.get("missing") is None
+
+    def test_hit(self, tmp_path):
+        cache = SummaryCache(tmp_path)
+        cache.set("key", "要約です")
+
+        assert cache.get("key") == "要約です"
+
+    @pytest.mark.parametrize(
+        "content", ["{", "[]", '{"summary": "要約"}', '{"created_at": 1}']
+    )
+    def test_malformed_entry_is_miss(self, tmp_path, content):
+        (tmp_path / "key.json").write_text(content, encoding="utf8")
+        cache = SummaryCache(tmp_path)
+
+        assert cache.get("key") is None
+
+    def test_concurrent_writers_in_threads(self, tmp_path):
+        cache = SummaryCache(tmp_path)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(
+                executor.map(lambda i: cache.set("key", f"要約{i}"), range(64))
+            )
+
+        assert cache.get("key").startswith("要約")
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_expired_entry_is_removed(self, tmp_path):
+        cache = SummaryCache(tmp_path, ttl=60)
+        with patch("time.time", return_value=1000.0):
+            cache.set("key", "要約です")
+
+        with patch("time.time", return_value=1061.0):
+            assert cache.get("key") is None
+        assert not (tmp_path / "key.json").exists()
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = SummaryCache(tmp_path, max_bytes=10_000)
+        cache.set("old", "a" * 3000)
+        cache.set("used", "b" * 3000)
+        os.utime(tmp_path / "old.json", (1, 1))
+        os.utime(tmp_path / "used.json", (2, 2))
+        cache.get("used")
+
+        cache.set("new", "c" * 5000)
+
+        assert cache.get("old") is None
+        assert cache.get("used") == "b" * 3000
+        assert cache.get("new") == "c" * 5000
+
+
+@patch("recent_state_summarizer.summarize._complete_chat")
+class TestSummarizeTitlesCache:
+    def test_reuses_cached_summary(self, complete_chat):
+        complete_chat.return_value = build_response("要約です")
+
+        assert summarize_titles("- タイトル") == "要約です"
+        assert summarize_titles("- タイトル") == "要約です"
+
+        complete_chat.assert_called_once()
+
+    def test_different_titles_call_api(self, complete_chat):
+        complete_chat.return_value = build_response("要約です")
+
+        summarize_titles("- タイトル1")
+        summarize_titles("- タイトル2")
+
+        assert complete_chat.call_count == 2
+
+    def test_different_backend_calls_api(self, complete_chat):
+        complete_chat.return_value = build_response("要約です")
+
+        summarize_titles("- タイトル")
+        summarize_titles(
+            "- タイトル",
+            backend=OpenAICompatibleBackend("http://localhost:8000/v1"),
+        )
+
+        assert complete_chat.call_count == 2
+
+    def test_no_cache(self, complete_chat):
+        complete_chat.return_value = build_response("要約です")
+
+        summarize_titles("- タイトル", use_cache=False)
+        summarize_titles("- タイトル", use_cache=False)
+
+        assert complete_chat.call_count == 2
+
+    def test_no_cache_does_not_store(self, complete_chat, summary_cache_dir):
+        complete_chat.return_value = build_response("要約です")
+
+        summarize_titles("- タイトル", use_cache=False)
+
+        assert not summary_cache_dir.exists()
@@ -0,0 +1,141 @@
+import random
+import string
+import time
+
+from recent_state_summarizer.compaction import (
+    compact_titles,
+    fit_to_budget,
+    normalize_title,
+    remove_near_duplicates,
+    strip_boilerplate,
+    trim_to_budget,
+)
+
+
+def test_normalize_title():
+    assert (
+        normalize_title("ＰｙｔｈｏｎでＡＰＩ　入門  ") == "PythonでAPI 入門"
+    )
+
+
+class TestRemoveNearDuplicates:
+    def test_exact_duplicates_ignoring_case(self):
+        assert remove_near_duplicates(["pytest入門", "PyTest入門"]) == [
+            "pytest入門"
+        ]
+
+    def test_near_duplicates(self):
+        assert remove_near_duplicates(
+            [
+                "Pythonの型ヒントを完全に理解した話",
+                "Pythonの型ヒントを完全に理解した話!",
+                "Rustを始めました",
+            ]
+        ) == ["Pythonの型ヒントを完全に理解した話", "Rustを始めました"]
+
+    def test_keeps_titles_with_different_numbers(self):
+        titles = ["Python入門 第1回 変数と型", "Python入門 第2回 変数と型"]
+
+        assert remove_near_duplicates(titles) == titles
+
+    def test_scales_to_thousands_of_titles(self):
+        generator = random.Random(0)
+        words = [
+            "".join(generator.choices(string.ascii_lowercase, k=6))
+            for _ in range(1000)
+        ]
+        titles = [" ".join(generator.choices(words, k=8)) for _ in range(2000)]
+
+        started_at = time.perf_counter()
+        deduplicated = remove_near_duplicates(
+            titles + [f"{title}!" for title in titles]
+        )
+
+        # Comparing every pair took over 30 seconds
+        assert time.perf_counter() - started_at < 2.0
+        assert deduplicated == titles
+
+
+class TestStripBoilerplate:
+    def test_date_prefix(self):
+        assert strip_boilerplate(
+            ["2023/04/01 入社しました", "2023年4月2日 歓迎会"]
+        ) == ["入社しました", "歓迎会"]
+
+    def test_repeated_series_prefix_is_kept_once(self):
+        assert strip_boilerplate(
+            [
+                "【連載】Python入門 変数",
+                "【連載】Python入門 関数",
+                "【連載】Python入門 クラス",
+                "【告知】登壇します",
+            ]
+        ) == [
+            "【連載】Python入門 変数",
+            "Python入門 関数",
+            "Python入門 クラス",
+            "【告知】登壇します",
+        ]
+
+    def test_prefix_shared_by_few_titles_is_kept(self):
+        titles = ["Python: 型ヒント", "Python: 非同期"]
+
+        assert strip_boilerplate(titles) == titles
+
+    def test_topic_before_colon_is_kept(self):
+        titles = ["Python: 型ヒント", "Python: 非同期", "Python: 型検査"]
+
+        assert strip_boilerplate(titles) == titles
+
+
+def test_fit_to_budget_keeps_leading_titles():
+    assert fit_to_budget("- 新しい記事\n- 古い記事\n- もっと古い記事", 15) == (
+        "- 新しい記事\n- 古い記事"
+    )
+
+
+def test_trim_to_budget_keeps_leading_titles():
+    assert trim_to_budget(
+        ["新しい記事", "古い記事", "もっと古い記事"], 15
+    ) == [
+        "新しい記事",
+        "古い記事",
+    ]
+
+
+class TestCompactTitles:
+    def test_compacts_bullet_list(self):
+        titles = """\
+- 【連載】Python入門 変数
+- 【連載】Python入門 関数
+- 【連載】Python入門 クラス
+- pytest入門
+- ｐｙｔｅｓｔ入門"""
+
+        result = compact_titles(titles)
+
+        assert result.titles == """\
+- 【連載】Python入門 変数
+- Python入門 関数
+- Python入門 クラス
+- pytest入門"""
+        assert (
+            result.saved_tokens == result.tokens_before - result.tokens_after
+        )
+        assert result.saved_tokens > 0
+
+    def test_token_budget(self):
+        titles = "\n".join(f"- 記事{i}" for i in range(100))
+
+        result = compact_titles(titles, token_budget=50)
+
+        assert result.tokens_after <= 50
+        assert result.titles.startswith("- 記事0\n- 記事1")
+
+    def test_unchanged_titles(self):
+        titles = "- Pythonのテストについて学ぶ\n- pytest入門"
+
+        result = compact_titles(titles)
+
+        assert result.titles == titles
+        assert result.saved_tokens == 0
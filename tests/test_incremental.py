@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+import pytest
+
+from recent_state_summarizer.incremental import (
+    load_state,
+    summarize_incrementally,
+    title_drift,
+)
+from tests.conftest import build_response
+
+SOURCE = "https://example.hatenablog.com/archive"
+
+
+def sent_prompt(complete_chat):
+    prompts = complete_chat.call_args.args[0]
+    return prompts[0]["content"]
+
+
+class TestTitleDrift:
+    def test_same(self):
+        assert title_drift(["- a", "- b"], ["- b", "- a"]) == 0.0
+
+    def test_added_and_removed(self):
+        assert title_drift(["- a", "- b"], ["- b", "- c"]) == pytest.approx(
+            2 / 3
+        )
+
+    def test_empty(self):
+        assert title_drift([], []) == 0.0
+
+
+@patch("recent_state_summarizer.summarize._complete_chat")
+class TestSummarizeIncrementally:
+    def test_first_run_summarizes_all(self, complete_chat):
+        complete_chat.return_value = build_response("最初の要約")
+
+        summary = summarize_incrementally(SOURCE, "- a\n- b")
+
+        assert summary == "最初の要約"
+        assert "- a\n- b" in sent_prompt(complete_chat)
+        assert load_state(SOURCE) == {
+            "summary": "最初の要約",
+            "titles": ["- a", "- b"],
+        }
+
+    def test_sends_previous_summary_and_new_titles(self, complete_chat):
+        complete_chat.return_value = build_response("最初の要約")
+        summarize_incrementally(SOURCE, "- a\n- b\n- c\n- d")
+        complete_chat.return_value = build_response("更新後の要約")
+
+        summary = summarize_incrementally(SOURCE, "- e\n- a\n- b\n- c\n- d")
+
+        assert summary == "更新後の要約"
+        prompt = sent_prompt(complete_chat)
+        assert "最初の要約" in prompt
+        assert "- e" in prompt
+        assert "- a" not in prompt
+        assert load_state(SOURCE)["summary"] == "更新後の要約"
+
+    def test_no_new_titles_reuses_summary(self, complete_chat):
+        complete_chat.return_value = build_response("最初の要約")
+        summarize_incrementally(SOURCE, "- a\n- b")
+
+        summary = summarize_incrementally(SOURCE, "- a\n- b")
+
+        assert summary == "最初の要約"
+        complete_chat.assert_called_once()
+
+    def test_drift_over_threshold_summarizes_all(self, complete_chat):
+        complete_chat.return_value = build_response("最初の要約")
+        summarize_incrementally(SOURCE, "- a\n- b")
+        complete_chat.return_value = build_response("作り直した要約")
+
+        summary = summarize_incrementally(
+            SOURCE, "- c\n- d\n- a", drift_threshold=0.5
+        )
+
+        assert summary == "作り直した要約"
+        prompt = sent_prompt(complete_chat)
+        assert "最初の要約" not in prompt
+        assert "- c\n- d\n- a" in prompt
@@ -0,0 +1,116 @@
+import json
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from recent_state_summarizer.instrumentation import (
+    CallRecorder,
+    estimate_cost,
+)
+from recent_state_summarizer.summarize import summarize_titles
+from tests.conftest import FakeClock, build_chunk
+
+
+def test_estimate_cost():
+    assert estimate_cost("gpt-3.5-turbo", 1_000_000, 1_000_000) == 2.0
+    assert estimate_cost("unknown-model", 100, 100) is None
+
+
+class TestCallRecorder:
+    def test_whole_response(self):
+        recorder = CallRecorder(
+            "gpt-3.5-turbo", "prompt", clock=FakeClock(0, 1.5)
+        )
+        recorder.observe(
+            {
+                "choices": [{"message": {"content": "要約"}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 50},
+            }
+        )
+
+        metrics = recorder.finish("要約")
+
+        assert metrics.latency == 1.5
+        assert metrics.time_to_first_token is None
+        assert metrics.prompt_tokens == 100
+        assert metrics.completion_tokens == 50
+        assert metrics.cost == pytest.approx(0.000125)
+        assert not metrics.usage_estimated
+
+    def test_streamed_response(self):
+        recorder = CallRecorder(
+            "gpt-3.5-turbo", "prompt", clock=FakeClock(0, 0.3, 2.0)
+        )
+        chunks = [
+            {"choices": [{"index": 0, "delta": {"role": "assistant"}}]},
+            build_chunk("要"),
+            build_chunk("約"),
+            build_chunk(usage={"prompt_tokens": 10, "completion_tokens": 2}),
+        ]
+
+        assert list(recorder.observe(iter(chunks))) == chunks
+        metrics = recorder.finish("要約")
+
+        assert metrics.time_to_first_token == 0.3
+        assert metrics.latency == 2.0
+        assert metrics.prompt_tokens == 10
+        assert metrics.completion_tokens == 2
+
+    def test_estimates_missing_usage(self):
+        recorder = CallRecorder(
+            "gpt-3.5-turbo", "タイトル", clock=FakeClock(0, 1)
+        )
+        recorder.observe({"choices": [{"message": {"content": "要約"}}]})
+
+        metrics = recorder.finish("要約")
+
+        assert metrics.prompt_tokens == 4
+        assert metrics.completion_tokens == 2
+        assert metrics.usage_estimated
+
+    def test_cached(self):
+        recorder = CallRecorder(
+            "gpt-3.5-turbo", "prompt", clock=FakeClock(0, 0.01)
+        )
+
+        metrics = recorder.finish("要約", cached=True)
+
+        assert metrics.cached
+        assert metrics.prompt_tokens == metrics.completion_tokens == 0
+        assert metrics.cost == 0
+
+
+@patch("recent_state_summarizer.summarize._complete_chat")
+class TestSummarizeTitlesMetrics:
+    def test_reports_metrics(self, complete_chat, caplog):
+        caplog.set_level(logging.INFO)
+        complete_chat.return_value = {
+            "choices": [{"message": {"role": "assistant", "content": "要約"}}],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 30},
+        }
+        received = []
+
+        summarize_titles("- タイトル", on_metrics=received.append)
+
+        assert len(received) == 1
+        assert received[0].prompt_tokens == 120
+        assert received[0].completion_tokens == 30
+        assert not received[0].cached
+        logged = [
+            json.loads(record.getMessage())
+            for record in caplog.records
+            if record.name == "recent_state_summarizer.instrumentation"
+        ]
+        assert logged == [{"event": "llm_call", **received[0].as_dict()}]
+
+    def test_reports_cache_hit(self, complete_chat):
+        complete_chat.return_value = {
+            "choices": [{"message": {"role": "assistant", "content": "要約"}}]
+        }
+        received = []
+
+        summarize_titles("- タイトル", on_metrics=received.append)
+        summarize_titles("- タイトル", on_metrics=received.append)
+
+        assert [metrics.cached for metrics in received] == [False, True]
@@ -0,0 +1,191 @@
+import json
+import sys
+from contextlib import closing
+
+import httpx
+import pytest
+import respx
+
+from recent_state_summarizer.__main__ import main
+from recent_state_summarizer.jobs import POLL_INTERVAL, JobQueue, run_worker
+from recent_state_summarizer.retry import RetryPolicy
+
+URLS = [
+    "https://first.hatenablog.com/archive",
+    "https://second.hatenablog.com/archive",
+]
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = JobQueue(
+        tmp_path / "jobs.db",
+        lease=60,
+        policy=RetryPolicy(max_attempts=2, base_delay=10.0, deadline=None),
+        clock=clock,
+    )
+    yield queue
+    queue.close()
+
+
+def test_enqueue_ignores_queued_urls(queue):
+    assert queue.enqueue(URLS) == 2
+    assert queue.enqueue(URLS[:1] + ["https://third.hatenablog.com/"]) == 1
+
+    assert queue.counts() == {
+        "pending": 3,
+        "running": 0,
+        "done": 0,
+        "failed": 0,
+    }
+
+
+def test_claim_and_complete(queue):
+    queue.enqueue(URLS)
+
+    first = queue.claim("worker-1")
+    second = queue.claim("worker-2")
+    assert queue.claim("worker-3") is None
+    assert queue.complete(first, "worker-1", "- Title", "Summary")
+
+    assert (first.url, second.url) == tuple(URLS)
+    assert queue.counts()["done"] == 1
+    (result,) = queue.results("done")
+    assert (result.url, result.titles, result.summary) == (
+        URLS[0],
+        "- Title",
+        "Summary",
+    )
+
+
+def test_job_of_dead_worker_is_claimed_after_lease(queue, clock):
+    queue.enqueue(URLS[:1])
+    job = queue.claim("dead")
+
+    clock.now += 59
+    assert queue.claim("alive") is None
+    clock.now += 1
+    resumed = queue.claim("alive")
+
+    assert resumed.url == job.url
+    assert resumed.attempts == 2
+    # The late result of the dead worker is discarded
+    assert not queue.complete(job, "dead", "- Late", None)
+    assert queue.complete(resumed, "alive", "- Title", None)
+
+
+def test_job_killing_its_workers_is_given_up(queue, clock):
+    queue.enqueue(URLS[:1])
+
+    # The worker dies with each of the `max_attempts` (2) attempts
+    for worker in ("first", "second"):
+        assert queue.claim(worker) is not None
+        clock.now += 60
+
+    assert queue.claim("third") is None
+    assert queue.next_available_at() is None
+    (result,) = queue.results("failed")
+    assert (result.attempts, result.error) == (2, "lease expired")
+
+
+def test_failed_job_is_retried_with_backoff_then_given_up(queue, clock):
+    queue.enqueue(URLS[:1])
+
+    queue.fail(queue.claim("worker"), "worker", "ConnectError()")
+    assert queue.counts()["pending"] == 1
+    clock.now = queue.next_available_at()
+    queue.fail(queue.claim("worker"), "worker", "ConnectError()")
+
+    assert queue.counts()["failed"] == 1
+    assert queue.claim("worker") is None
+    assert queue.next_available_at() is None
+    (result,) = queue.results("failed")
+    assert (result.attempts, result.error) == (2, "ConnectError()")
+
+
+def test_run_worker_waits_for_retries(tmp_path, clock):
+    path = tmp_path / "jobs.db"
+    with closing(JobQueue(path)) as queue:
+        queue.enqueue(URLS)
+    calls = []
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        clock.sleep(seconds)
+
+    def process(url, *, summarize):
+        calls.append(url)
+        if calls.count(url) == 1 and url == URLS[0]:
+            raise ConnectionError
+        return f"- {url}", None
+
+    processed = run_worker(
+        path,
+        "worker",
+        summarize=False,
+        process=process,
+        sleep=sleep,
+        clock=clock,
+    )
+
+    assert processed == 3
+    assert calls == [URLS[0], URLS[1], URLS[0]]
+    assert slept and max(slept) <= POLL_INTERVAL
+    with closing(JobQueue(path)) as queue:
+        assert queue.counts()["done"] == 2
+
+
+def test_run_worker_resumes_jobs_of_crashed_worker(tmp_path, clock):
+    path = tmp_path / "jobs.db"
+    with closing(JobQueue(path, lease=60, clock=clock)) as queue:
+        queue.enqueue(URLS)
+        queue.claim("crashed")
+
+    processed = run_worker(
+        path,
+        "worker",
+        summarize=False,
+        lease=60,
+        process=lambda url, *, summarize: (f"- {url}", None),
+        sleep=clock.sleep,
+        clock=clock,
+    )
+
+    assert processed == 2
+    with closing(JobQueue(path)) as queue:
+        assert queue.counts()["done"] == 2
+
+
+@respx.mock
+def test_jobs_cli(tmp_path, monkeypatch, capsys):
+    for number, url in enumerate(URLS):
+        respx.get(url).mock(
+            return_value=httpx.Response(
+                200,
+                text=f'<a class="entry-title-link" href="{url}/{number}">'
+                f"Title {number}</a>",
+            )
+        )
+    database = str(tmp_path / "campaign.db")
+    (tmp_path / "urls.txt").write_text("\n".join(URLS), encoding="utf8")
+
+    def run(*argv):
+        monkeypatch.setattr(sys, "argv", ["omae-douyo", "jobs", *argv])
+        main()
+
+    run("enqueue", database, str(tmp_path / "urls.txt"))
+    # Worker in this process to mock the responses
+    assert run_worker(database, summarize=False) == 2
+    run("status", database)
+    run("export", database, str(tmp_path / "summaries.jsonl"))
+
+    assert capsys.readouterr().out == (
+        "Queued 2 jobs (0 already queued)\n"
+        "pending: 0\nrunning: 0\ndone: 2\nfailed: 0\n"
+    )
+    lines = (tmp_path / "summaries.jsonl").read_text(encoding="utf8")
+    assert [json.loads(line) for line in lines.splitlines()] == [
+        {"url": URLS[0], "titles": "- Title 0", "summary": None},
+        {"url": URLS[1], "titles": "- Title 1", "summary": None},
+    ]
@@ -47,7 +47,11 @@ def test_main_success_path(monkeypatch, capsys):
 
     monkeypatch.setattr(
         "sys.argv",
-        ["omae-douyo", "https://nikkie-ftnext.hatenablog.com/archive/2025"],
+        [
+            "omae-douyo",
+            "https://nikkie-ftnext.hatenablog.com/archive/2025",
+            "--no-stream",
+        ],
     )
 
     expected_summary = """\
@@ -99,6 +103,92 @@ def test_main_success_path(monkeypatch, capsys):
     )
 
 
+@respx.mock
+@responses.activate
+def test_main_streams_summary(monkeypatch, capsys):
+    respx.get("https://nikkie-ftnext.hatenablog.com/archive/2025").mock(
+        return_value=httpx.Response(
+            status_code=200,
+            text="""\
+<html>
+  <body>
+    <a class="entry-title-link" href="https://nikkie-ftnext.hatenablog.com/entry/post1">pytest入門</a>
+  </body>
+</html>""",
+        )
+    )
+    monkeypatch.setattr("openai.api_key", "sk-test-dummy-key-for-testing")
+    monkeypatch.setattr(
+        "sys.argv",
+        ["omae-douyo", "https://nikkie-ftnext.hatenablog.com/archive/2025"],
+    )
+
+    deltas = ["このユーザーは", "最近、", "pytestを学んでいます。"]
+    chunks = [
+        {
+            "id": "chatcmpl-test",
+            "object": "chat.completion.chunk",
+            "created": 1234567890,
+            "model": "gpt-3.5-turbo",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": delta},
+                    "finish_reason": None,
+                }
+            ],
+        }
+        for delta in deltas
+    ]
+    responses.add(
+        responses.POST,
+        "https://api.openai.com/v1/chat/completions",
+        body="".join(
+            f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            for chunk in chunks
+        )
+        + "data: [DONE]\n\n",
+        status=200,
+        content_type="text/event-stream",
+    )
+
+    main()
+
+    captured = capsys.readouterr()
+    assert captured.out == "このユーザーは最近、pytestを学んでいます。\n"
+    request_body = json.loads(responses.calls[0].request.body)
+    assert request_body["stream"] is True
+
+
+@patch("recent_state_summarizer.__main__.summarize_titles")
+@patch("recent_state_summarizer.__main__.OpenAICompatibleBackend")
+@patch("recent_state_summarizer.__main__.fetch_main")
+def test_run_closes_backend(
+    fetch_main, backend_class, summarize_titles, monkeypatch, capsys
+):
+    summarize_titles.return_value = "要約"
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "omae-douyo",
+            "run",
+            "https://nikkie-ftnext.hatenablog.com/archive/2025",
+            "--base-url",
+            "http://localhost:8000/v1",
+            "--no-stream",
+        ],
+    )
+
+    main()
+
+    assert capsys.readouterr().out == "要約\n"
+    backend_class.assert_called_once_with("http://localhost:8000/v1")
+    assert summarize_titles.call_args.kwargs["backend"] is (
+        backend_class.return_value
+    )
+    backend_class.return_value.close.assert_called_once_with()
+
+
 @patch("recent_state_summarizer.__main__.fetch_main")
 def test_fetch_subcommand(fetch_main, monkeypatch):
     monkeypatch.setattr(
@@ -113,6 +203,7 @@ def test_fetch_subcommand(fetch_main, monkeypatch):
         "articles.jsonl",
         save_as_title_list=False,
         days=None,
+        limit=None,
     )
 
 
@@ -130,6 +221,7 @@ def test_fetch_github_blog_sub_command(fetch_main, monkeypatch):
         "articles.jsonl",
         save_as_title_list=False,
         days=RECENT_DAYS,
+        limit=None,
     )
 
 
@@ -155,6 +247,7 @@ def test_fetch_github_blog_sub_command_days(fetch_main, monkeypatch):
         "titles.txt",
         save_as_title_list=True,
         days=45,
+        limit=None,
     )
 
 
@@ -216,6 +309,44 @@ class TestNormalizeArgv:
         assert normalize_argv() == ["--help"]
 
 
+@respx.mock
+def test_batch_subcommand(tmp_path, monkeypatch):
+    urls = [
+        "https://first.hatenablog.com/archive",
+        "https://second.hatenablog.com/archive",
+    ]
+    for number, url in enumerate(urls):
+        respx.get(url).mock(
+            return_value=httpx.Response(
+                200,
+                text=f'<a class="entry-title-link" href="{url}/{number}">'
+                f"Title {number}</a>",
+            )
+        )
+    (tmp_path / "urls.txt").write_text(
+        "# Blogs\n" + "\n".join(urls) + "\n", encoding="utf8"
+    )
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "omae-douyo",
+            "batch",
+            str(tmp_path / "urls.txt"),
+            str(tmp_path / "articles.jsonl"),
+            "--processes",
+            "1",
+        ],
+    )
+
+    main()
+
+    lines = (tmp_path / "articles.jsonl").read_text(encoding="utf8")
+    assert [json.loads(line) for line in lines.splitlines()] == [
+        {"title": "Title 0", "url": f"{urls[0]}/0", "source": urls[0]},
+        {"title": "Title 1", "url": f"{urls[1]}/1", "source": urls[1]},
+    ]
+
+
 @pytest.mark.parametrize("fetcher_name", get_registered_names())
 def test_fetch_help_includes_fetcher(capsys, monkeypatch, fetcher_name):
     """Test that fetch --help shows all registered fetchers dynamically."""
@@ -233,17 +364,88 @@ def test_fetch_help_includes_fetcher(capsys, monkeypatch, fetcher_name):
     ), f"'{fetcher_name}' not found in help message"
 
 
-def test_fetch_help_hides_days_option(capsys, monkeypatch):
+def test_fetch_help_shows_days_option(capsys, monkeypatch):
     monkeypatch.setattr("sys.argv", ["omae-douyo", "fetch", "--help"])
 
     with pytest.raises(SystemExit):
         main()
 
     captured = capsys.readouterr()
-    assert "--days" not in captured.out
+    assert "--days" in captured.out
     assert "github-blog" in captured.out
 
 
+@patch("recent_state_summarizer.__main__.fetch_main")
+def test_fetch_subcommand_days(fetch_main, monkeypatch):
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "omae-douyo",
+            "fetch",
+            "https://example.hatenablog.com/archive",
+            "articles.jsonl",
+            "--days",
+            "7",
+        ],
+    )
+
+    main()
+
+    fetch_main.assert_called_once_with(
+        "https://example.hatenablog.com/archive",
+        "articles.jsonl",
+        save_as_title_list=False,
+        days=7,
+        limit=None,
+    )
+
+
+@patch("recent_state_summarizer.__main__.fetch_main")
+def test_fetch_subcommand_limit(fetch_main, monkeypatch):
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "omae-douyo",
+            "fetch",
+            "https://example.hatenablog.com/archive",
+            "articles.jsonl",
+            "--limit",
+            "20",
+        ],
+    )
+
+    main()
+
+    fetch_main.assert_called_once_with(
+        "https://example.hatenablog.com/archive",
+        "articles.jsonl",
+        save_as_title_list=False,
+        days=None,
+        limit=20,
+    )
+
+
+@pytest.mark.parametrize("limit", ["0", "-1", "ten"])
+def test_fetch_subcommand_invalid_limit(limit, capsys, monkeypatch):
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "omae-douyo",
+            "fetch",
+            "https://example.hatenablog.com/archive",
+            "articles.jsonl",
+            "--limit",
+            limit,
+        ],
+    )
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    assert "Must be a positive integer" in capsys.readouterr().err
+
+
 def test_fetch_github_blog_help_shows_days_option(capsys, monkeypatch):
     monkeypatch.setattr(
         "sys.argv", ["omae-douyo", "fetch", "github-blog", "--help"]
@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks import memory
+
+FEW_PAGES, MANY_PAGES = 2, 8
+# Allow the garbage which the GC collects periodically (e.g. of requests)
+GROWTH_BUDGET = 2**20
+
+
+@pytest.fixture(scope="module")
+def report():
+    return memory.run([FEW_PAGES, MANY_PAGES], stages=False)
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        f"{scenario} ({format_name})"
+        for scenario in memory.SCENARIOS
+        for format_name in memory.FORMATS
+    ],
+)
+def test_peak_memory_does_not_grow_with_pages(report, name):
+    few = report["results"][name][str(FEW_PAGES)]
+    many = report["results"][name][str(MANY_PAGES)]
+
+    assert many["lines"] == few["lines"] * MANY_PAGES // FEW_PAGES
+    assert many["peak_bytes"] < few["peak_bytes"] + GROWTH_BUDGET
+
+
+def test_memory_by_stage():
+    report = memory.run([2], "hatena")
+
+    result = report["results"]["hatena_blog (title-list)"]["2"]
+    assert set(result["stages"]) == {"dispatch", "parse", "http", "write"}
+    assert result["stages"]["http"]["count"] == 2
+    assert result["stages"]["write"]["peak_bytes"] > 0
+    assert "hatena_blog (json)" in memory.format_report(report)
@@ -0,0 +1,151 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from recent_state_summarizer.packing import (
+    PackedResponseError,
+    pack_sources,
+    parse_packed_response,
+    summarize_packed,
+)
+
+
+def completion(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+
+class TestPackSources:
+    def test_packs_within_budget(self):
+        titles_by_source = {
+            "a": "- " + "x" * 36,
+            "b": "- " + "x" * 36,
+            "c": "- " + "x" * 36,
+        }
+
+        assert pack_sources(titles_by_source, token_budget=20) == [
+            ["a", "b"],
+            ["c"],
+        ]
+
+    def test_limits_number_of_sources(self):
+        titles_by_source = {str(i): "- title" for i in range(5)}
+
+        assert pack_sources(titles_by_source, max_sources=2) == [
+            ["0", "1"],
+            ["2", "3"],
+            ["4"],
+        ]
+
+    def test_large_source_makes_own_pack(self):
+        titles_by_source = {"small": "- a", "large": "- " + "x" * 400}
+
+        assert pack_sources(titles_by_source, token_budget=50) == [
+            ["small"],
+            ["large"],
+        ]
+
+
+class TestParsePackedResponse:
+    def test_object(self):
+        content = '{"source-1": "要約1", "source-2": "要約2"}'
+
+        assert parse_packed_response(content, ["source-1", "source-2"]) == {
+            "source-1": "要約1",
+            "source-2": "要約2",
+        }
+
+    def test_strips_code_fence(self):
+        content = '```json\n{"source-1": "要約1"}\n```'
+
+        assert parse_packed_response(content, ["source-1"]) == {
+            "source-1": "要約1"
+        }
+
+    def test_leaves_out_missing_and_invalid_values(self):
+        content = '{"source-1": "", "source-2": ["要約"], "other": "要約"}'
+
+        assert parse_packed_response(content, ["source-1", "source-2"]) == {}
+
+    @pytest.mark.parametrize("content", ["要約", '["要約"]'])
+    def test_raises_when_not_object(self, content):
+        with pytest.raises(PackedResponseError):
+            parse_packed_response(content, ["source-1"])
+
+
+@patch("recent_state_summarizer.summarize._complete_chat")
+class TestSummarizePacked:
+    titles_by_source = {
+        "https://zenn.dev/a/feed": "- Zennの記事",
+        "https://note.com/b/rss": "- noteの記事",
+    }
+
+    def test_one_request_for_packed_sources(self, complete_chat):
+        complete_chat.return_value = completion(
+            json.dumps({"source-1": "Aの要約", "source-2": "Bの要約"})
+        )
+
+        summaries = summarize_packed(self.titles_by_source)
+
+        assert summaries == {
+            "https://zenn.dev/a/feed": "Aの要約",
+            "https://note.com/b/rss": "Bの要約",
+        }
+        complete_chat.assert_called_once()
+        prompt = complete_chat.call_args.args[0][0]["content"]
+        assert "### source-1\n```\n- Zennの記事\n```" in prompt
+        assert "### source-2\n```\n- noteの記事\n```" in prompt
+
+    def test_falls_back_for_invalid_response(self, complete_chat):
+        complete_chat.side_effect = [
+            completion("JSONではない応答"),
+            completion("Aの要約"),
+            completion("Bの要約"),
+        ]
+
+        summaries = summarize_packed(self.titles_by_source)
+
+        assert summaries == {
+            "https://zenn.dev/a/feed": "Aの要約",
+            "https://note.com/b/rss": "Bの要約",
+        }
+        assert complete_chat.call_count == 3
+
+    def test_falls_back_for_missing_source(self, complete_chat):
+        complete_chat.side_effect = [
+            completion(json.dumps({"source-1": "Aの要約"})),
+            completion("Bの要約"),
+        ]
+
+        summaries = summarize_packed(self.titles_by_source)
+
+        assert summaries["https://note.com/b/rss"] == "Bの要約"
+        assert "- noteの記事" in (
+            complete_chat.call_args.args[0][0]["content"]
+        )
+
+    def test_does_not_cache_invalid_response(self, complete_chat):
+        complete_chat.side_effect = [
+            completion("JSONではない応答"),
+            completion("Aの要約"),
+            completion("Bの要約"),
+            completion(
+                json.dumps({"source-1": "Aの要約", "source-2": "Bの要約"})
+            ),
+        ]
+        summarize_packed(self.titles_by_source)
+
+        summaries = summarize_packed(self.titles_by_source)
+
+        assert summaries["https://note.com/b/rss"] == "Bの要約"
+        assert complete_chat.call_count == 4
+
+    def test_reuses_cached_response(self, complete_chat):
+        complete_chat.return_value = completion(
+            json.dumps({"source-1": "Aの要約", "source-2": "Bの要約"})
+        )
+        summarize_packed(self.titles_by_source)
+
+        summarize_packed(self.titles_by_source)
+
+        complete_chat.assert_called_once()
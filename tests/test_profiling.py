@@ -0,0 +1,98 @@
+import io
+import json
+import sys
+
+import httpx
+import respx
+
+from recent_state_summarizer import profiling
+from recent_state_summarizer.fetch.cli import cli
+from recent_state_summarizer.profiling import Profiler
+from tests.conftest import FakeClock
+
+
+def test_spans_are_noop_when_disabled():
+    items = [1, 2]
+
+    with profiling.span("stage") as span:
+        span.set(bytes=1)
+
+    assert profiling.iterate(items, "parse") is items
+
+
+def test_nested_spans():
+    profiler = Profiler(clock=FakeClock(0.0, 1.0, 1.5, 2.0, 3.0, 4.0))
+
+    with profiler.span("parse", "stage", {}):
+        with profiler.span("http", "http", {"url": "u"}) as span:
+            span.set(status=200)
+
+    http, parse = profiler.spans
+    assert (http.name, http.duration, http.args) == (
+        "http",
+        0.5,
+        {"url": "u", "status": 200},
+    )
+    assert (parse.duration, parse.self_duration) == (2.0, 1.5)
+    trace = profiler.chrome_trace()
+    assert [event["name"] for event in trace["traceEvents"]] == [
+        "parse",
+        "http",
+    ]
+    assert trace["traceEvents"][1]["ts"] == 1_500_000
+    assert trace["traceEvents"][1]["dur"] == 500_000
+    assert "parse" in profiler.summary()
+
+
+def test_iterate_times_each_item():
+    stream = io.StringIO()
+
+    with profiling.profiling(None, stream=stream) as profiler:
+        assert list(profiling.iterate(iter([1, 2]), "parse")) == [1, 2]
+
+    # The last span is the exhausted step
+    assert [span.name for span in profiler.spans] == ["parse"] * 3
+    assert "parse" in stream.getvalue()
+
+
+@respx.mock
+def test_fetch_cli_profile(tmp_path, monkeypatch, capsys):
+    url = "https://example.hatenablog.com/archive/2025"
+    respx.get(url).mock(
+        return_value=httpx.Response(
+            200,
+            text="""\
+<html><body>
+<a class="entry-title-link" href="https://example.hatenablog.com/entry/1">1</a>
+</body></html>""",
+        )
+    )
+    trace_path = tmp_path / "trace.json"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "fetch",
+            url,
+            str(tmp_path / "titles.txt"),
+            "--profile",
+            "--profile-output",
+            str(trace_path),
+        ],
+    )
+
+    cli()
+
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    assert {event["name"] for event in events} == {
+        "dispatch",
+        "parse",
+        "http",
+        "write",
+    }
+    (http,) = [event for event in events if event["name"] == "http"]
+    assert http["args"]["status"] == 200
+    assert http["args"]["bytes"] > 0
+    stderr = capsys.readouterr().err
+    assert "self ms" in stderr
+    assert f"Trace saved to {trace_path}" in stderr
@@ -0,0 +1,225 @@
+from unittest.mock import patch
+
+import openai
+import pytest
+
+from recent_state_summarizer.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    TransientError,
+    call_with_retry,
+    parse_retry_after,
+)
+from recent_state_summarizer.summarize import _complete_chat
+from tests.conftest import FakeClock
+
+NO_WAIT = RetryPolicy(base_delay=0.0)
+
+
+def flaky(failures, **error_kwargs):
+    calls = []
+
+    def func(remaining):
+        calls.append(remaining)
+        if len(calls) <= failures:
+            raise TransientError("temporary", **error_kwargs)
+        return "ok"
+
+    return func, calls
+
+
+class TestCallWithRetry:
+    def test_retries_until_success(self):
+        func, calls = flaky(2)
+
+        result = call_with_retry(
+            func, host="example.com", policy=NO_WAIT, breaker=CircuitBreaker()
+        )
+
+        assert result == "ok"
+        assert len(calls) == 3
+
+    def test_raises_cause_when_exhausted(self):
+        def func(remaining):
+            try:
+                raise ConnectionError("refused")
+            except ConnectionError as error:
+                raise TransientError("temporary") from error
+
+        with pytest.raises(ConnectionError):
+            call_with_retry(
+                func,
+                host="example.com",
+                policy=NO_WAIT,
+                breaker=CircuitBreaker(),
+            )
+
+    def test_returns_result_when_exhausted(self):
+        func, calls = flaky(10, result="error response")
+
+        result = call_with_retry(
+            func,
+            host="example.com",
+            policy=RetryPolicy(max_attempts=3, base_delay=0.0),
+            breaker=CircuitBreaker(),
+        )
+
+        assert result == "error response"
+        assert len(calls) == 3
+
+    def test_follows_retry_after(self):
+        clock = FakeClock()
+        func, _ = flaky(1, retry_after=7.0)
+
+        call_with_retry(
+            func,
+            host="example.com",
+            breaker=CircuitBreaker(),
+            sleep=clock.sleep,
+            clock=clock,
+        )
+
+        assert clock.now == 7.0
+
+    def test_stops_before_deadline(self):
+        clock = FakeClock()
+        func, calls = flaky(5, retry_after=40.0, result="error response")
+
+        result = call_with_retry(
+            func,
+            host="example.com",
+            policy=RetryPolicy(deadline=60.0),
+            breaker=CircuitBreaker(),
+            sleep=clock.sleep,
+            clock=clock,
+        )
+
+        assert result == "error response"
+        assert calls == [60.0, 20.0]
+
+    def test_non_idempotent_call_is_not_retried_after_sent(self):
+        func, calls = flaky(1, sent=True, result="error response")
+
+        call_with_retry(
+            func,
+            host="example.com",
+            policy=NO_WAIT,
+            idempotent=False,
+            breaker=CircuitBreaker(),
+        )
+
+        assert len(calls) == 1
+
+    def test_non_idempotent_call_is_retried_when_unsent(self):
+        func, calls = flaky(1, sent=False)
+
+        call_with_retry(
+            func,
+            host="example.com",
+            policy=NO_WAIT,
+            idempotent=False,
+            breaker=CircuitBreaker(),
+        )
+
+        assert len(calls) == 2
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, clock=clock)
+        breaker.record_failure("example.com")
+        breaker.record_failure("example.com")
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("example.com")
+        breaker.before_call("other.example.com")
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+        breaker.record_failure("example.com")
+        breaker.record_success("example.com")
+        breaker.record_failure("example.com")
+
+        breaker.before_call("example.com")
+
+    def test_half_open_after_reset_timeout(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            failure_threshold=2, reset_timeout=30.0, clock=clock
+        )
+        breaker.record_failure("example.com")
+        breaker.record_failure("example.com")
+
+        clock.now = 30.0
+        breaker.before_call("example.com")
+        breaker.record_failure("example.com")
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("example.com")
+
+    def test_fails_fast_in_call_with_retry(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        func, calls = flaky(10)
+
+        with pytest.raises(CircuitOpenError):
+            call_with_retry(
+                func, host="example.com", policy=NO_WAIT, breaker=breaker
+            )
+
+        assert len(calls) == 2
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [(None, None), ("", None), ("3", 3.0), ("invalid", None)],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_parse_retry_after_http_date_without_zone():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 -0000") == 0.0
+
+
+@patch("openai.ChatCompletion.create")
+class TestCompleteChatRetry:
+    def test_retries_rate_limit(self, create):
+        create.side_effect = [
+            openai.error.RateLimitError(
+                "Rate limit reached", headers={"retry-after": "0"}
+            ),
+            {"choices": []},
+        ]
+
+        assert _complete_chat([]) == {"choices": []}
+        assert create.call_count == 2
+
+    def test_does_not_retry_invalid_request(self, create):
+        create.side_effect = openai.error.InvalidRequestError(
+            "Invalid", param=None
+        )
+
+        with pytest.raises(openai.error.InvalidRequestError):
+            _complete_chat([])
+
+        assert create.call_count == 1
+
+    def test_default_timeout_left_to_openai(self, create):
+        create.return_value = {"choices": []}
+
+        _complete_chat([])
+
+        assert create.call_args.kwargs["request_timeout"] is None
+
+    def test_explicit_timeout_not_cut_by_deadline(self, create):
+        create.return_value = {"choices": []}
+
+        _complete_chat([], timeout=120.0)
+
+        assert create.call_args.kwargs["request_timeout"] == 120.0
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import time
+
+import httpx
+import openai
+import pytest
+import respx
+
+from recent_state_summarizer.backends import OpenAICompatibleBackend
+from recent_state_summarizer.retry import RetryPolicy
+from recent_state_summarizer.scheduler import (
+    COMPLETION_TOKENS_ESTIMATE,
+    TokenBucket,
+    parse_duration,
+    summarize_many,
+)
+from recent_state_summarizer.tokens import estimate_tokens
+from tests.conftest import FakeClock
+
+COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+NO_WAIT = RetryPolicy(base_delay=0.0, deadline=None)
+
+
+class RateLimitedEndpoint:
+    """Fake chat completions API enforcing limits with its own buckets."""
+
+    def __init__(
+        self, *, requests=1000, tokens=1_000_000, period=60.0, delay=0.05
+    ):
+        self.requests = TokenBucket(requests, period)
+        self.tokens = TokenBucket(tokens, period)
+        self.delay = delay
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        prompt = json.loads(request.content)["messages"][0]["content"]
+        tokens = estimate_tokens(prompt) + COMPLETION_TOKENS_ESTIMATE
+        # Allow a small margin for the gap between dispatch and arrival
+        retry_after = max(
+            self.requests.delay_for(1), self.tokens.delay_for(tokens)
+        )
+        if retry_after > 0.01:
+            self.rejected += 1
+            return httpx.Response(
+                429, headers={"retry-after": f"{retry_after:.3f}"}
+            )
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+        title = prompt.split("```")[1].strip()
+        return httpx.Response(
+            200,
+            json={
+                "choices": [
+                    {"message": {"role": "assistant", "content": title}}
+                ]
+            },
+        )
+
+
+class TestTokenBucket:
+    def test_allows_burst_up_to_capacity(self):
+        bucket = TokenBucket(3, period=3.0, clock=FakeClock())
+
+        for _ in range(3):
+            assert bucket.delay_for(1) == 0
+            bucket.consume(1)
+
+        assert bucket.delay_for(1) == pytest.approx(1.0)
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(3, period=3.0, clock=clock)
+        bucket.consume(3)
+
+        clock.now = 2.0
+
+        assert bucket.delay_for(2) == 0
+
+    def test_pause(self):
+        clock = FakeClock()
+        bucket = TokenBucket(3, period=3.0, clock=clock)
+
+        bucket.pause(5.0)
+
+        assert bucket.delay_for(1) == pytest.approx(6.0)
+        clock.now = 6.0
+        assert bucket.delay_for(1) == 0
+
+    def test_amount_larger_than_capacity_is_capped(self):
+        bucket = TokenBucket(3, period=3.0, clock=FakeClock())
+
+        assert bucket.delay_for(10) == 0
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [("2", 2.0), ("0.5", 0.5), ("6m0s", 360.0), ("1s", 1.0), ("20ms", 0.02)],
+)
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == pytest.approx(expected)
+
+
+class TestSummarizeMany:
+    @respx.mock
+    def test_stays_within_request_limit(self):
+        endpoint = RateLimitedEndpoint(requests=3, period=0.4)
+        respx.post(COMPLETIONS_URL).mock(side_effect=endpoint)
+        titles_by_source = {f"source{i}": f"- title{i}" for i in range(10)}
+
+        summaries = summarize_many(
+            titles_by_source,
+            requests_per_minute=3,
+            period=0.4,
+            api_key="sk-test",
+        )
+
+        assert summaries == {f"source{i}": f"- title{i}" for i in range(10)}
+        assert endpoint.rejected == 0
+        assert endpoint.max_in_flight > 1
+
+    @respx.mock
+    def test_stays_within_token_limit(self):
+        endpoint = RateLimitedEndpoint(tokens=1400, period=0.4)
+        respx.post(COMPLETIONS_URL).mock(side_effect=endpoint)
+        titles_by_source = {f"source{i}": f"- title{i}" for i in range(6)}
+
+        summaries = summarize_many(
+            titles_by_source,
+            tokens_per_minute=1400,
+            period=0.4,
+            api_key="sk-test",
+        )
+
+        assert len(summaries) == 6
+        assert endpoint.rejected == 0
+
+    @respx.mock
+    def test_retries_after_rate_limited(self):
+        endpoint = RateLimitedEndpoint(requests=2, period=0.3)
+        route = respx.post(COMPLETIONS_URL).mock(side_effect=endpoint)
+        titles_by_source = {f"source{i}": f"- title{i}" for i in range(5)}
+
+        summaries = summarize_many(titles_by_source, api_key="sk-test")
+
+        assert summaries == {f"source{i}": f"- title{i}" for i in range(5)}
+        assert endpoint.rejected > 0
+        assert route.call_count == 5 + endpoint.rejected
+
+    @respx.mock
+    def test_follows_remaining_headers(self):
+        calls = []
+
+        def endpoint(request):
+            calls.append(time.monotonic())
+            return httpx.Response(
+                200,
+                headers={
+                    "x-ratelimit-remaining-requests": "0",
+                    "x-ratelimit-reset-requests": "200ms",
+                },
+                json={
+                    "choices": [
+                        {"message": {"role": "assistant", "content": "要約"}}
+                    ]
+                },
+            )
+
+        respx.post(COMPLETIONS_URL).mock(side_effect=endpoint)
+
+        summarize_many(
+            {"a": "- a", "b": "- b"}, max_concurrency=1, api_key="sk-test"
+        )
+
+        assert calls[1] - calls[0] >= 0.2
+
+    @respx.mock
+    def test_retries_server_errors(self):
+        respx.post(COMPLETIONS_URL).mock(
+            side_effect=[
+                httpx.Response(503),
+                httpx.ConnectError("Connection refused"),
+                httpx.Response(
+                    200,
+                    json={
+                        "choices": [
+                            {
+                                "message": {
+                                    "role": "assistant",
+                                    "content": "要約",
+                                }
+                            }
+                        ]
+                    },
+                ),
+            ]
+        )
+
+        summaries = summarize_many(
+            {"a": "- a"}, policy=NO_WAIT, api_key="sk-test"
+        )
+
+        assert summaries == {"a": "要約"}
+
+    @respx.mock
+    def test_failed_source_does_not_discard_others(self):
+        def endpoint(request):
+            prompt = json.loads(request.content)["messages"][0]["content"]
+            if "broken" in prompt:
+                return httpx.Response(500)
+            return httpx.Response(
+                200,
+                json={
+                    "choices": [
+                        {"message": {"role": "assistant", "content": "要約"}}
+                    ]
+                },
+            )
+
+        route = respx.post(COMPLETIONS_URL).mock(side_effect=endpoint)
+
+        summaries = summarize_many(
+            {"a": "- a", "broken": "- broken", "b": "- b"},
+            policy=NO_WAIT,
+            max_concurrency=1,
+            api_key="sk-test",
+        )
+
+        assert summaries == {"a": "要約", "b": "要約"}
+        assert route.call_count == 2 + NO_WAIT.max_attempts
+
+    @respx.mock
+    def test_uses_model_and_backend(self):
+        route = respx.post("http://localhost:8000/v1/chat/completions").mock(
+            return_value=httpx.Response(
+                200,
+                json={
+                    "choices": [
+                        {"message": {"role": "assistant", "content": "要約"}}
+                    ]
+                },
+            )
+        )
+
+        summaries = summarize_many(
+            {"a": "- a"},
+            model="local-model",
+            backend=OpenAICompatibleBackend("http://localhost:8000/v1"),
+        )
+
+        assert summaries == {"a": "要約"}
+        assert json.loads(route.calls[0].request.content)["model"] == (
+            "local-model"
+        )
+
+    def test_requires_api_key(self, monkeypatch):
+        monkeypatch.setattr(openai, "api_key", None)
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+        with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+            summarize_many({"a": "- a"})
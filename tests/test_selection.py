@@ -0,0 +1,65 @@
+import pytest
+
+from recent_state_summarizer.selection import select_representative_titles
+from recent_state_summarizer.tokens import estimate_tokens
+
+np = pytest.importorskip("numpy")
+
+from recent_state_summarizer.selection import (  # noqa: E402
+    cluster_titles,
+    embed_titles,
+)
+
+
+def to_bullet_list(titles):
+    return "".join(f"- {title}\n" for title in titles)
+
+
+class TestEmbedTitles:
+    def test_normalized(self):
+        vectors = embed_titles(["pytest入門", "Rustを始めました", "a"])
+
+        assert vectors.shape == (3, 256)
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+    def test_similar_titles_are_close(self):
+        vectors = embed_titles(
+            ["pytest入門 その1", "pytest入門 その2", "Rustで書くWebサーバー"]
+        )
+
+        similarities = vectors @ vectors.T
+        assert similarities[0, 1] > similarities[0, 2]
+
+
+def test_cluster_titles_groups_similar_titles():
+    titles = [f"pytestでテストを書く {i}" for i in range(20)] + [
+        f"Rustの所有権を学ぶ {i}" for i in range(20)
+    ]
+    vectors = embed_titles(titles)
+
+    labels, medoids = cluster_titles(vectors, 2)
+
+    assert len(set(labels[:20])) == 1
+    assert len(set(labels[20:])) == 1
+    assert labels[0] != labels[20]
+    assert sorted(labels[medoids].tolist()) == sorted(set(labels.tolist()))
+
+
+class TestSelectRepresentativeTitles:
+    def test_returns_all_within_budget(self):
+        titles = ["pytest入門", "Rustを始めました"]
+
+        assert select_representative_titles(titles, 1000) == titles
+
+    def test_fits_in_budget(self):
+        titles = [f"pytestでテストを書く {i}" for i in range(500)] + [
+            f"Rustの所有権を学ぶ {i}" for i in range(500)
+        ]
+
+        selected = select_representative_titles(titles, 100)
+
+        assert 0 < len(selected) < len(titles)
+        assert estimate_tokens(to_bullet_list(selected)) <= 100
+        assert any(title.startswith("pytest") for title in selected)
+        assert any(title.startswith("Rust") for title in selected)
+        assert selected == sorted(selected, key=titles.index)
@@ -0,0 +1,208 @@
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+import respx
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.serve import Coalescer, SummarizerServer
+
+ARCHIVE_URL = "https://example.hatenablog.com/archive/2025"
+ARCHIVE = """\
+<html><body>
+<a class="entry-title-link" href="https://example.hatenablog.com/entry/1">Title 1</a>
+<a class="entry-title-link" href="https://example.hatenablog.com/entry/2">Title 2</a>
+</body></html>"""
+
+
+@pytest.fixture
+def base_url():
+    server = SummarizerServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def upstream(base_url):
+    with respx.mock:
+        respx.route(host="127.0.0.1").pass_through()
+        yield respx
+
+
+def slow_archive(request):
+    # Long enough for the concurrent requests to arrive
+    time.sleep(0.2)
+    return httpx.Response(200, text=ARCHIVE)
+
+
+def test_fetch_streams_json_lines(base_url, upstream):
+    upstream.get(ARCHIVE_URL).mock(
+        return_value=httpx.Response(200, text=ARCHIVE)
+    )
+
+    with httpx.stream(
+        "GET", f"{base_url}/fetch", params={"url": ARCHIVE_URL}
+    ) as response:
+        lines = list(response.iter_lines())
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in lines] == [
+        {"title": "Title 1", "url": "https://example.hatenablog.com/entry/1"},
+        {"title": "Title 2", "url": "https://example.hatenablog.com/entry/2"},
+    ]
+
+
+def test_fetch_errors(base_url, upstream):
+    upstream.get(ARCHIVE_URL).mock(return_value=httpx.Response(404))
+
+    unsupported = httpx.get(
+        f"{base_url}/fetch", params={"url": "https://example.com/"}
+    )
+    not_found = httpx.get(f"{base_url}/fetch", params={"url": ARCHIVE_URL})
+
+    assert unsupported.status_code == 400
+    assert unsupported.json() == {
+        "error": "Unsupported URL: https://example.com/"
+    }
+    assert not_found.status_code == 502
+    assert httpx.get(f"{base_url}/unknown").status_code == 404
+
+
+def test_concurrent_fetches_are_coalesced(base_url, upstream):
+    route = upstream.get(ARCHIVE_URL).mock(side_effect=slow_archive)
+    results = []
+
+    def fetch():
+        response = httpx.get(f"{base_url}/fetch", params={"url": ARCHIVE_URL})
+        results.append(response.text.splitlines())
+
+    with telemetry.collecting() as registry:
+        threads = [threading.Thread(target=fetch) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert route.call_count == 1
+    assert registry.value("serve_coalesced_requests_total") == 3
+    assert len(results) == 4
+    assert all(len(lines) == 2 for lines in results)
+
+
+def test_summarize_titles(base_url, upstream):
+    with patch(
+        "recent_state_summarizer.serve.summarize_titles", return_value="要約"
+    ) as summarize_titles:
+        response = httpx.post(
+            f"{base_url}/summarize", json={"titles": ["Title 1", "Title 2"]}
+        )
+
+    assert response.json() == {"summary": "要約"}
+    summarize_titles.assert_called_once_with(
+        "- Title 1\n- Title 2", on_delta=None, model=None
+    )
+
+
+def test_summarize_url_incrementally(base_url, upstream):
+    upstream.get(ARCHIVE_URL).mock(
+        return_value=httpx.Response(200, text=ARCHIVE)
+    )
+
+    with patch(
+        "recent_state_summarizer.serve.summarize_incrementally",
+        return_value="要約",
+    ) as summarize_incrementally:
+        response = httpx.post(
+            f"{base_url}/summarize",
+            json={"url": ARCHIVE_URL, "incremental": True},
+        )
+
+    assert response.json() == {"summary": "要約"}
+    summarize_incrementally.assert_called_once_with(
+        ARCHIVE_URL, "- Title 1\n- Title 2", on_delta=None, model=None
+    )
+
+
+def test_summarize_requires_titles(base_url, upstream):
+    response = httpx.post(f"{base_url}/summarize", json={})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "request_body",
+    [
+        {"titles": "abc"},
+        {"titles": ["Title 1", 2]},
+        {"url": ARCHIVE_URL, "days": "7"},
+        {"url": ARCHIVE_URL, "days": -1},
+        {"url": ["https://example.hatenablog.com/"]},
+        ["Title 1"],
+    ],
+)
+def test_summarize_rejects_invalid_request(base_url, upstream, request_body):
+    route = upstream.get(ARCHIVE_URL)
+
+    response = httpx.post(f"{base_url}/summarize", json=request_body)
+
+    assert response.status_code == 400
+    assert not route.called
+
+
+def test_fetch_rejects_negative_days(base_url, upstream):
+    response = httpx.get(
+        f"{base_url}/fetch", params={"url": ARCHIVE_URL, "days": "-1"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_incremental_updates_of_url_are_serialized():
+    active = []
+    max_active = []
+
+    def summarize_incrementally(url, titles, **kwargs):
+        active.append(titles)
+        max_active.append(len(active))
+        time.sleep(0.1)
+        active.remove(titles)
+        return titles
+
+    with (
+        SummarizerServer(("127.0.0.1", 0)) as server,
+        patch(
+            "recent_state_summarizer.serve.summarize_incrementally",
+            side_effect=summarize_incrementally,
+        ),
+    ):
+        threads = [
+            threading.Thread(
+                target=server._summarize_incrementally,
+                args=(ARCHIVE_URL, titles, None),
+            )
+            for titles in ("- Title 1", "- Title 2")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert max(max_active) == 1
+
+
+def test_coalescer_shares_errors():
+    coalescer = Coalescer()
+
+    def fail():
+        raise RuntimeError("upstream failed")
+
+    with pytest.raises(RuntimeError, match="upstream failed"):
+        coalescer.call("key", fail)
+    # A later call runs again
+    assert coalescer.call("key", lambda: 1) == 1
@@ -0,0 +1,181 @@
+import argparse
+import json
+import sys
+from contextlib import closing
+
+import httpx
+import pytest
+import respx
+
+from recent_state_summarizer.__main__ import main
+from recent_state_summarizer.jobs import JobQueue
+from recent_state_summarizer.sharding import (
+    Shard,
+    merge_outputs,
+    normalize_url,
+    parse_shard,
+    select_shard,
+    shard_of,
+)
+
+URLS = [f"https://blog{number}.hatenablog.com/archive" for number in range(12)]
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == Shard(2, 4)
+    for value in ["0/4", "5/4", "2", "a/b"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
+
+
+def test_normalize_url():
+    assert (
+        normalize_url("HTTPS://Example.Hatenablog.com:443/archive/#top")
+        == "https://example.hatenablog.com/archive"
+    )
+    assert (
+        normalize_url("http://localhost:8080/feed?page=2")
+        == "http://localhost:8080/feed?page=2"
+    )
+
+
+def test_shards_split_urls_once():
+    shards = [select_shard(URLS, Shard(index, 3)) for index in (1, 2, 3)]
+
+    assert sorted(url for shard in shards for url in shard) == sorted(URLS)
+    assert all(shards)
+    # The same URL written differently stays in its shard
+    assert shard_of(URLS[0], 3) == shard_of(
+        URLS[0].replace("https://blog0", "HTTPS://Blog0") + "/", 3
+    )
+
+
+def test_shard_by_host():
+    urls = [
+        f"https://qiita.com/official-events/{number}" for number in range(5)
+    ]
+
+    assert len({shard_of(url, 4, by="host") for url in urls}) == 1
+
+
+def test_shard_by_host_keeps_hosts_sharing_limits_together():
+    # The subdomains of Hatena blog share the limits of one fetcher
+    assert len({shard_of(url, 4, by="host") for url in URLS}) == 1
+
+
+def test_jobs_enqueue_shards_split_urls_once(tmp_path, monkeypatch):
+    (tmp_path / "urls.txt").write_text("\n".join(URLS), encoding="utf8")
+
+    for index in (1, 2, 3):
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            [
+                "omae-douyo",
+                "jobs",
+                "enqueue",
+                str(tmp_path / f"shard-{index}.db"),
+                str(tmp_path / "urls.txt"),
+                "--shard",
+                f"{index}/3",
+            ],
+        )
+        main()
+
+    queued = []
+    for index in (1, 2, 3):
+        with closing(JobQueue(tmp_path / f"shard-{index}.db")) as queue:
+            queued.append(queue.counts()["pending"])
+    assert queued == [
+        len(select_shard(URLS, Shard(index, 3))) for index in (1, 2, 3)
+    ]
+    assert sum(queued) == len(URLS)
+
+
+@pytest.mark.parametrize("index", [1, 2])
+def test_fetch_skips_url_of_other_shard(index, tmp_path, monkeypatch):
+    url = URLS[0]
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "omae-douyo",
+            "fetch",
+            url,
+            str(tmp_path / "titles.jsonl"),
+            "--shard",
+            f"{index}/2",
+        ],
+    )
+
+    with respx.mock(assert_all_called=False) as router:
+        router.get(url).mock(
+            return_value=httpx.Response(
+                200,
+                text=f'<a class="entry-title-link" href="{url}/0">'
+                "Title 0</a>",
+            )
+        )
+        main()
+
+    assert (tmp_path / "titles.jsonl").exists() == (shard_of(url, 2) == index)
+
+
+def test_merge_outputs(tmp_path):
+    (tmp_path / "1.jsonl").write_text(
+        '{"title": "B1", "url": "https://b/1", "source": "https://b"}\n'
+        '{"title": "B2", "url": "https://b/2", "source": "https://b"}\n'
+    )
+    (tmp_path / "2.jsonl").write_text(
+        '{"title": "A1", "url": "https://a/1", "source": "https://a"}\n'
+        '{"title": "B1", "url": "https://b/1/", "source": "https://b"}'
+    )
+
+    count = merge_outputs(
+        [tmp_path / "1.jsonl", tmp_path / "2.jsonl"], tmp_path / "all.jsonl"
+    )
+
+    lines = (tmp_path / "all.jsonl").read_text().splitlines()
+    assert count == 3
+    assert [json.loads(line)["title"] for line in lines] == ["A1", "B1", "B2"]
+
+
+@respx.mock
+def test_batch_shards_merge_into_unsharded_output(tmp_path, monkeypatch):
+    for number, url in enumerate(URLS):
+        respx.get(url).mock(
+            return_value=httpx.Response(
+                200,
+                text=f'<a class="entry-title-link" href="{url}/{number}">'
+                f"Title {number}</a>",
+            )
+        )
+    (tmp_path / "urls.txt").write_text("\n".join(URLS), encoding="utf8")
+
+    def run(*argv):
+        monkeypatch.setattr(sys, "argv", ["omae-douyo", *argv])
+        main()
+
+    batch = ["batch", str(tmp_path / "urls.txt")]
+    run(*batch, str(tmp_path / "all.jsonl"), "--processes", "1")
+    for index in (1, 2, 3):
+        run(
+            *batch,
+            str(tmp_path / f"shard-{index}.jsonl"),
+            "--processes",
+            "1",
+            "--shard",
+            f"{index}/3",
+        )
+    run(
+        "merge",
+        str(tmp_path / "merged.jsonl"),
+        *(str(tmp_path / f"shard-{index}.jsonl") for index in (1, 2, 3)),
+    )
+
+    expected = sorted(
+        (tmp_path / "all.jsonl").read_text(encoding="utf8").splitlines(),
+        key=lambda line: json.loads(line)["source"],
+    )
+    merged = (tmp_path / "merged.jsonl").read_text(encoding="utf8")
+    assert merged.splitlines() == expected
@@ -0,0 +1,210 @@
+from unittest.mock import patch
+
+from recent_state_summarizer import summarize
+from recent_state_summarizer.summarize import (
+    ModelRoute,
+    _parse_response,
+    route_model,
+    summarize_titles,
+)
+from tests.conftest import build_chunk
+
+SMALL = ModelRoute("small", 2_000, 0.2, 1_000, 100)
+LARGE = ModelRoute("large", 10_000, 0.5, 500, 50)
+
+
+class TestParseResponse:
+    def test_whole_response(self):
+        response = {
+            "choices": [{"message": {"role": "assistant", "content": "要約"}}]
+        }
+
+        assert _parse_response(response) == "要約"
+
+    def test_assembles_streamed_deltas(self):
+        chunks = [
+            {"choices": [{"index": 0, "delta": {"role": "assistant"}}]},
+            build_chunk("最近は"),
+            build_chunk("テストを"),
+            build_chunk("書いています。"),
+            build_chunk(),
+        ]
+        received = []
+
+        content = _parse_response(iter(chunks), on_delta=received.append)
+
+        assert content == "最近はテストを書いています。"
+        assert received == ["最近は", "テストを", "書いています。"]
+
+    def test_skips_chunks_without_choices(self):
+        chunks = [build_chunk("要約"), {"choices": []}]
+
+        assert _parse_response(iter(chunks)) == "要約"
+
+
+class TestRouteModel:
+    def test_small_prompt_goes_to_first_route(self):
+        assert route_model(100, routes=(SMALL, LARGE)) is SMALL
+
+    def test_long_prompt_goes_to_long_context_model(self):
+        assert route_model(5_000, routes=(SMALL, LARGE)) is LARGE
+
+    def test_none_when_no_model_fits(self):
+        assert route_model(20_000, routes=(SMALL, LARGE)) is None
+
+    def test_latency_target_skips_slow_routes(self):
+        slow = ModelRoute("slow", 2_000, 5.0, 1_000, 100)
+
+        assert (
+            route_model(100, latency_target=12.0, routes=(slow, SMALL))
+            is SMALL
+        )
+
+    def test_fastest_fitting_route_when_target_unmet(self):
+        slow = ModelRoute("slow", 2_000, 5.0, 1_000, 100)
+
+        assert (
+            route_model(100, latency_target=0.1, routes=(slow, SMALL)) is SMALL
+        )
+
+    def test_timeout_skips_slow_routes(self):
+        slow = ModelRoute("slow", 20_000, 5.0, 1_000, 100)
+        fast = ModelRoute("fast", 20_000, 0.2, 10_000, 100)
+
+        assert route_model(10_000, timeout=20.0, routes=(slow, fast)) is fast
+
+    def test_slow_route_when_none_in_timeout(self):
+        slow = ModelRoute("slow", 20_000, 5.0, 1_000, 100)
+
+        assert route_model(10_000, timeout=1.0, routes=(SMALL, slow)) is slow
+
+
+@patch("recent_state_summarizer.summarize._complete_chat")
+class TestSummarizeTitlesRouting:
+    def test_routes_by_prompt_size(self, complete_chat, monkeypatch):
+        monkeypatch.setattr(summarize, "MODEL_ROUTES", (SMALL, LARGE))
+        complete_chat.return_value = {
+            "choices": [{"message": {"content": "要約"}}]
+        }
+
+        summarize_titles("- short", use_cache=False, compact=False)
+        summarize_titles(
+            "\n".join(f"- title {i:04}" for i in range(600)),
+            use_cache=False,
+            compact=False,
+        )
+
+        assert [
+            call.kwargs["model"] for call in complete_chat.call_args_list
+        ] == [
+            "small",
+            "large",
+        ]
+
+    def test_timeout_scales_with_estimated_latency(
+        self, complete_chat, monkeypatch
+    ):
+        # About 100 seconds for a short prompt
+        slow = ModelRoute("slow", 2_000, 90.0, 1_000, 100)
+        monkeypatch.setattr(summarize, "MODEL_ROUTES", (slow,))
+        complete_chat.return_value = {
+            "choices": [{"message": {"content": "要約"}}]
+        }
+
+        summarize_titles("- short", use_cache=False, compact=False)
+        summarize_titles(
+            "- short", use_cache=False, compact=False, timeout=300.0
+        )
+
+        timeouts = [
+            call.kwargs["timeout"] for call in complete_chat.call_args_list
+        ]
+        assert timeouts[0] > 2 * 100
+        assert timeouts[1] == 300.0
+
+    def test_fast_route_keeps_default_timeout(
+        self, complete_chat, monkeypatch
+    ):
+        monkeypatch.setattr(summarize, "MODEL_ROUTES", (SMALL,))
+        complete_chat.return_value = {
+            "choices": [{"message": {"content": "要約"}}]
+        }
+
+        summarize_titles("- short", use_cache=False, compact=False)
+
+        assert complete_chat.call_args.kwargs["timeout"] is None
+
+    def test_explicit_model_skips_routing(self, complete_chat, monkeypatch):
+        monkeypatch.setattr(summarize, "MODEL_ROUTES", (SMALL,))
+        complete_chat.return_value = {
+            "choices": [{"message": {"content": "要約"}}]
+        }
+
+        summarize_titles(
+            "- short", use_cache=False, compact=False, model="chosen"
+        )
+
+        assert complete_chat.call_args.kwargs["model"] == "chosen"
+
+    def test_chunks_titles_fitting_no_model(self, complete_chat, monkeypatch):
+        monkeypatch.setattr(
+            summarize,
+            "MODEL_ROUTES",
+            (ModelRoute("small", 4_000, 0.2, 1_000, 100),),
+        )
+        complete_chat.side_effect = [
+            {"choices": [{"message": {"content": f"要約{i}"}}]}
+            for i in range(10)
+        ]
+        titles = "\n".join(f"- title {i:04}" for i in range(1000))
+        received = []
+
+        summary = summarize_titles(
+            titles,
+            use_cache=False,
+            compact=False,
+            on_delta=received.append,
+        )
+
+        calls = complete_chat.call_args_list
+        assert len(calls) > 1
+        assert summary == f"要約{len(calls) - 1}"
+        # Each chunk updates the summary of the previous chunks
+        assert f"要約{len(calls) - 2}" in calls[-1].args[0][0]["content"]
+        assert all(
+            f"title {i:04}" in "".join(c.args[0][0]["content"] for c in calls)
+            for i in range(1000)
+        )
+        # Only the final summary is streamed
+        assert [c.kwargs["stream"] for c in calls] == [False] * (
+            len(calls) - 1
+        ) + [True]
+
+
+@patch("recent_state_summarizer.summarize._complete_chat")
+class TestSummarizeTitlesCompaction:
+    def test_sends_titles_as_they_are_by_default(self, complete_chat):
+        complete_chat.return_value = {
+            "choices": [{"message": {"content": "要約"}}]
+        }
+        titles = "- 【連載】入門 1\n- 【連載】入門 2\n- 【連載】入門 3\n- ｐｙｔｈｏｎ"
+
+        summarize_titles(titles, use_cache=False)
+
+        prompt = complete_chat.call_args.args[0][0]["content"]
+        assert titles in prompt
+
+    def test_token_budget_without_compaction(self, complete_chat):
+        complete_chat.return_value = {
+            "choices": [{"message": {"content": "要約"}}]
+        }
+
+        summarize_titles(
+            "\n".join(f"- 記事{i}" for i in range(100)),
+            use_cache=False,
+            token_budget=50,
+        )
+
+        prompt = complete_chat.call_args.args[0][0]["content"]
+        assert "- 記事0\n- 記事1" in prompt
+        assert "- 記事99" not in prompt
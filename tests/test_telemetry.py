@@ -0,0 +1,177 @@
+import sys
+
+import httpx
+import pytest
+import respx
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.cache import SummaryCache
+from recent_state_summarizer.fetch.cli import cli
+from recent_state_summarizer.instrumentation import CallMetrics, export_metrics
+from recent_state_summarizer.telemetry import MetricsRegistry
+
+
+def test_render():
+    registry = MetricsRegistry()
+    registry.inc("http_requests_total", host="example.com", status="200")
+    registry.inc("http_requests_total", host="example.com", status="200")
+    registry.inc("http_response_bytes_total", 1_234_567, host="example.com")
+    registry.observe("http_request_duration_seconds", 0.3, host="example.com")
+
+    assert registry.render() == """\
+# HELP recent_state_summarizer_http_requests_total HTTP requests of the fetchers (status "error": no response)
+# TYPE recent_state_summarizer_http_requests_total counter
+recent_state_summarizer_http_requests_total{host="example.com",status="200"} 2
+# HELP recent_state_summarizer_http_response_bytes_total Bytes of the HTTP response bodies
+# TYPE recent_state_summarizer_http_response_bytes_total counter
+recent_state_summarizer_http_response_bytes_total{host="example.com"} 1234567
+# HELP recent_state_summarizer_http_request_duration_seconds Latency of the HTTP requests
+# TYPE recent_state_summarizer_http_request_duration_seconds histogram
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="0.05"} 0
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="0.1"} 0
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="0.25"} 0
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="0.5"} 1
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="1"} 1
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="2.5"} 1
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="5"} 1
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="10"} 1
+recent_state_summarizer_http_request_duration_seconds_bucket{host="example.com",le="+Inf"} 1
+recent_state_summarizer_http_request_duration_seconds_sum{host="example.com"} 0.3
+recent_state_summarizer_http_request_duration_seconds_count{host="example.com"} 1
+"""
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc("fetch_records_total", fetcher='a"b\\c\n')
+
+    assert 'fetcher="a\\"b\\\\c\\n"} 1' in registry.render()
+
+
+def test_noop_when_not_collecting():
+    telemetry.inc("fetch_records_total", fetcher="hatena_blog")
+
+    with telemetry.collecting() as registry:
+        telemetry.inc("fetch_records_total", fetcher="hatena_blog")
+
+    assert registry.value("fetch_records_total", fetcher="hatena_blog") == 1
+
+
+def test_textfile_records_failed_run(tmp_path):
+    textfile = tmp_path / "summarizer.prom"
+
+    with pytest.raises(ValueError):
+        with telemetry.collecting(textfile):
+            raise ValueError
+
+    content = textfile.read_text()
+    assert "recent_state_summarizer_run_success 0\n" in content
+    assert "recent_state_summarizer_run_duration_seconds " in content
+    assert list(tmp_path.iterdir()) == [textfile]
+
+
+def test_serve_metrics():
+    registry = MetricsRegistry()
+    registry.inc("fetch_records_total", fetcher="zenn_rss")
+    server = telemetry.serve_metrics(registry, 0)
+    host, port = server.server_address
+    try:
+        response = httpx.get(f"http://{host}:{port}/metrics")
+        not_found = httpx.get(f"http://{host}:{port}/")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert response.headers["content-type"] == telemetry.CONTENT_TYPE
+    assert (
+        'recent_state_summarizer_fetch_records_total{fetcher="zenn_rss"} 1'
+        in response.text
+    )
+    assert not_found.status_code == 404
+
+
+def test_summary_cache_lookups(tmp_path):
+    cache = SummaryCache(tmp_path)
+    cache.set("key", "要約")
+
+    with telemetry.collecting() as registry:
+        cache.get("key")
+        cache.get("missing")
+        cache.get("missing")
+
+    assert registry.value("summary_cache_requests_total", result="hit") == 1
+    assert registry.value("summary_cache_requests_total", result="miss") == 2
+
+
+def test_export_llm_call():
+    with telemetry.collecting() as registry:
+        export_metrics(
+            CallMetrics(
+                model="gpt-4o-mini",
+                latency=1.5,
+                time_to_first_token=0.4,
+                prompt_tokens=100,
+                completion_tokens=20,
+                cost=0.001,
+            )
+        )
+        export_metrics(
+            CallMetrics("gpt-4o-mini", 0.0, None, 0, 0, None, cached=True)
+        )
+
+    assert (
+        registry.value("llm_calls_total", model="gpt-4o-mini", cached="false")
+        == 1
+    )
+    assert (
+        registry.value("llm_calls_total", model="gpt-4o-mini", cached="true")
+        == 1
+    )
+    assert (
+        registry.value("llm_tokens_total", model="gpt-4o-mini", kind="prompt")
+        == 100
+    )
+    assert (
+        'llm_call_duration_seconds_count{model="gpt-4o-mini"} 1'
+        in registry.render()
+    )
+
+
+@respx.mock
+def test_fetch_cli_metrics_textfile(tmp_path, monkeypatch):
+    url = "https://example.hatenablog.com/archive/2025"
+    respx.get(url).mock(
+        return_value=httpx.Response(
+            200,
+            text="""\
+<html><body>
+<a class="entry-title-link" href="https://example.hatenablog.com/entry/1">1</a>
+<a class="entry-title-link" href="https://example.hatenablog.com/entry/2">2</a>
+</body></html>""",
+        )
+    )
+    textfile = tmp_path / "fetch.prom"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "fetch",
+            url,
+            str(tmp_path / "titles.txt"),
+            "--metrics-textfile",
+            str(textfile),
+        ],
+    )
+
+    cli()
+
+    content = textfile.read_text()
+    assert (
+        'recent_state_summarizer_fetch_records_total{fetcher="hatena_blog"} 2'
+        in content
+    )
+    assert (
+        "recent_state_summarizer_http_requests_total"
+        '{host="example.hatenablog.com",status="200"} 1' in content
+    )
+    assert "recent_state_summarizer_run_success 1\n" in content
@@ -0,0 +1,179 @@
+import json
+import random
+
+import httpx
+import pytest
+import respx
+
+from recent_state_summarizer import telemetry
+from recent_state_summarizer.watch import WatchedSource, Watcher, load_config
+from tests.conftest import FakeClock
+
+URL = "https://example.hatenablog.com/archive"
+
+
+def archive(*numbers):
+    links = "\n".join(
+        f'<a class="entry-title-link" '
+        f'href="https://example.hatenablog.com/entry/{number}">'
+        f"Title {number}</a>"
+        for number in numbers
+    )
+    return f"<html><body>{links}</body></html>"
+
+
+def read_titles(path):
+    return [
+        json.loads(line)["title"]
+        for line in path.read_text(encoding="utf8").splitlines()
+    ]
+
+
+def test_load_config(tmp_path):
+    config_path = tmp_path / "sources.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "jitter": 0.2,
+                "sources": [
+                    {"url": URL, "output": "a.jsonl", "summary": "a.txt"},
+                    {"url": URL, "output": "b.jsonl", "interval": 600},
+                ],
+            }
+        )
+    )
+
+    config = load_config(config_path)
+
+    assert config.jitter == 0.2
+    assert config.sources == [
+        WatchedSource(
+            URL, tmp_path / "a.jsonl", 3600.0, summary=tmp_path / "a.txt"
+        ),
+        WatchedSource(URL, tmp_path / "b.jsonl", 600.0),
+    ]
+
+
+def test_load_config_requires_output(tmp_path):
+    config_path = tmp_path / "sources.json"
+    config_path.write_text(json.dumps({"sources": [{"url": URL}]}))
+
+    with pytest.raises(ValueError):
+        load_config(config_path)
+
+
+@respx.mock
+def test_poll_appends_new_entries_and_summarizes(tmp_path):
+    route = respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(200, text=archive(1), headers={"ETag": '"v1"'}),
+            httpx.Response(304),
+            httpx.Response(200, text=archive(2, 1), headers={"ETag": '"v2"'}),
+        ]
+    )
+    output = tmp_path / "titles.jsonl"
+    summary = tmp_path / "summary.txt"
+    summarized = []
+
+    def summarize(source, titles):
+        summarized.append((source, titles))
+        return "要約"
+
+    source = WatchedSource(URL, output, summary=summary)
+    watcher = Watcher([source], summarize=summarize)
+
+    assert len(watcher.poll(source)) == 1
+    assert watcher.poll(source) == []
+    assert len(watcher.poll(source)) == 1
+
+    assert read_titles(output) == ["Title 1", "Title 2"]
+    assert summarized == [
+        (URL, "- Title 1"),
+        (URL, "- Title 2\n- Title 1"),
+    ]
+    assert summary.read_text(encoding="utf8") == "要約"
+    assert "if-none-match" not in route.calls[0].request.headers
+    assert route.calls[1].request.headers["if-none-match"] == '"v1"'
+    assert route.calls[2].request.headers["if-none-match"] == '"v1"'
+
+
+@respx.mock
+def test_entries_kept_before_are_not_written_again(tmp_path):
+    respx.get(URL).mock(return_value=httpx.Response(200, text=archive(2, 1)))
+    output = tmp_path / "titles.jsonl"
+    output.write_text(
+        json.dumps(
+            {
+                "title": "Title 1",
+                "url": "https://example.hatenablog.com/entry/1",
+            }
+        )
+        + "\n"
+    )
+    source = WatchedSource(URL, output)
+
+    Watcher([source]).poll(source)
+
+    assert read_titles(output) == ["Title 1", "Title 2"]
+
+
+@respx.mock
+def test_summarizes_newest_entries_first(tmp_path):
+    respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(200, text=archive(2, 1)),
+            httpx.Response(200, text=archive(4, 3)),
+        ]
+    )
+    summarized = []
+
+    def summarize(source, titles):
+        summarized.append(titles)
+        return "要約"
+
+    source = WatchedSource(
+        URL, tmp_path / "titles.jsonl", summary=tmp_path / "summary.txt"
+    )
+    watcher = Watcher([source], summarize=summarize)
+    watcher.poll(source)
+    watcher.poll(source)
+
+    assert summarized[-1] == "- Title 4\n- Title 3\n- Title 1\n- Title 2"
+
+
+@respx.mock
+def test_run_pending_with_jitter(tmp_path):
+    ok = respx.get(URL).mock(return_value=httpx.Response(200, text=archive(1)))
+    broken_url = "https://broken.hatenablog.com/archive"
+    broken = respx.get(broken_url).mock(return_value=httpx.Response(404))
+    clock = FakeClock()
+    sources = [
+        WatchedSource(URL, tmp_path / "ok.jsonl", interval=100),
+        WatchedSource(broken_url, tmp_path / "broken.jsonl", interval=100),
+    ]
+    polls = []
+    watcher = Watcher(
+        sources,
+        jitter=0.1,
+        on_poll=lambda: polls.append(clock.now),
+        clock=clock,
+        rng=random.Random(0),
+    )
+
+    with telemetry.collecting() as registry:
+        # The first polls are spread over the first 10 seconds
+        clock.now = 5.0
+        assert 0 < watcher.run_pending() < 5
+        assert polls == []
+        clock.now = 10.0
+        delay = watcher.run_pending()
+        assert polls == [10.0, 10.0]
+        # The next polls are due in 90 to 110 seconds
+        assert 90 <= delay <= 110
+        clock.now += delay
+        watcher.run_pending()
+
+    assert len(polls) == 3
+    assert ok.call_count + broken.call_count == 3
+    assert registry.value("watch_polls_total", result="new") == 1
+    assert registry.value("watch_polls_total", result="error") >= 1